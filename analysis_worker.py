@@ -0,0 +1,300 @@
+"""
+分析運算後端 (Analysis Backend)
+=============================
+大量掃描的指標計算 / 製作成本計算 / 走勢圖資料整理都是純 Python 運算，
+在執行緒中執行仍會與 Tk 主迴圈搶 GIL，造成 UI 卡頓。
+
+本模組提供可選的子行程後端：
+- 市場資料先壓縮成欄位式 array（只保留分析用欄位），再送到子行程
+- 子行程只回傳小型結果表（每個物品一列），不回傳原始 listings / history
+- 子行程失敗（例如被防毒軟體擋下）時自動退回同行程計算
+
+注意：本模組會在子行程中被 import，不可 import tkinter / app。
+"""
+
+import logging
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from market_api import DataAnalyzer
+from sales_index import SalesIndex
+from sniping import best_snipe_listings, is_worth_sniping
+from crafting_service import solve_top_recipe
+
+
+# ==========================================
+# 壓縮 / 還原市場資料
+# ==========================================
+
+def pack_market_data(item_data):
+    """
+    將 Universalis 的單一物品資料壓縮為欄位式 array。
+    listings: (價格, 數量, HQ, 更新時間, 世界索引)；history: (價格, 數量, 時間, HQ)
+    """
+    if "items" in item_data and isinstance(item_data["items"], dict):
+        listings, history = [], []
+        for sub in item_data["items"].values():
+            listings.extend(sub.get("listings", []))
+            history.extend(sub.get("recentHistory", []))
+    else:
+        listings = item_data.get("listings", [])
+        history = item_data.get("recentHistory", [])
+
+    worlds = []
+    world_index = {}
+    l_price, l_qty, l_hq, l_time, l_world = array("q"), array("l"), array("b"), array("d"), array("h")
+    for l in listings:
+        w_name = l.get("worldName", str(l.get("worldID")))
+        if w_name not in world_index:
+            world_index[w_name] = len(worlds)
+            worlds.append(w_name)
+        l_price.append(l.get("pricePerUnit", 0))
+        l_qty.append(l.get("quantity", 0))
+        l_hq.append(1 if l.get("hq") else 0)
+        l_time.append(l.get("lastReviewTime", 0))
+        l_world.append(world_index[w_name])
+
+    h_price, h_qty, h_time, h_hq = array("q"), array("l"), array("d"), array("b")
+    for h in history:
+        h_price.append(h.get("pricePerUnit", 0))
+        h_qty.append(h.get("quantity", 0))
+        h_time.append(h.get("timestamp", 0))
+        h_hq.append(1 if h.get("hq") else 0)
+
+    return {
+        "itemID": item_data.get("itemID"),
+        "minPrice": item_data.get("minPrice", 0),
+        "worlds": worlds,
+        "listings": (l_price, l_qty, l_hq, l_time, l_world),
+        "history": (h_price, h_qty, h_time, h_hq),
+    }
+
+
+def unpack_market_data(packed):
+    """還原為 DataAnalyzer 可直接使用的 dict（只含分析用欄位）。"""
+    worlds = packed["worlds"]
+    l_price, l_qty, l_hq, l_time, l_world = packed["listings"]
+    h_price, h_qty, h_time, h_hq = packed["history"]
+    return {
+        "itemID": packed["itemID"],
+        "minPrice": packed["minPrice"],
+        "listings": [
+            {"pricePerUnit": p, "quantity": q, "hq": bool(hq), "lastReviewTime": t, "worldName": worlds[w]}
+            for p, q, hq, t, w in zip(l_price, l_qty, l_hq, l_time, l_world)
+        ],
+        "recentHistory": [
+            {"pricePerUnit": p, "quantity": q, "timestamp": t, "hq": bool(hq)}
+            for p, q, t, hq in zip(h_price, h_qty, h_time, h_hq)
+        ],
+    }
+
+
+# ==========================================
+# 可在子行程執行的純函式
+# ==========================================
+
+def scan_row(item_data, hours, tax_rate=0.05, min_profit=0):
+    """
+    最愛掃描的單列結果（熱度 / 均價 / 庫存 / 最低價 / 狙擊利潤）。
+    沒有任何上架資料的物品回傳 None（等同 clean_market_data(min_price_threshold=0)）。
+    狙擊利潤與市場概況使用相同的門檻（min_profit 或小額高報酬），未達門檻時為 0；
+    snipe_quantity / snipe_resale / snipe_cost 保留原始買進位置，設定變更時可直接重算。
+    """
+    listings = item_data.get("listings", [])
+    if not listings:
+        return None
+    sold, _ = DataAnalyzer.calculate_velocity_in_timeframe(None, hours, index=SalesIndex.for_item(item_data))
+    heat_val = sold if hours < 24 else sold / (hours / 24.0)
+    current_stock = len(listings)
+    avg_price = int(sum(l["pricePerUnit"] for l in listings) / current_stock) if current_stock else 0
+    # 斷層價格以最近 20 筆成交均價檢查合理性（同市場概況的狙擊判斷）
+    recent = sorted((h for h in item_data.get("recentHistory", []) if h.get("pricePerUnit", 0) > 0),
+                    key=lambda h: h.get("timestamp", 0), reverse=True)[:20]
+    recent_avg = sum(h["pricePerUnit"] for h in recent) / len(recent) if recent else 0
+    snipe = best_snipe_listings(listings, tax_rate, recent_avg)
+    return {
+        "heat": heat_val,
+        "avg": avg_price,
+        "stock": current_stock,
+        "min": item_data.get("minPrice", 0),
+        "snipe": snipe["profit"] if is_worth_sniping(snipe, min_profit) else 0,
+        "snipe_cost": snipe["cost"] if snipe else 0,
+        "snipe_quantity": snipe["quantity"] if snipe else 0,
+        "snipe_resale": snipe["resale"] if snipe else 0,
+        "id": item_data.get("itemID"),
+    }
+
+
+def analyze_scan_chunk(packed_chunk, hours, tax_rate=0.05, min_profit=0):
+    """[子行程] 一次處理一批物品，攤平 IPC 成本。"""
+    rows = []
+    for packed in packed_chunk:
+        row = scan_row(unpack_market_data(packed), hours, tax_rate, min_profit)
+        if row:
+            rows.append(row)
+    return rows
+
+
+def prepare_price_chart(history):
+    """
+    走勢圖資料整理：異常值過濾 (median 0.1x ~ 5x)、時間排序、HQ/NQ 分組、移動平均。
+    history: [(timestamp, price, hq), ...]；回傳只含數字的小型結果，主執行緒直接畫圖。
+    """
+    valid = [h for h in history if h[1] > 0]
+    if not valid:
+        return None
+    prices_sorted = sorted(h[1] for h in valid)
+    median_p = prices_sorted[len(prices_sorted) // 2]
+    valid = [h for h in valid if 0.1 * median_p <= h[1] <= 5 * median_p]
+    if not valid:
+        return None
+    valid.sort(key=lambda h: h[0])
+
+    timestamps = [h[0] for h in valid]
+    prices = [h[1] for h in valid]
+    hq_flags = [bool(h[2]) for h in valid]
+
+    # 移動平均線（以累積和計算，O(n)）
+    ma_window = 0
+    ma_prices = []
+    if len(prices) >= 5:
+        window = min(20, len(prices) // 3)
+        if window >= 2:
+            ma_window = window
+            running = 0
+            for i, p in enumerate(prices):
+                running += p
+                if i >= window:
+                    running -= prices[i - window]
+                ma_prices.append(running / min(i + 1, window))
+
+    return {
+        "timestamps": timestamps,
+        "prices": prices,
+        "hq_flags": hq_flags,
+        "ma_window": ma_window,
+        "ma_prices": ma_prices,
+    }
+
+
+# ==========================================
+# 後端（同行程 / 子行程）
+# ==========================================
+
+class AnalysisBackend:
+    """
+    分析運算後端。use_processes=False 時在呼叫端執行緒直接計算（原本行為）；
+    True 時送到 ProcessPoolExecutor，避免與 Tk 主迴圈爭奪 GIL。
+    """
+
+    CHUNK_SIZE = 100  # 每個子行程工作處理的物品數
+
+    def __init__(self, use_processes=False, max_workers=2):
+        self.use_processes = use_processes
+        self.max_workers = max_workers
+        self._pool = None
+
+    def set_mode(self, use_processes):
+        if use_processes == self.use_processes:
+            return
+        self.use_processes = use_processes
+        if not use_processes:
+            self.shutdown()
+        logging.info(f"[分析後端] 切換為{'子行程' if use_processes else '同行程'}模式")
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool
+
+    def _run_many(self, fn, arg_list):
+        """將多個工作送到子行程；子行程無法使用時退回同行程計算。"""
+        if self.use_processes:
+            try:
+                pool = self._get_pool()
+                futures = [pool.submit(fn, *args) for args in arg_list]
+                return [f.result() for f in futures]
+            except (BrokenProcessPool, OSError) as e:
+                logging.warning(f"[分析後端] 子行程無法使用 ({e})，改為同行程計算")
+                self.set_mode(False)
+        return [fn(*args) for args in arg_list]
+
+    def scan_rows(self, item_data_list, hours, tax_rate=0.05, min_profit=0):
+        """最愛掃描：回傳每個物品一列的結果（無上架資料者略過）。"""
+        if not self.use_processes:
+            return [row for row in (scan_row(d, hours, tax_rate, min_profit) for d in item_data_list) if row]
+        packed = [pack_market_data(d) for d in item_data_list]
+        chunks = [(packed[i:i + self.CHUNK_SIZE], hours, tax_rate, min_profit) for i in range(0, len(packed), self.CHUNK_SIZE)]
+        rows = []
+        for chunk_rows in self._run_many(analyze_scan_chunk, chunks):
+            rows.extend(chunk_rows)
+        return rows
+
+    def solve_crafting(self, item_id, recipes, prices, max_depth=10):
+        """製作成本計算（純數字輸入 / 輸出）。"""
+        return self._run_many(solve_top_recipe, [(item_id, recipes, prices, max_depth)])[0]
+
+    def prepare_chart(self, history):
+        """走勢圖資料整理；history 為 Universalis recentHistory 格式。"""
+        compact = [(h.get("timestamp", 0), h.get("pricePerUnit", 0), h.get("hq", False)) for h in history]
+        return self._run_many(prepare_price_chart, [(compact,)])[0]
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+# ==========================================
+# UI 回應時間量測
+# ==========================================
+
+class FrameLatencyMonitor:
+    """
+    量測 Tk 主迴圈的 frame latency：每 interval_ms 排程一次 after()，
+    實際執行時間與預期時間的差距即為主迴圈被阻塞的時間。
+    """
+
+    def __init__(self, widget, interval_ms=50):
+        self.widget = widget
+        self.interval_ms = interval_ms
+        self.samples = []
+        self._running = False
+        self._expected = 0.0
+        self._job = None
+
+    def start(self):
+        self.samples = []
+        self._running = True
+        self._schedule()
+
+    def _schedule(self):
+        self._expected = time.perf_counter() + self.interval_ms / 1000.0
+        self._job = self.widget.after(self.interval_ms, self._tick)
+
+    def _tick(self):
+        if not self._running:
+            return
+        self.samples.append(max(0.0, (time.perf_counter() - self._expected) * 1000.0))
+        self._schedule()
+
+    def stop(self):
+        """停止量測並回傳統計 {samples, avg_ms, p95_ms, max_ms}。"""
+        self._running = False
+        if self._job:
+            try:
+                self.widget.after_cancel(self._job)
+            except Exception:
+                pass
+            self._job = None
+        if not self.samples:
+            return {"samples": 0, "avg_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+        ordered = sorted(self.samples)
+        return {
+            "samples": len(ordered),
+            "avg_ms": sum(ordered) / len(ordered),
+            "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+            "max_ms": ordered[-1],
+        }
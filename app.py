@@ -1,5 +1,7 @@
 import customtkinter as ctk
 import threading
+import multiprocessing
+import bisect
 import webbrowser
 import gc # [Optimization] For manual garbage collection
 from datetime import datetime
@@ -18,10 +20,29 @@ import matplotlib.dates as mdates
 
 # Import new modules
 from database import DatabaseManager
-from market_api import MarketAPI, DataAnalyzer
+from market_api import MarketAPI, DataAnalyzer, HOT_SPAN_HOURS, METRICS_MEMO_KEY
 from crafting_service import CraftingService
 
 from recipe_provider import RecipeProvider
+from chinese_converter import convert_simplified_to_traditional
+from task_executor import TaskExecutor, BACKGROUND
+from analysis_worker import AnalysisBackend, FrameLatencyMonitor, prepare_price_chart
+from scanner import iter_scan, iter_fan_out, collect_favorites_scan, build_server_matrix
+from scheduler import Scheduler, HIGH, NORMAL, LOW
+from price_alerts import AlertIndex, ALERT_BATCH_SIZE, ALERT_QUERY, ALERT_FIELDS
+from hot_cache import HotScanCache
+from market_index import MarketIndexCrawler
+from market_query import QueryEngine, QueryError, FIELDS as QUERY_FIELDS
+from arbitrage import iter_arbitrage_scan, candidates_from_index, DEFAULT_HOLD_DAYS
+from listing_churn import ListingTracker
+from sniping import reprice_snipe, is_worth_sniping
+
+ARBITRAGE_INDEX_SOURCE = "全市場索引 (熱門)"   # 跨服套利的物品來源選項
+EXPLORER_ALL_ITEMS = "全部物品"                 # 市場探索的查詢範圍選項
+EXPLORER_ALL_FAVORITES = "最愛: 全部"
+ARBITRAGE_MAX_ROWS = 300                        # 跨服套利表格最多顯示的路線數
+# 最愛掃描表格：欄位標題 -> 可排序的結果欄位
+SCAN_SORT_FIELDS = {"熱度": "heat", "均價": "avg", "庫存": "stock", "最低價": "min", "狙擊": "snipe"}
 
 # 設定外觀模式
 ctk.set_appearance_mode("Dark")
@@ -60,7 +81,17 @@ class FF14MarketApp(ctk.CTk):
         self.db = DatabaseManager()
         self.api = MarketAPI()
         self.recipe_provider = RecipeProvider()
-        self.crafting_service = CraftingService(self.api, self.recipe_provider, self.db)
+        self.analysis_backend = AnalysisBackend()
+        self.crafting_service = CraftingService(self.api, self.recipe_provider, self.db, backend=self.analysis_backend)
+        # 背景工作執行器：有界 worker、同一 view 最新請求優先、過期結果丟棄
+        self.executor = TaskExecutor(dispatch=lambda fn: self.after(0, fn))
+        # [P5] 週期性背景工作統一排程，與 MarketAPI 共用 Universalis 限速額度
+        self.scheduler = Scheduler(rate_limiter=self.api.rate_limiter)
+        # [P5] 任何功能抓到的市場資料都順便檢查價格警報
+        self.alert_index = AlertIndex()
+        # [P5] 每筆含 listingID 的市場資料都與上一份快照比對（削價 / 存活時間 / 下架率）
+        self.listing_tracker = ListingTracker(self.db)
+        self.api.add_payload_hook(self._on_market_payload)
 
         # 儲存所有日誌的列表 (用於 Debug 視窗回溯)
         self.log_history = []
@@ -82,9 +113,15 @@ class FF14MarketApp(ctk.CTk):
             "dts_bad_threshold": 30,
             "avg_price_days_limit": 30,
             "market_tax_rate": 5,
-            "sniping_min_profit": 2000
+            "sniping_min_profit": 2000,
+            "analysis_process_pool": 0,  # [P5] 1 = 重度分析改在子行程執行
+            "market_index_enabled": 0    # [P5] 1 = 背景建立全市場價格索引
         }
         self.config = self.db.load_settings(self.default_config)
+        self.analysis_backend.set_mode(bool(self.config["analysis_process_pool"]))
+        # 熱賣與最愛掃描可同時進行，各自一個量測器，避免互相中斷或混入對方的取樣
+        self.frame_monitors = {"hot": FrameLatencyMonitor(self), "favorites": FrameLatencyMonitor(self)}
+        self.market_index = MarketIndexCrawler(self.api, self.db)
         self.custom_servers = self.db.get_custom_servers()
         
         # [New] Load user vocabulary
@@ -113,20 +150,15 @@ class FF14MarketApp(ctk.CTk):
             
         self.recent_history = []
         
-        # [Hot Items] 快取變數
-        self.hot_items_cache = []        # 快取的掃描結果
-        self.hot_items_cache_time = 0    # 快取時間戳
-        self.hot_items_cache_ttl = 300   # 快取有效期（秒）= 5 分鐘
-        self.hot_items_cache_params = {} # 快取時的參數 (hours, sample_size)
+        # [Hot Items] 以 (伺服器, 時段, 取樣數) 為鍵的多組快取，存於 SQLite
+        self.hot_cache = HotScanCache(self.db, ttl=300)  # 5 分鐘內視為新鮮
 
         # [P3] 價格警報監控
-        self._alert_running = False
         self._alert_interval = 300  # 5 分鐘檢查一次
         
         # [P3+P4] 自動刷新
         self._auto_refresh_active = False
-        self._auto_refresh_interval = 300  # 5 分鐘
-        self._auto_refresh_job = None
+        self._auto_refresh_interval = 300  # 預設 5 分鐘；載入物品後依銷售速度調整
 
         # 設定表格樣式
         self.setup_treeview_style()
@@ -141,6 +173,9 @@ class FF14MarketApp(ctk.CTk):
         # 建立主內容區 (包含多個分頁: 市場/製作/歷史)
         self.create_main_content()
 
+        # [P5] 註冊週期性工作並啟動排程
+        self._register_scheduled_jobs()
+
     # [New] Helper for translation
     def translate_term(self, term):
         """Applies user-defined vocabulary to a term."""
@@ -186,6 +221,8 @@ class FF14MarketApp(ctk.CTk):
         self.tabview.add("歷史數據")
         self.tabview.add("🔥 市場熱賣")
         self.tabview.add("⭐ 我的最愛掃描")
+        self.tabview.add("🧭 市場探索")
+        self.tabview.add("💱 跨服套利")
         
         # Setup Tabs
         self.setup_tab_overview()
@@ -193,6 +230,8 @@ class FF14MarketApp(ctk.CTk):
         self.setup_tab_history()
         self.setup_tab_hot_items()  # [New] 市場熱賣
         self.setup_tab_scanner()
+        self.setup_tab_explorer()  # [P5] 全市場索引查詢
+        self.setup_tab_arbitrage()  # [P5] 跨服套利掃描
 
         # 底部狀態列
         self.status_bar = ctk.CTkLabel(self.main_frame, text="系統就緒 | 資料庫已連接", anchor="w", text_color="gray")
@@ -249,15 +288,15 @@ class FF14MarketApp(ctk.CTk):
 
 
 
-    def _process_crafting_logic(self, item_id, item_name):
+    def _process_crafting_logic(self, item_id, item_name, token=None):
         # 更新狀態為載入中
-        self.after(0, lambda: self.lbl_craft_status.configure(text=f"正在計算製作成本: {item_name}...", text_color="yellow"))
+        self.executor.call_soon(token, lambda: self.lbl_craft_status.configure(text=f"正在計算製作成本: {item_name}...", text_color="yellow"))
         
         # 呼叫 Service 進行計算 (在背景執行緒中)
         result = self.crafting_service.get_crafting_data(item_id, self.selected_dc)
         
-        # 回到 UI 執行緒處理結果
-        self.after(0, lambda: self._handle_crafting_result(result))
+        # 回到 UI 執行緒處理結果（已被新請求取代時丟棄）
+        self.executor.call_soon(token, lambda: self._handle_crafting_result(result))
 
     def _handle_crafting_result(self, result):
         logging.debug(f"CRAFTING_RESULT: {result}")
@@ -409,7 +448,7 @@ class FF14MarketApp(ctk.CTk):
         self.search_entry.bind("<Return>", lambda event: self.start_search())
 
         self.hq_only_var = ctk.BooleanVar(value=False)
-        self.hq_checkbox = ctk.CTkCheckBox(self.sidebar_frame, text="只顯示 HQ", variable=self.hq_only_var, command=self.refresh_ui_from_cache)
+        self.hq_checkbox = ctk.CTkCheckBox(self.sidebar_frame, text="只顯示 HQ", variable=self.hq_only_var, command=self.on_hq_toggle)
         self.hq_checkbox.grid(row=6, column=0, padx=20, pady=(0, 10))
         
         self.search_button = ctk.CTkButton(self.sidebar_frame, text="執行搜尋", command=self.start_search, fg_color="#106BA3", hover_color="#0D5582")
@@ -470,6 +509,10 @@ class FF14MarketApp(ctk.CTk):
             self.debug_window.title("Debug Log")
             self.debug_window.geometry("600x400")
             
+            ctk.CTkButton(self.debug_window, text="📊 排程統計", width=100,
+                          command=lambda: self.append_log("[排程統計]\n" + self.scheduler.format_stats())
+                          ).pack(anchor="e", padx=10, pady=(10, 0))
+
             self.debug_textbox = ctk.CTkTextbox(self.debug_window)
             self.debug_textbox.pack(fill="both", expand=True, padx=10, pady=10)
             
@@ -706,7 +749,7 @@ class FF14MarketApp(ctk.CTk):
     def open_settings_window(self):
         window = ctk.CTkToplevel(self)
         window.title("參數設定")
-        window.geometry("400x520")
+        window.geometry("400x560")
         window.attributes("-topmost", True)
         window.grab_set() 
 
@@ -732,6 +775,16 @@ class FF14MarketApp(ctk.CTk):
         entry_good = create_row("去化天數 - 優良 (< 天):", "dts_good_threshold")
         entry_bad = create_row("去化天數 - 滯銷 (> 天):", "dts_bad_threshold")
 
+        # [P5] 子行程分析
+        process_pool_var = ctk.BooleanVar(value=bool(self.config["analysis_process_pool"]))
+        ctk.CTkCheckBox(window, text="大量掃描時改用子行程分析 (減少 UI 卡頓)",
+                        variable=process_pool_var).pack(fill="x", padx=30, pady=5)
+
+        # [P5] 全市場索引
+        market_index_var = ctk.BooleanVar(value=bool(self.config["market_index_enabled"]))
+        ctk.CTkCheckBox(window, text="背景建立全市場價格索引 (目前選擇的伺服器)",
+                        variable=market_index_var).pack(fill="x", padx=30, pady=5)
+
         def save_and_close():
             try:
                 v_days = int(entry_velocity.get())
@@ -755,6 +808,8 @@ class FF14MarketApp(ctk.CTk):
                 self.db.save_setting("avg_price_days_limit", avg_days)
                 self.db.save_setting("market_tax_rate", tax)
                 self.db.save_setting("sniping_min_profit", sniping_min)
+                self.db.save_setting("analysis_process_pool", int(process_pool_var.get()))
+                self.db.save_setting("market_index_enabled", int(market_index_var.get()))
                 
                 self.config["velocity_days"] = v_days
                 self.config["avg_price_entries"] = avg_ent
@@ -763,12 +818,16 @@ class FF14MarketApp(ctk.CTk):
                 self.config["avg_price_days_limit"] = avg_days
                 self.config["market_tax_rate"] = tax
                 self.config["sniping_min_profit"] = sniping_min
+                self.config["analysis_process_pool"] = int(process_pool_var.get())
+                self.analysis_backend.set_mode(bool(self.config["analysis_process_pool"]))
+                self.config["market_index_enabled"] = int(market_index_var.get())
+                self.scheduler.set_enabled("market_index", bool(self.config["market_index_enabled"]), run_soon=True)
                 
                 messagebox.showinfo("成功", "設定已儲存並生效。", parent=window)
                 window.destroy()
                 
-                if self.current_data:
-                    self.refresh_ui_from_cache()
+                # [P5] 只重算受設定影響的指標，不重新抓取資料
+                self.apply_settings_to_results()
 
                 # [New] Update Dashboard Labels
                 self.update_overview_labels()
@@ -787,7 +846,7 @@ class FF14MarketApp(ctk.CTk):
     def setup_tab_overview(self):
         tab = self.tabview.tab("市場概況")
         tab.grid_columnconfigure(0, weight=1)
-        tab.grid_rowconfigure(1, weight=1)
+        tab.grid_rowconfigure(2, weight=1)
 
         # 分析區塊
         self.analysis_frame = ctk.CTkFrame(tab, height=160, fg_color="#1E1E1E", corner_radius=10, border_width=1, border_color="#3A3A3A")
@@ -803,13 +862,32 @@ class FF14MarketApp(ctk.CTk):
         _, self.stat_arbitrage = self.create_stat_card(1, 1, "跨服價差 (套利)", "--")
         _, self.stat_sniping = self.create_stat_card(1, 2, "狙擊缺口 (價差)", "--")
         _, self.stat_stack_opt = self.create_stat_card(1, 3, "拆售數據 (熱門堆疊)", "--")
+
+        # [P5] 掛單流動（每次刷新與上一份快照比對累積而來）
+        _, self.stat_undercut = self.create_stat_card(2, 0, "削價頻率", "--")
+        _, self.stat_lifetime = self.create_stat_card(2, 1, "掛單平均存活", "--")
+        _, self.stat_delist = self.create_stat_card(2, 2, "下架率 (非售出)", "--")
+        _, self.stat_churn_observed = self.create_stat_card(2, 3, "流動觀察", "--")
         
         # Initial Label Update
         self.update_overview_labels()
 
+        # [P5] 各伺服器比較（資料中心查詢時顯示）
+        self.worlds_container = ctk.CTkFrame(tab, corner_radius=0, fg_color="transparent")
+        self.worlds_container.grid(row=1, column=0, sticky="ew", padx=5, pady=(0, 5))
+        ctk.CTkLabel(self.worlds_container, text="各伺服器比較 (依最低價排序)", font=ctk.CTkFont(weight="bold")).pack(anchor="w", pady=(0, 5))
+
+        w_cols = ("伺服器", "最低價", "銷售速度", "有效庫存", "去化天數", "上架筆數")
+        self.worlds_tree = ttk.Treeview(self.worlds_container, columns=w_cols, show='headings', selectmode='browse', height=5)
+        for col in w_cols:
+            self.worlds_tree.heading(col, text=col)
+            self.worlds_tree.column(col, width=110, anchor="center")
+        self.worlds_tree.pack(fill="x")
+        self.worlds_container.grid_remove()
+
         # 販售列表
         self.listings_container = ctk.CTkFrame(tab, corner_radius=0, fg_color="transparent")
-        self.listings_container.grid(row=1, column=0, sticky="nsew", padx=5, pady=5)
+        self.listings_container.grid(row=2, column=0, sticky="nsew", padx=5, pady=5)
         
         ctk.CTkLabel(self.listings_container, text="販售列表 (Listings)", font=ctk.CTkFont(weight="bold")).pack(anchor="w", pady=(0, 5))
         
@@ -1080,18 +1158,11 @@ class FF14MarketApp(ctk.CTk):
                 self.current_item_id = iid
                 self.current_item_name = iname
                 self.update_title(iname, iid)
-                self.current_item_id = iid
-                self.current_item_name = iname
-                self.update_title(iname, iid)
-                
-                if self.is_loading: return
-                self.is_loading = True
-                threading.Thread(target=self.fetch_market_data, args=(iid,), daemon=True).start()
                 
                 # Sync to Crafting
                 if hasattr(self, 'lbl_craft_status'):
                      self.lbl_craft_status.configure(text=f"正同步搜尋配方: {iname}...", text_color="cyan")
-                threading.Thread(target=self._process_crafting_logic, args=(iid, iname), daemon=True).start()
+                self._submit_item_load(iid, iname)
 
                 window.destroy()  # Optional: Close window on select
 
@@ -1203,6 +1274,7 @@ class FF14MarketApp(ctk.CTk):
         
         logging.info(f"使用者切換資料區域: {self.selected_dc}")
         self.status_bar.configure(text=f"資料區域已切換: {self.selected_dc} (請按「執行搜尋」更新)")
+        self._show_cached_hot_results()
 
     def show_candidate_selection(self, candidates):
         if not candidates:
@@ -1223,21 +1295,17 @@ class FF14MarketApp(ctk.CTk):
         scroll.pack(pady=10, padx=10, fill="both", expand=True)
 
         def on_select(item_id, item_name):
-            if self.is_loading: return
             window.destroy()
             self.current_item_id = item_id
             self.current_item_name = item_name
             self.after(0, lambda: self.update_title(item_name, item_id))
             
-            self.is_loading = True
-            threading.Thread(target=self.fetch_market_data, args=(item_id,), daemon=True).start()
-            
             # Sync to Crafting
             if hasattr(self, 'lbl_craft_status'):
                 self.lbl_craft_status.configure(text=f"正同步搜尋配方: {item_name}...", text_color="cyan")
             
-            # Trigger crafting calc in background
-            threading.Thread(target=self._process_crafting_logic, args=(item_id, item_name), daemon=True).start()
+            # 市場資料 + 配方計算（取代尚未完成的舊請求）
+            self._submit_item_load(item_id, item_name)
 
         for item_id, item_name in candidates:
             btn_text = f"{item_name}\n(ID: {item_id})"
@@ -1265,10 +1333,10 @@ class FF14MarketApp(ctk.CTk):
         # 清空舊的顯示
         self.scan_tree.delete(*self.scan_tree.get_children())
         
-        # 啟動背景工作
-        threading.Thread(target=self._run_search_task, args=(query,), daemon=True).start()
+        # 啟動背景工作（新的搜尋會取代尚未完成的舊搜尋）
+        self.executor.submit("search", self._run_search_task, query)
 
-    def _run_search_task(self, query):
+    def _run_search_task(self, query, token=None):
         """
         [背景執行緒] 搜尋 Item（兩階段：先顯示結果，再非同步填充製作狀態）
         """
@@ -1285,6 +1353,13 @@ class FF14MarketApp(ctk.CTk):
             else:
                  # 關鍵字搜尋 (先本地後 API)
                  local_res = self.db.search_local_items(query.split(), limit=50)
+                 if not local_res:
+                     # 本地找不到時才以簡轉繁的字串再試一次（物品名稱資料庫為繁體）；
+                     # 原字串優先，避免把合法的繁體名稱（如「御」「制」）轉錯
+                     converted = convert_simplified_to_traditional(query)
+                     if converted != query:
+                         logging.info(f"簡體轉繁體: '{query}' -> '{converted}'")
+                         local_res = self.db.search_local_items(converted.split(), limit=50)
                  if local_res:
                      results = [{'id': r[0], 'name': r[1]} for r in local_res]
                  else:
@@ -1292,7 +1367,7 @@ class FF14MarketApp(ctk.CTk):
                      results = [{'id': c[0], 'name': c[1]} for c in api_res]
 
             if not results:
-                self.after(0, lambda: self._search_finished([], "找不到相關物品。"))
+                self.executor.call_soon(token, lambda: self._search_finished([], "找不到相關物品。"))
                 return
 
             logging.info(f"搜尋找到 {len(results)} 筆結果")
@@ -1314,11 +1389,13 @@ class FF14MarketApp(ctk.CTk):
                 })
             
             # 先顯示搜尋結果
-            self.after(0, lambda d=display_data: self._update_search_ui(d))
+            self.executor.call_soon(token, lambda d=display_data: self._update_search_ui(d))
             
             # === 第二階段：背景非同步填充製作狀態 ===
             server = self.selected_dc
             for i, item in enumerate(display_data):
+                if token and token.cancelled:
+                    break
                 try:
                     crafting_info = self.crafting_service.get_crafting_data(item['id'], server)
                     craft_status = "❌ 無法製作"
@@ -1326,13 +1403,13 @@ class FF14MarketApp(ctk.CTk):
                         craft_status = "🔨 可製作"
                     
                     # 在主執行緒更新對應的 TreeView 行
-                    self.after(0, lambda idx=i, s=craft_status: self._update_craft_status_cell(idx, s))
+                    self.executor.call_soon(token, lambda idx=i, s=craft_status: self._update_craft_status_cell(idx, s))
                 except Exception:
                     pass  # 跳過失敗的項目
 
         except Exception as e:
             logging.error(f"搜尋執行緒錯誤: {e}")
-            self.after(0, lambda: self._search_finished([], f"錯誤: {e}"))
+            self.executor.call_soon(token, lambda: self._search_finished([], f"錯誤: {e}"))
 
     def _update_craft_status_cell(self, row_index, craft_status):
         """[主執行緒] 更新 TreeView 中指定行的製作狀態欄位"""
@@ -1406,12 +1483,9 @@ class FF14MarketApp(ctk.CTk):
             return
 
         if use_current_id and self.current_item_id:
-            if self.is_loading: return
             logging.info(f"Refreshing data for item ID: {self.current_item_id}")
             self.status_bar.configure(text=f"正在刷新 {self.current_item_name} 的數據...", text_color="yellow")
-            self.is_loading = True
-            threading.Thread(target=self.fetch_market_data, args=(self.current_item_id,), daemon=True).start()
-            threading.Thread(target=self._process_crafting_logic, args=(self.current_item_id, self.current_item_name), daemon=True).start()
+            self._submit_item_load(self.current_item_id, self.current_item_name)
             return
 
         raw_input = self.search_entry.get().strip()
@@ -1435,12 +1509,23 @@ class FF14MarketApp(ctk.CTk):
         self.item_id_label.configure(text=f"ID: {iid}")
         self.update_favorite_button_state()
 
-    def fetch_market_data(self, item_id):
-        self.after(0, lambda: self.prepare_loading_ui(clear_data=True))
+    def _submit_item_load(self, item_id, item_name):
+        """[主執行緒] 送出市場資料與配方計算；同一 view 尚未完成的舊請求會被取消"""
+        self.is_loading = True
+        self.executor.submit("market", self.fetch_market_data, item_id)
+        self.executor.submit("crafting", self._process_crafting_logic, item_id, item_name)
+
+    def fetch_market_data(self, item_id, token=None):
+        self.executor.call_soon(token, lambda: self.prepare_loading_ui(clear_data=True))
         
         try:
             data, status = self.api.fetch_market_data(self.selected_dc, item_id)
             
+            # 等待 API 期間使用者已選擇其他物品：丟棄結果，不覆蓋目前狀態
+            if token and token.cancelled:
+                logging.debug(f"丟棄過期的市場資料: {item_id}")
+                return
+            
             self.is_loading = False 
             if status == 404:
                 self.update_ui_error(f"在所選區域找不到數據 (404)。\n請確認伺服器名稱與物品是否存在。")
@@ -1452,33 +1537,92 @@ class FF14MarketApp(ctk.CTk):
             logging.info(f"成功獲取數據，開始分析...")
             
             self.current_data = data
-            hq_only = self.hq_only_var.get()
-            analysis = DataAnalyzer.calculate_metrics(data, self.config, hq_only)
+            view = self._metrics_view()
+            analysis = self._analyze_view(data, view)
             self.current_analysis = analysis
             
-            self.after(0, lambda: self.finish_loading_and_update(data, analysis))
+            self.executor.call_soon(token, lambda: self.finish_loading_and_update(data, analysis, token))
+
+            # [P5] 另一個檢視也先算好，切換「只顯示 HQ」時直接換上
+            self._analyze_view(data, "all" if view == "hq" else "hq")
         
         except Exception as e:
+            if token and token.cancelled:
+                return
             self.is_loading = False
             logging.exception("獲取數據時發生例外狀況")
             self.update_ui_error(f"數據讀取失敗: {str(e)}")
 
+    def _metrics_view(self):
+        return "hq" if self.hq_only_var.get() else "all"
+
+    def _analyze_view(self, data, view):
+        """[背景執行緒] 取得（記憶在 payload 上的）檢視分析結果，並附上走勢圖資料"""
+        analysis = DataAnalyzer.metrics_for_view(data, self.config, view)
+        if "chart" not in analysis:
+            # 走勢圖資料在背景整理好，主執行緒只負責畫圖
+            analysis["chart"] = self.analysis_backend.prepare_chart(analysis["merged_history"])
+        return analysis
+
+    def on_hq_toggle(self):
+        """[P5] 切換 HQ 檢視：已預先算好的結果直接換上，否則才重新計算"""
+        data = self.current_data
+        if not data or self.is_loading:
+            return
+        analysis = DataAnalyzer.cached_metrics(data, self.config, self._metrics_view())
+        if analysis is None or "chart" not in analysis:
+            self.refresh_ui_from_cache()
+            return
+        self.current_analysis = analysis
+        self.update_market_ui(data, analysis)
+        self._adapt_auto_refresh_interval(analysis)
+
     def refresh_ui_from_cache(self):
         if not self.current_data:
             return
         
         self.prepare_loading_ui(clear_data=False)
         self.status_bar.configure(text="正在重新計算分析數據...", text_color="yellow")
-        threading.Thread(target=self._recalculate_process, daemon=True).start()
+        self.executor.submit("analysis", self._recalculate_process)
 
-    def _recalculate_process(self):
+    def apply_settings_to_results(self):
+        """
+        [P5] 設定變更後依指標依賴表只重算受影響的部分：
+        目前物品的分析結果、市場探索中依賴稅率的衍生欄位，以及最愛掃描的狙擊利潤。
+        熱賣 / 批次掃描的其他欄位（熱度、均價、庫存、最低價）不依賴這些設定，維持不變。
+        """
+        tax_rate = self.config.get("market_tax_rate", 5) / 100.0
+        if getattr(self, "last_scan_results", None):
+            self._reprice_scan_results(tax_rate)
+        explorer_changed = False
+        for engine in self._query_engines.values():
+            explorer_changed = engine.set_tax_rate(tax_rate) or explorer_changed
+        if explorer_changed and self.last_explorer_results:
+            self.run_explorer_query()
+
+        data, analysis = self.current_data, self.current_analysis
+        if not data or not analysis or self.is_loading:
+            return
+        new_analysis, stages = DataAnalyzer.recompute_metrics(analysis, self.config)
+        if stages:
+            logging.info(f"設定變更，重新計算指標: {', '.join(stages)}")
+            self.current_analysis = new_analysis
+            data.setdefault(METRICS_MEMO_KEY, {})[self._metrics_view()] = new_analysis
+        # 去化天數的顏色門檻等顯示設定也需要重新繪製
+        self.update_market_ui(data, new_analysis)
+        self._adapt_auto_refresh_interval(new_analysis)
+
+    def _recalculate_process(self, token=None):
         time.sleep(0.3) 
-        hq_only = self.hq_only_var.get()
-        if self.current_data:
-            new_analysis = DataAnalyzer.calculate_metrics(self.current_data, self.config, hq_only)
+        data = self.current_data
+        if data:
+            new_analysis = self._analyze_view(data, self._metrics_view())
+            # 計算期間已載入其他物品時，不以舊資料覆蓋
+            if token and token.cancelled or data is not self.current_data:
+                return
             self.current_analysis = new_analysis
             self.is_loading = False
-            self.after(0, lambda: self.finish_loading_and_update(self.current_data, new_analysis))
+            self.executor.call_soon(token, lambda: self.finish_loading_and_update(data, new_analysis, token))
         else:
              self.is_loading = False
 
@@ -1528,15 +1672,73 @@ class FF14MarketApp(ctk.CTk):
         
         self.after(50, self.animate_progress)
 
-    def finish_loading_and_update(self, data, analysis):
+    def finish_loading_and_update(self, data, analysis, token=None):
         self.progress_bar.set(1.0)
         self.progress_label.configure(text="100%")
-        self.after(200, lambda: self._render_data(data, analysis))
+        self.after(200, lambda: self._render_data(data, analysis, token))
 
-    def _render_data(self, data, analysis):
+    def _render_data(self, data, analysis, token=None):
+        # 200ms 動畫期間可能已有新請求
+        if not self.executor.is_current(token):
+            return
         self.progress_frame.pack_forget()
         self.search_button.configure(state="normal")
         self.update_market_ui(data, analysis)
+        self._adapt_auto_refresh_interval(analysis)
+
+    def update_churn_labels(self):
+        """[P5] 顯示目前物品在目前伺服器的掛單流動統計"""
+        churn = self.listing_tracker.stats(self.selected_dc, self.current_item_id) if self.current_item_id else None
+        if not churn or churn["snapshots"] < 2:
+            text = "累積中 (需多次刷新)"
+            for label in (self.stat_undercut, self.stat_lifetime, self.stat_delist):
+                label.configure(text="--", text_color="gray")
+            self.stat_churn_observed.configure(text=text, text_color="gray", font=ctk.CTkFont(size=14))
+            return
+
+        per_day = churn["undercuts_per_day"]
+        if per_day is None:
+            self.stat_undercut.configure(text="--", text_color="gray")
+        else:
+            color = "#FF6666" if per_day > 10 else ("#FFD700" if per_day > 2 else "#66FF66")
+            self.stat_undercut.configure(text=f"{per_day:.1f} 次/日", text_color=color)
+
+        lifetime = churn["avg_lifetime_hours"]
+        self.stat_lifetime.configure(text=f"{lifetime:.1f} 小時" if lifetime is not None else "--",
+                                     text_color="white" if lifetime is not None else "gray")
+
+        rate = churn["delist_rate"]
+        self.stat_delist.configure(text=f"{rate * 100:.0f}%" if rate is not None else "--",
+                                   text_color="white" if rate is not None else "gray")
+
+        self.stat_churn_observed.configure(
+            text=f"{churn['snapshots']} 份快照\n{churn['observed_hours']:.1f} 小時",
+            text_color="white", font=ctk.CTkFont(size=14))
+
+    def update_world_breakdown(self, rows):
+        """[P5] 更新各伺服器比較表；單一伺服器查詢時隱藏"""
+        self.worlds_tree.delete(*self.worlds_tree.get_children())
+        if not rows:
+            self.worlds_container.grid_remove()
+            return
+
+        good_th = self.config["dts_good_threshold"]
+        bad_th = self.config["dts_bad_threshold"]
+        for w in rows:
+            dts = w["days_to_sell"]
+            tag = "good" if dts < good_th else ("bad" if dts > bad_th else "")
+            self.worlds_tree.insert("", "end", tags=(tag,), values=(
+                w["world"],
+                f"{int(w['min_price']):,}" if w["min_price"] > 0 else "-",
+                f"{w['velocity']:.1f}",
+                f"{w['stock']:,}",
+                f"{dts:.1f}" if dts < 999 else "∞",
+                w["listings"],
+            ))
+        self.worlds_tree.tag_configure("good", foreground="#66FF66")
+        self.worlds_tree.tag_configure("bad", foreground="#FF6666")
+        self.worlds_tree.configure(height=min(len(rows), 8))
+        self.worlds_container.grid()
 
     def update_ui_error(self, message):
         def _update():
@@ -1555,6 +1757,9 @@ class FF14MarketApp(ctk.CTk):
         self.stat_arbitrage.configure(text="--", text_color="white")
         self.stat_sniping.configure(text="--", text_color="white")
         self.stat_stack_opt.configure(text="--", text_color="white")
+        for label in (self.stat_undercut, self.stat_lifetime, self.stat_delist, self.stat_churn_observed):
+            label.configure(text="--", text_color="white")
+        self.update_world_breakdown([])
 
     def update_market_ui(self, data, analysis):
         # 先清除表格舊資料
@@ -1623,7 +1828,8 @@ class FF14MarketApp(ctk.CTk):
             snipe_color = "#66FF66" if snipe_val > 0 else "gray"
             
             if snipe_val > 0:
-                snipe_text = f"+{int(snipe_val):,}\n(成本: {int(snipe_cost):,})"
+                snipe_count = analysis.get("sniping_count", 0)
+                snipe_text = f"+{int(snipe_val):,}\n(成本: {int(snipe_cost):,}, 買 {snipe_count} 筆)"
             else:
                 snipe_text = "--"
                 
@@ -1643,6 +1849,9 @@ class FF14MarketApp(ctk.CTk):
                 stack_color = "gray"
 
             self.stat_stack_opt.configure(text=stack_str, text_color=stack_color, font=ctk.CTkFont(size=14)) # Smaller font for multi-line
+            self.update_churn_labels()
+
+        self.update_world_breakdown(analysis.get("world_breakdown", []) if analysis else [])
 
         listings = analysis.get("merged_listings", []) if analysis else []
         avg_price = analysis['avg_sale_price'] if analysis else 0
@@ -1726,26 +1935,17 @@ class FF14MarketApp(ctk.CTk):
                 self.chart_canvas.draw_idle()
                 return
             
-            # 按時間排序 (過濾異常價格)
-            valid = [h for h in history if h.get('pricePerUnit', 0) > 0]
-            if not valid:
+            # 異常值過濾 / 排序 / 移動平均已在背景整理 (analysis_worker.prepare_price_chart)
+            chart = self.current_analysis.get("chart") if self.current_analysis else None
+            if chart is None:
+                chart = prepare_price_chart([(h.get('timestamp', 0), h.get('pricePerUnit', 0), h.get('hq', False)) for h in history])
+            if not chart:
                 self.chart_canvas.draw_idle()
                 return
             
-            # 異常值過濾 (median ± 5x)
-            prices_sorted = sorted([h['pricePerUnit'] for h in valid])
-            median_p = prices_sorted[len(prices_sorted)//2]
-            valid = [h for h in valid if 0.1 * median_p <= h['pricePerUnit'] <= 5 * median_p]
-            
-            if not valid:
-                self.chart_canvas.draw_idle()
-                return
-            
-            valid.sort(key=lambda x: x['timestamp'])
-            
-            dates = [datetime.fromtimestamp(h['timestamp']) for h in valid]
-            prices = [h['pricePerUnit'] for h in valid]
-            hq_flags = [h.get('hq', False) for h in valid]
+            dates = [datetime.fromtimestamp(ts) for ts in chart["timestamps"]]
+            prices = chart["prices"]
+            hq_flags = chart["hq_flags"]
             
             # HQ 和 NQ 分色
             hq_dates = [d for d, hq in zip(dates, hq_flags) if hq]
@@ -1760,14 +1960,9 @@ class FF14MarketApp(ctk.CTk):
                 self.ax.scatter(hq_dates, hq_prices, s=12, color='#F72585', alpha=0.7, label='HQ ★', zorder=3)
             
             # 移動平均線
-            if len(prices) >= 5:
-                window = min(20, len(prices) // 3)
-                if window >= 2:
-                    ma_prices = []
-                    for i in range(len(prices)):
-                        start = max(0, i - window + 1)
-                        ma_prices.append(sum(prices[start:i+1]) / (i - start + 1))
-                    self.ax.plot(dates, ma_prices, color='#4361EE', linewidth=1.5, alpha=0.9, label=f'MA{window}', zorder=4)
+            if chart["ma_window"]:
+                self.ax.plot(dates, chart["ma_prices"], color='#4361EE', linewidth=1.5, alpha=0.9,
+                             label=f'MA{chart["ma_window"]}', zorder=4)
             
             # 樣式
             self.ax.set_facecolor('#16213E')
@@ -1809,16 +2004,22 @@ class FF14MarketApp(ctk.CTk):
         # 時間範圍下拉選單
         self.hot_time_var = ctk.StringVar(value="過去 24 小時")
         time_options = ["過去 24 小時", "過去 48 小時", "過去 72 小時", "過去 7 天"]
-        self.hot_time_menu = ctk.CTkComboBox(ctrl_frame, width=160, variable=self.hot_time_var, values=time_options, state="readonly")
+        self.hot_time_menu = ctk.CTkComboBox(ctrl_frame, width=160, variable=self.hot_time_var, values=time_options, state="readonly",
+                                             command=lambda _: self._show_cached_hot_results())
         self.hot_time_menu.pack(side="left", padx=5)
 
         # 取樣範圍下拉選單
         ctk.CTkLabel(ctrl_frame, text="取樣範圍:", font=ctk.CTkFont(weight="bold")).pack(side="left", padx=(15, 5))
         self.hot_sample_var = ctk.StringVar(value="200 個 (4批)")
         sample_options = ["100 個 (2批)", "200 個 (4批)", "300 個 (6批)", "400 個 (8批)"]
-        self.hot_sample_menu = ctk.CTkComboBox(ctrl_frame, width=150, variable=self.hot_sample_var, values=sample_options, state="readonly")
+        self.hot_sample_menu = ctk.CTkComboBox(ctrl_frame, width=150, variable=self.hot_sample_var, values=sample_options, state="readonly",
+                                               command=lambda _: self._show_cached_hot_results())
         self.hot_sample_menu.pack(side="left", padx=5)
 
+        # [P5] 多伺服器比較
+        self.hot_fanout_var = ctk.BooleanVar(value=False)
+        ctk.CTkCheckBox(ctrl_frame, text="🌐 全伺服器", variable=self.hot_fanout_var, width=90).pack(side="left", padx=(15, 0))
+
         # 掃描按鈕
         self.btn_hot_scan = ctk.CTkButton(
             ctrl_frame, text="🔍 開始掃描", 
@@ -1849,12 +2050,13 @@ class FF14MarketApp(ctk.CTk):
         res_frame.grid_columnconfigure(0, weight=1)
         res_frame.grid_rowconfigure(0, weight=1)
 
-        cols = ("排名", "品名", "銷售速度", "時段銷售", "均價", "最低價", "庫存")
+        cols = ("排名", "品名", "銷售速度", "時段銷售", "趨勢", "均價", "最低價", "庫存")
         self.hot_tree = ttk.Treeview(res_frame, columns=cols, show="headings")
         self.hot_tree.heading("排名", text="#")
         self.hot_tree.heading("品名", text="品名")
         self.hot_tree.heading("銷售速度", text="銷售速度")
         self.hot_tree.heading("時段銷售", text="時段銷售")
+        self.hot_tree.heading("趨勢", text="趨勢 (24h)")
         self.hot_tree.heading("均價", text="均價")
         self.hot_tree.heading("最低價", text="最低價")
         self.hot_tree.heading("庫存", text="庫存")
@@ -1863,6 +2065,7 @@ class FF14MarketApp(ctk.CTk):
         self.hot_tree.column("品名", width=280)
         self.hot_tree.column("銷售速度", width=120, anchor="center")
         self.hot_tree.column("時段銷售", width=100, anchor="center")
+        self.hot_tree.column("趨勢", width=90, anchor="center")
         self.hot_tree.column("均價", width=100, anchor="e")
         self.hot_tree.column("最低價", width=100, anchor="e")
         self.hot_tree.column("庫存", width=70, anchor="center")
@@ -1903,10 +2106,30 @@ class FF14MarketApp(ctk.CTk):
         }
         return mapping.get(sample_str, 200)
 
+    def _hot_params(self):
+        """目前熱賣分頁選擇的參數"""
+        return {"server": self.dc_option_menu.get(), "hours": self._get_hot_hours(),
+                "sample_size": self._get_hot_sample_size()}
+
+    def _hot_cache_key(self, params):
+        """一次掃描涵蓋所有時段，快取鍵的時段固定為完整觀察期間"""
+        return HotScanCache.make_key(params["server"], HOT_SPAN_HOURS, params["sample_size"])
+
+    def _show_cached_hot_results(self):
+        """[主執行緒] 切換伺服器 / 時段 / 取樣數時，若有該組合的快取立即顯示"""
+        if self.btn_hot_scan.cget("state") == "disabled" or self.hot_fanout_var.get():
+            return
+        params = self._hot_params()
+        entry = self.hot_cache.get(self._hot_cache_key(params))
+        if entry:
+            self.finish_hot_scan(entry[0], None, from_cache=True, params=params, fetched_at=entry[1])
+        else:
+            self.hot_tree.delete(*self.hot_tree.get_children())
+            self.lbl_hot_status.configure(text="尚未掃描", text_color="gray")
+
     def clear_hot_cache(self):
         """清除熱賣掃描快取"""
-        self.hot_items_cache = []
-        self.hot_items_cache_time = 0
+        self.hot_cache.clear()
         self.hot_tree.delete(*self.hot_tree.get_children())
         self.lbl_hot_status.configure(text="快取已清除", text_color="#FFD700")
         self.after(2000, lambda: self.lbl_hot_status.configure(text="尚未掃描", text_color="gray"))
@@ -1918,29 +2141,52 @@ class FF14MarketApp(ctk.CTk):
             messagebox.showwarning("提示", "請先選擇伺服器")
             return
 
-        hours = self._get_hot_hours()
-        sample_size = self._get_hot_sample_size()
-        current_params = {"hours": hours, "sample_size": sample_size}
-
-        # 檢查快取（參數一致且未過期才使用）
-        now = time.time()
-        if (self.hot_items_cache 
-            and (now - self.hot_items_cache_time) < self.hot_items_cache_ttl
-            and self.hot_items_cache_params == current_params):
-            remaining = int(self.hot_items_cache_ttl - (now - self.hot_items_cache_time))
-            self.append_log(f"[市場熱賣] 使用快取資料 (剩餘 {remaining} 秒有效)")
-            self.finish_hot_scan(self.hot_items_cache, None, from_cache=True)
+        current_params = self._hot_params()
+        hours = current_params["hours"]
+        sample_size = current_params["sample_size"]
+
+        # [P5] 全伺服器比較
+        if self.hot_fanout_var.get():
+            if len(self.custom_servers) < 2:
+                messagebox.showwarning("提示", "全伺服器比較需要至少兩個自訂伺服器")
+                return
+            self.btn_hot_scan.configure(state="disabled", text="掃描中...")
+            self.hot_progress.pack(side="bottom", fill="x", pady=5)
+            self.hot_progress.set(0)
+            self.lbl_hot_status.configure(text=f"正在掃描 {len(self.custom_servers)} 個伺服器...", text_color="yellow")
+            self.frame_monitors["hot"].start()
+            self.executor.submit("hot_scan", self.run_fan_out_scan, "hot", list(self.custom_servers), hours,
+                                 sample_size=sample_size, lane=BACKGROUND)
             return
 
+        # 檢查快取：新鮮則直接使用；已過期仍先顯示舊結果，再於背景重新掃描
+        entry = self.hot_cache.get(self._hot_cache_key(current_params))
+        if entry:
+            self.finish_hot_scan(entry[0], None, from_cache=True, params=current_params, fetched_at=entry[1])
+            if self.hot_cache.is_fresh(entry):
+                remaining = int(self.hot_cache.ttl - (time.time() - entry[1]))
+                self.append_log(f"[市場熱賣] 使用快取資料 (剩餘 {remaining} 秒有效)")
+                return
+
         # 禁用按鈕
         self.btn_hot_scan.configure(state="disabled", text="掃描中...")
         self.hot_progress.pack(side="bottom", fill="x", pady=5)
         self.hot_progress.set(0)
         self.lbl_hot_status.configure(text="正在掃描...", text_color="yellow")
+        self.frame_monitors["hot"].start()
 
-        threading.Thread(target=self.run_hot_scan, args=(server, hours), daemon=True).start()
+        self.executor.submit("hot_scan", self.run_hot_scan, server, hours, lane=BACKGROUND)
 
-    def run_hot_scan(self, server, hours):
+    def _resolve_hot_names(self, results):
+        """替換 Item ID 為中文名稱"""
+        for r in results:
+            name = self.db.get_item_name_by_id(r["id"])
+            if name:
+                r["name"] = self.translate_term(name)
+            else:
+                r["name"] = f"[ID: {r['id']}]"
+
+    def run_hot_scan(self, server, hours, token=None):
         """[背景執行緒] 執行市場熱賣掃描"""
         def progress_cb(val):
             self.after(0, lambda v=val: self.hot_progress.set(v))
@@ -1950,22 +2196,20 @@ class FF14MarketApp(ctk.CTk):
             server=server,
             sample_size=sample_size,
             analysis_hours=hours,
-            progress_callback=progress_cb
+            progress_callback=progress_cb,
+            token=token
         )
 
         if not error:
-            # 替換 Item ID 為中文名稱
-            for r in results:
-                name = self.db.get_item_name_by_id(r["id"])
-                if name:
-                    r["name"] = self.translate_term(name)
-                else:
-                    r["name"] = f"[ID: {r['id']}]"
+            self._resolve_hot_names(results)
 
-        self.after(0, lambda: self.finish_hot_scan(results, error))
+        params = {"server": server, "hours": hours, "sample_size": sample_size}
+        self.executor.call_soon(token, lambda: self.finish_hot_scan(results, error, params=params))
 
-    def finish_hot_scan(self, results, error, from_cache=False):
+    def finish_hot_scan(self, results, error, from_cache=False, params=None, fetched_at=None):
         """[主執行緒] 更新市場熱賣結果 UI"""
+        if not from_cache:
+            self._log_frame_latency("hot", "市場熱賣")
         # 恢復按鈕狀態
         self.btn_hot_scan.configure(state="normal", text="🔍 開始掃描")
         self.hot_progress.pack_forget()
@@ -1975,21 +2219,18 @@ class FF14MarketApp(ctk.CTk):
             self.lbl_hot_status.configure(text=f"掃描失敗", text_color="red")
             return
 
+        params = params or self._hot_params()
         # 更新快取
         if not from_cache:
-            self.hot_items_cache = results
-            self.hot_items_cache_time = time.time()
-            self.hot_items_cache_params = {
-                "hours": self._get_hot_hours(),
-                "sample_size": self._get_hot_sample_size()
-            }
+            self.hot_cache.put(self._hot_cache_key(params), results)
 
         # 清空表格
         self.hot_tree.delete(*self.hot_tree.get_children())
 
-        # 取 Top 20
-        top_results = results[:20]
-        hours = self._get_hot_hours()
+        # 依目前時段重新排序（所有時段已在同一次掃描算好），取 Top 20
+        hours = params["hours"]
+        ranked = DataAnalyzer.rank_hot_window(results, hours)
+        top_results = ranked[:20]
 
         # 更新表頭
         if hours >= 24:
@@ -2001,11 +2242,18 @@ class FF14MarketApp(ctk.CTk):
 
         for i, r in enumerate(top_results):
             heat_str = f"{r['heat']:.1f}" if hours >= 24 else f"{int(r['heat'])}"
+            trend = r.get("trend")
+            if trend is None:
+                trend_str = "新" if r.get("windows") else "-"
+            else:
+                arrow = "↑" if r.get("accel", 0) > 0 else ("↓" if r.get("accel", 0) < 0 else "")
+                trend_str = f"{trend:.1f}x{arrow}"
             self.hot_tree.insert("", "end", values=(
                 f"#{i+1}",
                 r["name"],
                 heat_str,
                 f"{r['sold']}",
+                trend_str,
                 f"{int(r['avg']):,}",
                 f"{int(r['min']):,}",
                 f"{r['stock']:,}"
@@ -2015,13 +2263,16 @@ class FF14MarketApp(ctk.CTk):
         self.last_hot_results = top_results
 
         # 更新狀態
-        cache_time_str = datetime.now().strftime('%H:%M:%S')
+        cache_time_str = datetime.fromtimestamp(fetched_at or time.time()).strftime('%H:%M:%S')
         if from_cache:
-            self.lbl_hot_status.configure(text=f"快取資料 | {cache_time_str}", text_color="#4da6ff")
+            if self.hot_cache.is_fresh((results, fetched_at or 0)):
+                self.lbl_hot_status.configure(text=f"快取資料 | {cache_time_str}", text_color="#4da6ff")
+            else:
+                self.lbl_hot_status.configure(text=f"舊資料 | {cache_time_str}", text_color="#FFA500")
         else:
             self.lbl_hot_status.configure(text=f"掃描完成 | {cache_time_str} | 共分析 {len(results)} 個物品", text_color="#2CC985")
 
-        self.append_log(f"[市場熱賣] 顯示 Top {len(top_results)} 熱賣物品 (共 {len(results)} 個有效物品)")
+        self.append_log(f"[市場熱賣] 顯示 Top {len(top_results)} 熱賣物品 ({hours}h 共 {len(ranked)} 個有效物品)")
 
     def on_hot_result_click(self, event):
         """雙擊熱賣結果 → 跳轉至市場概況並查詢"""
@@ -2034,34 +2285,319 @@ class FF14MarketApp(ctk.CTk):
             data = self.last_hot_results[idx]
             item_id = data['id']
             item_name = data['name']
+            self._open_item_from_result(item_id, item_name)
 
-            # 更新當前上下文
-            self.current_item_id = item_id
-            self.current_item_name = item_name
+    def _open_item_from_result(self, item_id, item_name):
+        """結果列表雙擊：跳轉至市場概況並查詢"""
+        # 更新當前上下文
+        self.current_item_id = item_id
+        self.current_item_name = item_name
 
-            display_name = self.translate_term(item_name)
-            self.update_title(display_name, item_id)
+        display_name = self.translate_term(item_name)
+        self.update_title(display_name, item_id)
 
-            # 跳轉至市場概況分頁
-            self.tabview.set("市場概況")
+        # 跳轉至市場概況分頁
+        self.tabview.set("市場概況")
 
-            # 更新搜尋欄
-            self.search_entry.delete(0, "end")
-            self.search_entry.insert(0, str(item_id))
+        # 更新搜尋欄
+        self.search_entry.delete(0, "end")
+        self.search_entry.insert(0, str(item_id))
 
-            # 開始載入資料
-            if self.is_loading:
-                return
-            self.is_loading = True
+        # 開始載入資料（取代尚未完成的舊請求）
+        self.status_bar.configure(text=f"正在載入 {display_name} ...", text_color="yellow")
 
-            self.status_bar.configure(text=f"正在載入 {display_name} ...", text_color="yellow")
+        if hasattr(self, 'lbl_craft_status'):
+            self.lbl_craft_status.configure(text=f"正同步搜尋配方: {display_name}...", text_color="cyan")
 
-            threading.Thread(target=self.fetch_market_data, args=(item_id,), daemon=True).start()
+        self._submit_item_load(item_id, item_name)
 
-            if hasattr(self, 'lbl_craft_status'):
-                self.lbl_craft_status.configure(text=f"正同步搜尋配方: {display_name}...", text_color="cyan")
+# --- 🧭 市場探索 (Tab) ---
+    def setup_tab_explorer(self):
+        tab = self.tabview.tab("🧭 市場探索")
+        tab.grid_columnconfigure(0, weight=1)
+        tab.grid_rowconfigure(1, weight=1)
+        self._query_engines = {}
+        self.last_explorer_results = []
+
+        # 1. 查詢列
+        ctrl_frame = ctk.CTkFrame(tab, fg_color="transparent")
+        ctrl_frame.grid(row=0, column=0, sticky="ew", padx=10, pady=10)
+
+        ctk.CTkLabel(ctrl_frame, text="條件:", font=ctk.CTkFont(weight="bold")).pack(side="left", padx=(10, 5))
+        self.explorer_where = ctk.CTkEntry(ctrl_frame, width=300,
+                                           placeholder_text="velocity > 10 and roi > 20 and days_to_sell < 3")
+        self.explorer_where.pack(side="left", padx=5)
+        self.explorer_where.bind("<Return>", lambda e: self.run_explorer_query())
+
+        ctk.CTkLabel(ctrl_frame, text="排序:", font=ctk.CTkFont(weight="bold")).pack(side="left", padx=(10, 5))
+        self.explorer_order_var = ctk.StringVar(value="velocity desc")
+        order_options = [f"{f} desc" for f in QUERY_FIELDS] + [f"{f} asc" for f in QUERY_FIELDS]
+        ctk.CTkComboBox(ctrl_frame, width=150, variable=self.explorer_order_var, values=order_options,
+                        command=lambda _: self.run_explorer_query()).pack(side="left", padx=5)
+
+        self.explorer_hq_var = ctk.BooleanVar(value=False)
+        ctk.CTkCheckBox(ctrl_frame, text="HQ", variable=self.explorer_hq_var, width=60,
+                        command=self.run_explorer_query).pack(side="left", padx=(10, 0))
+        # 查詢範圍：全部物品 / 全部最愛 / 單一最愛分類
+        self.explorer_scope_var = ctk.StringVar(value=EXPLORER_ALL_ITEMS)
+        self.explorer_scope_menu = ctk.CTkComboBox(ctrl_frame, width=140, variable=self.explorer_scope_var,
+                                                   command=lambda _: self.run_explorer_query())
+        self.explorer_scope_menu.pack(side="left", padx=(10, 0))
+        self.update_explorer_scope_menu()
+
+        ctk.CTkButton(ctrl_frame, text="🔍 查詢", width=90, command=self.run_explorer_query,
+                      fg_color="#106BA3").pack(side="left", padx=10)
+        self.lbl_explorer_status = ctk.CTkLabel(ctrl_frame, text="", text_color="gray", font=ctk.CTkFont(size=13))
+        self.lbl_explorer_status.pack(side="right", padx=10)
+
+        # 2. 結果表格
+        res_frame = ctk.CTkFrame(tab)
+        res_frame.grid(row=1, column=0, sticky="nsew", padx=5, pady=5)
+        res_frame.grid_columnconfigure(0, weight=1)
+        res_frame.grid_rowconfigure(0, weight=1)
+
+        cols = ("名稱", "最低價", "均價", "流速", "庫存", "利潤", "ROI", "去化天數")
+        self.explorer_tree = ttk.Treeview(res_frame, columns=cols, show="headings")
+        for col in cols:
+            self.explorer_tree.heading(col, text=col)
+            self.explorer_tree.column(col, width=90, anchor="e")
+        self.explorer_tree.column("名稱", width=260, anchor="w")
+        self.explorer_tree.grid(row=0, column=0, sticky="nsew")
+
+        scroll = ctk.CTkScrollbar(res_frame, command=self.explorer_tree.yview)
+        scroll.grid(row=0, column=1, sticky="ns")
+        self.explorer_tree.configure(yscrollcommand=scroll.set)
+        self.explorer_tree.bind("<Double-1>", self.on_explorer_result_click)
+
+        tip_label = ctk.CTkLabel(tab, text=f"💡 可用欄位: {', '.join(QUERY_FIELDS)}。資料來自本機全市場索引（於參數設定中啟用）。",
+                                 text_color="gray", font=ctk.CTkFont(size=12))
+        tip_label.grid(row=2, column=0, sticky="w", padx=10, pady=(0, 5))
 
-            threading.Thread(target=self._process_crafting_logic, args=(item_id, item_name), daemon=True).start()
+    def run_explorer_query(self):
+        """[主執行緒] 在本機索引上查詢，不發出任何 API 請求"""
+        server = self.selected_dc
+        engine = self._query_engines.get(server)
+        if engine is None:
+            engine = QueryEngine(self.market_index.get_index(server))
+            self._query_engines[server] = engine
+        engine.set_tax_rate(self.config.get("market_tax_rate", 5) / 100.0)
+        if not len(engine.index):
+            self.lbl_explorer_status.configure(text=f"{server} 尚無索引資料，請於參數設定中啟用全市場索引", text_color="#FFA500")
+            return
+
+        ids = self._explorer_scope_ids()
+        try:
+            rows, matched, elapsed = engine.run(self.explorer_where.get(), self.explorer_order_var.get(),
+                                                hq=self.explorer_hq_var.get(), ids=ids, limit=200)
+        except QueryError as e:
+            self.lbl_explorer_status.configure(text=str(e), text_color="red")
+            return
+
+        self.explorer_tree.delete(*self.explorer_tree.get_children())
+        for r in rows:
+            name = self.db.get_item_name_by_id(r["id"])
+            r["name"] = self.translate_term(name) if name else f"[ID: {r['id']}]"
+            self.explorer_tree.insert("", "end", values=(
+                r["name"],
+                f"{int(r['min_price']):,}",
+                f"{int(r['avg_sale']):,}",
+                f"{r['velocity']:.1f}",
+                f"{int(r['stock']):,}",
+                f"{int(r['profit']):,}",
+                f"{r['roi']:.1f}%",
+                f"{r['days_to_sell']:.1f}" if r['days_to_sell'] < 999 else "-",
+            ))
+        self.last_explorer_results = rows
+        self.lbl_explorer_status.configure(
+            text=f"索引 {len(engine.index):,} 筆 | 符合 {matched:,} 筆 | {elapsed:.0f} ms", text_color="#2CC985")
+
+    def on_explorer_result_click(self, event):
+        item = self.explorer_tree.selection()
+        if not item:
+            return
+        idx = self.explorer_tree.index(item)
+        if idx < len(self.last_explorer_results):
+            r = self.last_explorer_results[idx]
+            self._open_item_from_result(r["id"], r["name"])
+
+    # ========================================================
+    # [P5] 跨服套利掃描
+    # ========================================================
+    def setup_tab_arbitrage(self):
+        tab = self.tabview.tab("💱 跨服套利")
+        tab.grid_columnconfigure(0, weight=1)
+        tab.grid_rowconfigure(1, weight=1)
+        self.last_arbitrage_routes = []
+
+        # 1. 控制列
+        ctrl_frame = ctk.CTkFrame(tab, fg_color="transparent")
+        ctrl_frame.grid(row=0, column=0, sticky="ew", padx=10, pady=10)
+
+        ctk.CTkLabel(ctrl_frame, text="物品來源:", font=ctk.CTkFont(weight="bold")).pack(side="left", padx=(10, 5))
+        self.arb_source_var = ctk.StringVar(value="全部 (All)")
+        self.arb_source_menu = ctk.CTkComboBox(ctrl_frame, width=170, variable=self.arb_source_var)
+        self.arb_source_menu.pack(side="left", padx=5)
+        self.update_arbitrage_source_menu()
+
+        ctk.CTkLabel(ctrl_frame, text="出清天數:").pack(side="left", padx=(15, 5))
+        self.arb_hold_days = ctk.CTkEntry(ctrl_frame, width=50)
+        self.arb_hold_days.insert(0, str(DEFAULT_HOLD_DAYS))
+        self.arb_hold_days.pack(side="left")
+
+        ctk.CTkLabel(ctrl_frame, text="最低利潤:").pack(side="left", padx=(15, 5))
+        self.arb_min_profit = ctk.CTkEntry(ctrl_frame, width=80)
+        self.arb_min_profit.insert(0, "1000")
+        self.arb_min_profit.pack(side="left")
+
+        self.btn_arb_scan = ctk.CTkButton(ctrl_frame, text="💱 開始掃描", command=self.start_arbitrage_scan,
+                                          fg_color="#106BA3")
+        self.btn_arb_scan.pack(side="right", padx=10)
+        self.lbl_arb_status = ctk.CTkLabel(ctrl_frame, text="", text_color="gray", font=ctk.CTkFont(size=13))
+        self.lbl_arb_status.pack(side="right", padx=10)
+        self.arb_progress = ctk.CTkProgressBar(ctrl_frame, height=5)
+        self.arb_progress.set(0)
+
+        # 2. 路線表格（依分數遞減）
+        res_frame = ctk.CTkFrame(tab)
+        res_frame.grid(row=1, column=0, sticky="nsew", padx=5, pady=5)
+        res_frame.grid_columnconfigure(0, weight=1)
+        res_frame.grid_rowconfigure(0, weight=1)
+
+        cols = ("名稱", "HQ", "買進", "買價", "賣出", "賣價", "數量", "成本", "稅後利潤", "目的地速度", "資料時間", "分數")
+        self.arb_tree = ttk.Treeview(res_frame, columns=cols, show="headings")
+        for col in cols:
+            self.arb_tree.heading(col, text=col)
+            self.arb_tree.column(col, width=85, anchor="e")
+        self.arb_tree.column("名稱", width=220, anchor="w")
+        self.arb_tree.column("HQ", width=40, anchor="center")
+        self.arb_tree.column("買進", width=90, anchor="center")
+        self.arb_tree.column("賣出", width=90, anchor="center")
+        self.arb_tree.grid(row=0, column=0, sticky="nsew")
+
+        scroll = ctk.CTkScrollbar(res_frame, command=self.arb_tree.yview)
+        scroll.grid(row=0, column=1, sticky="ns")
+        self.arb_tree.configure(yscrollcommand=scroll.set)
+        self.arb_tree.bind("<Double-1>", self.on_arbitrage_result_click)
+
+        tip_label = ctk.CTkLabel(tab, text="💡 需選擇資料中心。數量 = 稅後仍有利潤的上架，並以目的地銷售速度 × 出清天數為上限；"
+                                           "分數 = 稅後利潤依資料新舊折減（每 6 小時減半）。",
+                                 text_color="gray", font=ctk.CTkFont(size=12))
+        tip_label.grid(row=2, column=0, sticky="w", padx=10, pady=(0, 5))
+
+    def update_arbitrage_source_menu(self):
+        cats = self.db.get_categories()
+        names = [c[1] for c in cats] if isinstance(cats, list) else list(cats.values())
+        self.arb_source_menu.configure(values=["全部 (All)"] + names + [ARBITRAGE_INDEX_SOURCE])
+
+    def start_arbitrage_scan(self):
+        server = self.selected_dc
+        try:
+            hold_days = max(1, int(self.arb_hold_days.get()))
+            min_profit = int(self.arb_min_profit.get())
+        except ValueError:
+            messagebox.showerror("錯誤", "請輸入有效的數字")
+            return
+
+        source = self.arb_source_var.get()
+        cat_id = None
+        if source not in ("全部 (All)", ARBITRAGE_INDEX_SOURCE):
+            cats = self.db.get_categories()
+            if isinstance(cats, list):
+                cat_id = next((c[0] for c in cats if c[1] == source), None)
+            else:
+                cat_id = next((k for k, v in cats.items() if v == source), None)
+
+        self.btn_arb_scan.configure(state="disabled")
+        self.arb_progress.pack(side="bottom", fill="x", pady=5)
+        self.arb_progress.set(0)
+        self.arb_tree.delete(*self.arb_tree.get_children())
+        self.last_arbitrage_routes = []
+        self.lbl_arb_status.configure(text="掃描中...", text_color="yellow")
+        self.executor.submit("arbitrage", self.run_arbitrage_scan, server, source == ARBITRAGE_INDEX_SOURCE,
+                             cat_id, hold_days, min_profit, lane=BACKGROUND)
+
+    def run_arbitrage_scan(self, server, use_index, category_id, hold_days, min_profit, token=None):
+        """[背景執行緒] 批次抓取資料中心資料並計算套利路線，每完成一批就更新表格"""
+        try:
+            if use_index:
+                item_ids = candidates_from_index(self.market_index.get_index(server))
+                if not item_ids:
+                    self.executor.call_soon(token, lambda: self.finish_arbitrage_scan(
+                        f"{server} 尚無索引資料，請於參數設定中啟用全市場索引"))
+                    return
+            else:
+                item_ids = list({fav[0] for fav in self.db.get_favorites(category_id)})
+                if not item_ids:
+                    self.executor.call_soon(token, lambda: self.finish_arbitrage_scan("該分類清單為空"))
+                    return
+
+            tax_rate = self.config.get("market_tax_rate", 5) / 100.0
+            velocity_days = self.config.get("velocity_days", 7)
+            self.append_log(f"[跨服套利] {server}: 掃描 {len(item_ids)} 個物品...")
+            routes = []
+            for batch_routes, done, total in iter_arbitrage_scan(self.api, server, item_ids, tax_rate, velocity_days,
+                                                                 hold_days, min_profit, token=token):
+                for r in batch_routes:
+                    name = self.db.get_item_name_by_id(r["id"])
+                    r["name"] = self.translate_term(name) if name else f"[ID: {r['id']}]"
+                routes.extend(batch_routes)
+                routes.sort(key=lambda r: r["score"], reverse=True)
+                snapshot = routes[:ARBITRAGE_MAX_ROWS]
+                self.executor.call_soon(token, lambda s=snapshot, p=done / total: self._show_arbitrage_routes(s, p))
+
+            summary = f"{len(item_ids)} 個物品，{len(routes)} 條路線"
+            self.executor.call_soon(token, lambda: self.finish_arbitrage_scan(None, summary))
+        except Exception as e:
+            logging.exception("Arbitrage scan failed")
+            msg = f"掃描失敗: {e}"
+            self.executor.call_soon(token, lambda m=msg: self.finish_arbitrage_scan(m))
+
+    def _show_arbitrage_routes(self, routes, progress):
+        """[主執行緒] 以目前為止排序好的前 N 條路線重繪表格"""
+        self.arb_progress.set(progress)
+        self.arb_tree.delete(*self.arb_tree.get_children())
+        for r in routes:
+            age = r["age"]
+            if age is None:
+                age_str = "-"
+            elif age < 3600:
+                age_str = f"{int(age // 60)} 分前"
+            else:
+                age_str = f"{age / 3600:.1f} 時前"
+            self.arb_tree.insert("", "end", values=(
+                r["name"],
+                "★" if r["hq"] else "",
+                r["buy_world"],
+                f"{int(r['buy_price']):,}",
+                r["sell_world"],
+                f"{int(r['sell_price']):,}",
+                r["quantity"],
+                f"{int(r['cost']):,}",
+                f"{int(r['profit']):,}",
+                f"{r['dest_velocity']:.1f}",
+                age_str,
+                f"{int(r['score']):,}",
+            ))
+        self.last_arbitrage_routes = routes
+
+    def finish_arbitrage_scan(self, error, summary=None):
+        self.btn_arb_scan.configure(state="normal")
+        self.arb_progress.pack_forget()
+        if error:
+            self.lbl_arb_status.configure(text="掃描失敗", text_color="red")
+            messagebox.showerror("掃描錯誤", error)
+            return
+        self.lbl_arb_status.configure(text=summary or "", text_color="#2CC985")
+        self.append_log(f"[跨服套利] 完成: {summary}")
+
+    def on_arbitrage_result_click(self, event):
+        item = self.arb_tree.selection()
+        if not item:
+            return
+        idx = self.arb_tree.index(item)
+        if idx < len(self.last_arbitrage_routes):
+            r = self.last_arbitrage_routes[idx]
+            self._open_item_from_result(r["id"], r["name"])
 
 # --- Hot Item Scanner (Tab) ---
     def setup_tab_scanner(self):
@@ -2116,6 +2652,11 @@ class FF14MarketApp(ctk.CTk):
         self.chk_batch = ctk.CTkCheckBox(ctrl_frame, text="⚡ 批次快速掃描", variable=self.batch_scan_var)
         self.chk_batch.pack(side="left", padx=10)
         
+        # [P5] 多伺服器比較（對所有自訂伺服器同時掃描）
+        self.fanout_scan_var = ctk.BooleanVar(value=False)
+        self.chk_fanout = ctk.CTkCheckBox(ctrl_frame, text="🌐 全伺服器比較", variable=self.fanout_scan_var)
+        self.chk_fanout.pack(side="left", padx=10)
+        
         # Scan Button
         self.btn_scan = ctk.CTkButton(ctrl_frame, text="開始掃描", command=self.start_scan_thread, fg_color="#E04F5F", hover_color="#C03A48")
         self.btn_scan.pack(side="right", padx=10)
@@ -2130,19 +2671,22 @@ class FF14MarketApp(ctk.CTk):
         res_frame.grid_columnconfigure(0, weight=1)
         res_frame.grid_rowconfigure(0, weight=1)
         
-        cols = ("名稱", "熱度", "均價", "庫存", "最低價")
+        cols = ("名稱", "熱度", "均價", "庫存", "最低價", "狙擊")
         self.scan_tree = ttk.Treeview(res_frame, columns=cols, show="headings")
         self.scan_tree.heading("名稱", text="名稱")
         self.scan_tree.heading("熱度", text="熱度指標")
         self.scan_tree.heading("均價", text="均價")
         self.scan_tree.heading("庫存", text="庫存")
         self.scan_tree.heading("最低價", text="最低價")
+        self.scan_tree.heading("狙擊", text="狙擊利潤")
         
         self.scan_tree.column("名稱", width=250)
         self.scan_tree.column("熱度", width=100)
         self.scan_tree.column("均價", width=80)
         self.scan_tree.column("庫存", width=60)
         self.scan_tree.column("最低價", width=80)
+        self.scan_tree.column("狙擊", width=100)
+        self._scan_sort = ("heat", True)
         
         self.scan_tree.grid(row=0, column=0, sticky="nsew")
         
@@ -2163,6 +2707,29 @@ class FF14MarketApp(ctk.CTk):
         self.btn_refresh_cat.configure(fg_color="#2CC985") # Success green
         self.after(500, lambda: self.btn_refresh_cat.configure(fg_color=original_color))
 
+    def update_explorer_scope_menu(self):
+        cats = self.db.get_categories()
+        names = [c[1] for c in cats] if isinstance(cats, list) else list(cats.values())
+        self.explorer_scope_menu.configure(values=[EXPLORER_ALL_ITEMS, EXPLORER_ALL_FAVORITES] +
+                                           [f"最愛: {name}" for name in names])
+        if self.explorer_scope_var.get() not in self.explorer_scope_menu.cget("values"):
+            self.explorer_scope_var.set(EXPLORER_ALL_ITEMS)
+
+    def _explorer_scope_ids(self):
+        """市場探索的查詢範圍 -> 物品 ID 集合；全部物品時回傳 None"""
+        scope = self.explorer_scope_var.get()
+        if scope == EXPLORER_ALL_ITEMS:
+            return None
+        cat_id = None
+        if scope != EXPLORER_ALL_FAVORITES:
+            cats = self.db.get_categories()
+            cat_name = scope[len("最愛: "):]
+            if isinstance(cats, list):
+                cat_id = next((c[0] for c in cats if c[1] == cat_name), None)
+            else:
+                cat_id = next((k for k, v in cats.items() if v == cat_name), None)
+        return {row[0] for row in self.db.get_favorites(cat_id)}
+
     def update_scanner_cat_menu(self):
         cats = self.db.get_categories()
         logging.info(f"DEBUG: cats type={type(cats)}, value={cats}")
@@ -2174,6 +2741,8 @@ class FF14MarketApp(ctk.CTk):
              
         self.scan_cat_menu.configure(values=options)
         self.scan_cat_menu.set("全部 (All)")
+        if hasattr(self, 'explorer_scope_menu'):
+            self.update_explorer_scope_menu()
 
     def start_scan_thread(self):
         server = self.dc_option_menu.get()
@@ -2184,6 +2753,8 @@ class FF14MarketApp(ctk.CTk):
         self.btn_scan.configure(state="disabled")
         self.scan_progress.pack(side="bottom", fill="x", pady=5)
         self.scan_progress.set(0)
+        self._begin_scan_results()
+        self.frame_monitors["favorites"].start()
         
         hours = self.scan_hours_var.get()
         cat_name = self.scan_cat_var.get()
@@ -2201,9 +2772,18 @@ class FF14MarketApp(ctk.CTk):
                 # dict {id: name}
                 cat_id = next((k for k, v in cats.items() if v == cat_name), None)
 
-        threading.Thread(target=self.run_scanner, args=(server, hours, cat_id, is_batch), daemon=True).start()
+        if self.fanout_scan_var.get():
+            if len(self.custom_servers) < 2:
+                self.finish_scan("全伺服器比較需要至少兩個自訂伺服器")
+                return
+            self.executor.submit("scanner", self.run_fan_out_scan, "favorites", list(self.custom_servers), hours,
+                                 category_id=cat_id, lane=BACKGROUND)
+            return
+
+        self.executor.submit("scanner", self.run_scanner, server, hours, cat_id, is_batch, lane=BACKGROUND)
 
-    def run_scanner(self, server, hours, category_id=None, is_batch=False):
+    def run_scanner(self, server, hours, category_id=None, is_batch=False, token=None):
+        """[背景執行緒] 串流掃描：每完成一批就把結果送回 UI 插入"""
         try:
             # 1. Gather IDs (Filter by Category)
             target_ids = set()
@@ -2213,7 +2793,7 @@ class FF14MarketApp(ctk.CTk):
                 target_ids.add(fav[0]) # ID
 
             if not target_ids:
-                self.after(0, lambda: self.finish_scan([], "該分類清單為空"))
+                self.executor.call_soon(token, lambda: self.finish_scan("該分類清單為空"))
                 return
 
             id_list = list(target_ids)
@@ -2222,148 +2802,266 @@ class FF14MarketApp(ctk.CTk):
             mode_str = "批次模式" if is_batch else "循序模式"
             self.append_log(f"開始掃描 {total} 個最愛物品 ({mode_str})...")
             
-            results = []
-            
-            if is_batch:
-                # --- BATCH MODE ---
-                self.after(0, lambda: self.scan_progress.set(0.1))
-                data_map, status = self.api.fetch_market_data_batch(server, id_list)
-                
-                if status == 200:
-                    raw_list = list(data_map.values())
-                    self.append_log(f"API 回傳資料筆數: {len(raw_list)}")
-                    cleaned_list = DataAnalyzer.clean_market_data(raw_list, min_price_threshold=0)
-                    self.append_log(f"有效資料筆數: {len(cleaned_list)}")
-                    
-                    for item_data in cleaned_list:
-                        item_id = item_data.get("itemID")
-                        name = self.db.get_item_name_by_id(item_id) or str(item_id)
-                        name = self.translate_term(name)
-                        
-                        history = item_data.get("recentHistory", [])
-                        sold, _ = DataAnalyzer.calculate_velocity_in_timeframe(history, hours)
-                        
-                        heat_val = sold if hours < 24 else sold / (hours/24.0)
-
-                        min_price = item_data.get("minPrice", 0)
-                        listings = item_data.get("listings", [])
-                        current_stock = len(listings)
-                        avg_price = int(sum(l["pricePerUnit"] for l in listings) / current_stock) if current_stock else 0
-
-                        results.append({
-                            "name": name,
-                            "heat": heat_val,
-                            "avg": avg_price,
-                            "stock": current_stock,
-                            "min": min_price,
-                            "id": item_id
-                        })
-                else:
-                    self.append_log(f"批次掃描發生錯誤: HTTP {status}")
-                
-                self.after(0, lambda: self.scan_progress.set(1.0))
-            
-            else:
-                # --- SEQUENTIAL MODE ---
-                for i, item_id in enumerate(id_list):
-                    # Update Progress
-                    progress = (i + 1) / total
-                    self.after(0, lambda p=progress: self.scan_progress.set(p))
-                    
-                    current_name = self.db.get_item_name_by_id(item_id) or str(item_id)
-                    current_name = self.translate_term(current_name)
-                    
-                    try:
-                        raw_data, status = self.api.fetch_market_data(server, item_id)
-                        
-                        if status != 200 or not raw_data:
-                            logging.warning(f"Item {item_id} fetch failed or empty. Status: {status}")
-                            continue
-
-                        cleaned_list = DataAnalyzer.clean_market_data([raw_data], min_price_threshold=0)
-                        if not cleaned_list: continue
-                             
-                        item_data = cleaned_list[0]
-                        history = item_data.get("recentHistory", [])
-                        sold, _ = DataAnalyzer.calculate_velocity_in_timeframe(history, hours)
-                        
-                        heat_val = sold if hours < 24 else sold / (hours/24.0)
-
-                        min_price = item_data.get("minPrice", 0)
-                        listings = item_data.get("listings", [])
-                        current_stock = len(listings)
-                        avg_price = int(sum(l["pricePerUnit"] for l in listings) / current_stock) if current_stock else 0
-
-                        results.append({
-                            "name": current_name,
-                            "heat": heat_val,
-                            "avg": avg_price,
-                            "stock": current_stock,
-                            "min": min_price,
-                            "id": item_id
-                        })
-                        time.sleep(0.1)
-                        
-                    except Exception as inner_e:
-                        logging.error(f"Error scanning item {item_id}: {inner_e}")
-                        continue
-
-            # Sort by Heat
-            results.sort(key=lambda x: x["heat"], reverse=True)
-            
-            self.append_log(f"掃描完成! 共 {len(results)} 筆")
-            self.after(0, lambda: self.finish_scan(results, None))
+            # 2. fetch → analyze → emit rows（[P5] 串流管線）
+            tax_rate = self.config.get("market_tax_rate", 5) / 100.0
+            min_profit = self.config.get("sniping_min_profit", 2000)
+            for rows, done, total in iter_scan(self.api, self.analysis_backend, server, id_list,
+                                               hours, is_batch=is_batch, token=token,
+                                               tax_rate=tax_rate, min_profit=min_profit):
+                for row in rows:
+                    name = self.db.get_item_name_by_id(row["id"]) or str(row["id"])
+                    row["name"] = self.translate_term(name)
+                self.executor.call_soon(token, lambda r=rows, p=done / total: self._append_scan_rows(r, p))
+
+            self.executor.call_soon(token, lambda: self.finish_scan(None))
 
         except Exception as e:
             logging.exception("Scanner failed")
-            self.after(0, lambda: self.finish_scan([], f"掃描失敗: {str(e)}"))
+            self.executor.call_soon(token, lambda: self.finish_scan(f"掃描失敗: {str(e)}"))
 
+    # ========================================================
+    # [P5] 多伺服器同時掃描 → 物品 × 伺服器矩陣
+    # ========================================================
+    def run_fan_out_scan(self, kind, servers, hours, category_id=None, sample_size=200, token=None):
+        """[背景執行緒] 對所有伺服器同時執行最愛 / 熱賣掃描（共用 MarketAPI 限速預算）"""
+        progress_bar = self.scan_progress if kind == "favorites" else self.hot_progress
+        label = "最愛掃描" if kind == "favorites" else "市場熱賣"
+
+        def finish(error=None):
+            if kind == "favorites":
+                self.finish_scan(error, summary="全伺服器比較完成，結果顯示於比較視窗。")
+            else:
+                self._finish_hot_fan_out(error)
 
+        try:
+            if kind == "favorites":
+                item_ids = list({fav[0] for fav in self.db.get_favorites(category_id)})
+                if not item_ids:
+                    self.executor.call_soon(token, lambda: finish("該分類清單為空"))
+                    return
 
-    def finish_scan(self, results, error):
-        self.btn_scan.configure(state="normal")
-        self.scan_progress.pack_forget()
-        
+                def scan_fn(server):
+                    return collect_favorites_scan(self.api, self.analysis_backend, server, item_ids, hours, token,
+                                                  tax_rate=self.config.get("market_tax_rate", 5) / 100.0,
+                                                  min_profit=self.config.get("sniping_min_profit", 2000))
+            else:
+                def scan_fn(server):
+                    results, error = self.api.fetch_hot_items(server=server, sample_size=sample_size,
+                                                              analysis_hours=hours, token=token)
+                    if error:
+                        raise RuntimeError(error)
+                    return results
+
+            self.append_log(f"[多伺服器掃描] {label}: {len(servers)} 個伺服器同時掃描...")
+            rows_by_server = {}
+            errors = []
+            for done, (server, rows, error) in enumerate(iter_fan_out(servers, scan_fn, token), 1):
+                rows_by_server[server] = rows
+                if error:
+                    errors.append(f"{server}: {error}")
+                self.append_log(f"[多伺服器掃描] {server} 完成 ({len(rows)} 筆) [{done}/{len(servers)}]")
+                self.executor.call_soon(token, lambda p=done / len(servers): progress_bar.set(p))
+
+            matrix = build_server_matrix(rows_by_server, servers)
+            for entry in matrix:
+                name = self.db.get_item_name_by_id(entry["id"])
+                entry["name"] = self.translate_term(name) if name else f"[ID: {entry['id']}]"
+
+            def show():
+                finish()
+                self.show_server_matrix_window(matrix, servers, f"{label} - 全伺服器比較", hours, errors)
+            self.executor.call_soon(token, show)
+
+        except Exception as e:
+            logging.exception("Fan-out scan failed")
+            # except 結束後 e 會被刪除，先組好訊息再綁進 callback
+            msg = f"掃描失敗: {e}"
+            self.executor.call_soon(token, lambda m=msg: finish(m))
+
+    def _finish_hot_fan_out(self, error=None):
+        """[主執行緒] 熱賣全伺服器掃描結束：恢復控制列（不覆蓋單一伺服器的熱賣結果）"""
+        self._log_frame_latency("hot", "市場熱賣")
+        self.btn_hot_scan.configure(state="normal", text="🔍 開始掃描")
+        self.hot_progress.pack_forget()
         if error:
+            self.lbl_hot_status.configure(text="掃描失敗", text_color="red")
             messagebox.showerror("掃描錯誤", error)
-            return
-            
-        # Bind to tree
+        else:
+            self.lbl_hot_status.configure(text="全伺服器比較完成", text_color="#2CC985")
+
+    def show_server_matrix_window(self, matrix, servers, title, hours, errors=None):
+        """[主執行緒] 顯示物品 × 伺服器矩陣（每格：最低價 | 銷售速度 | 庫存）"""
+        win = ctk.CTkToplevel(self)
+        win.title(f"🌐 {title}")
+        win.geometry("1100x600")
+
+        unit = "個/日" if hours >= 24 else f"個/{hours}h"
+        info = f"共 {len(matrix)} 個物品 · 每格格式：最低價 | 銷售速度 ({unit}) | 庫存 · ★ = 最低價伺服器"
+        if errors:
+            info += f" · 失敗: {', '.join(errors)}"
+        ctk.CTkLabel(win, text=info, text_color="gray").pack(anchor="w", padx=10, pady=(10, 5))
+
+        frame = ctk.CTkFrame(win)
+        frame.pack(fill="both", expand=True, padx=5, pady=5)
+        frame.grid_columnconfigure(0, weight=1)
+        frame.grid_rowconfigure(0, weight=1)
+
+        cols = ("名稱", "最低價伺服器", "最低價", "總速度") + tuple(servers)
+        tree = ttk.Treeview(frame, columns=cols, show="headings")
+        for col in cols:
+            tree.heading(col, text=col)
+            tree.column(col, width=160 if col in servers else 100, anchor="center")
+        tree.column("名稱", width=220, anchor="w")
+
+        for entry in matrix:
+            cells = []
+            for server in servers:
+                cell = entry["cells"].get(server)
+                if not cell:
+                    cells.append("-")
+                    continue
+                heat = f"{cell['heat']:.1f}" if hours >= 24 else f"{int(cell['heat'])}"
+                mark = "★ " if server == entry["best_server"] else ""
+                cells.append(f"{mark}{int(cell['min']):,} | {heat} | {cell['stock']}")
+            tree.insert("", "end", values=(
+                entry["name"],
+                entry["best_server"] or "-",
+                f"{int(entry['best_price']):,}",
+                f"{entry['total_heat']:.1f}",
+                *cells
+            ))
+
+        tree.grid(row=0, column=0, sticky="nsew")
+        yscroll = ctk.CTkScrollbar(frame, command=tree.yview)
+        yscroll.grid(row=0, column=1, sticky="ns")
+        xscroll = ctk.CTkScrollbar(frame, orientation="horizontal", command=tree.xview)
+        xscroll.grid(row=1, column=0, sticky="ew")
+        tree.configure(yscrollcommand=yscroll.set, xscrollcommand=xscroll.set)
+
+        def on_double_click(event):
+            selection = tree.selection()
+            if not selection:
+                return
+            entry = matrix[tree.index(selection[0])]
+            self.current_item_id = entry["id"]
+            self.current_item_name = entry["name"]
+            self.update_title(entry["name"], entry["id"])
+            self.tabview.set("市場概況")
+            self._submit_item_load(entry["id"], entry["name"])
+
+        tree.bind("<Double-1>", on_double_click)
+
+    def _log_frame_latency(self, kind, label):
+        """[P5] 掃描結束時記錄主迴圈延遲，用來確認 UI 是否順暢（kind: "hot" / "favorites"）"""
+        stats = self.frame_monitors[kind].stop()
+        if stats["samples"]:
+            mode = "子行程" if self.analysis_backend.use_processes else "同行程"
+            logging.info(f"[UI 延遲] {label} ({mode}): 平均 {stats['avg_ms']:.1f} ms, "
+                         f"p95 {stats['p95_ms']:.1f} ms, 最大 {stats['max_ms']:.1f} ms ({stats['samples']} 次取樣)")
+
+    def _begin_scan_results(self):
+        """[主執行緒] 掃描開始：清空表格並設定掃描模式欄位，之後逐批插入"""
         self.scan_tree.delete(*self.scan_tree.get_children())
         
         # 動態還原顯示欄位 (掃描模式)
-        cols = ("名稱", "熱度", "均價", "庫存", "最低價")
+        cols = ("名稱", "熱度", "均價", "庫存", "最低價", "狙擊")
         self.scan_tree.configure(columns=cols, show="headings")
         self.scan_tree.heading("名稱", text="名稱")
         self.scan_tree.heading("熱度", text="熱度指標")
         self.scan_tree.heading("均價", text="均價")
         self.scan_tree.heading("庫存", text="庫存")
         self.scan_tree.heading("最低價", text="最低價")
+        self.scan_tree.heading("狙擊", text="狙擊利潤")
         
         self.scan_tree.column("名稱", width=250)
         self.scan_tree.column("熱度", width=100)
         self.scan_tree.column("均價", width=80)
         self.scan_tree.column("庫存", width=60)
         self.scan_tree.column("最低價", width=80)
+        self.scan_tree.column("狙擊", width=100)
         
         hours = self.scan_hours_var.get()
         unit_label = "個/日" if hours >= 24 else f"個({hours}h)"
         self.scan_tree.heading("熱度", text=f"熱度 ({unit_label})")
+
+        # [P5] 點擊欄位標題排序（再點一次反向）
+        for col, field in SCAN_SORT_FIELDS.items():
+            self.scan_tree.heading(col, command=lambda f=field: self.sort_scan_results(f))
+        
+        # Store raw results for click mapping（與表格順序一致，依目前排序欄位）
+        self.last_scan_results = []
+        self._scan_sort_keys = []
+
+    def _scan_sort_value(self, r):
+        field, descending = self._scan_sort
+        value = r.get(field, 0) or 0
+        return -value if descending else value
+
+    def _scan_row_values(self, r, hours):
+        val_str = f"{r['heat']:.1f}" if hours >= 24 else f"{int(r['heat'])}"
+        snipe = r.get('snipe', 0)
+        return (
+            r['name'],
+            val_str,
+            f"{int(r['avg']):,}",
+            f"{r['stock']:,}",
+            f"{int(r['min']):,}",
+            f"+{int(snipe):,}" if snipe > 0 else "-",
+            r['id']
+        )
+
+    def _append_scan_rows(self, rows, progress):
+        """[主執行緒] 將一批結果依目前排序欄位插入正確位置（預設熱度遞減）"""
+        self.scan_progress.set(progress)
+        hours = self.scan_hours_var.get()
+        for r in rows:
+            key = self._scan_sort_value(r)
+            idx = bisect.bisect_right(self._scan_sort_keys, key)
+            self._scan_sort_keys.insert(idx, key)
+            self.last_scan_results.insert(idx, r)
+            self.scan_tree.insert("", idx, values=self._scan_row_values(r, hours))
+
+    def sort_scan_results(self, field):
+        """[P5] 依欄位重新排序掃描結果；同一欄位再點一次切換遞增 / 遞減"""
+        descending = not (self._scan_sort == (field, True))
+        self._scan_sort = (field, descending)
+        self._render_scan_results()
+
+    def _render_scan_results(self):
+        """依目前排序欄位重新排序並重繪掃描結果"""
+        self.last_scan_results.sort(key=self._scan_sort_value)
+        self._scan_sort_keys = [self._scan_sort_value(r) for r in self.last_scan_results]
+
+        hours = self.scan_hours_var.get()
+        self.scan_tree.delete(*self.scan_tree.get_children())
+        for r in self.last_scan_results:
+            self.scan_tree.insert("", "end", values=self._scan_row_values(r, hours))
+
+    def _reprice_scan_results(self, tax_rate):
+        """[P5] 設定變更：以掃描時保留的買進位置（數量 / 轉賣價 / 成本）重算狙擊欄位，不需重新掃描"""
+        min_profit = self.config.get("sniping_min_profit", 2000)
+        changed = False
+        for r in self.last_scan_results:
+            if "snipe_quantity" not in r:
+                continue   # 搜尋結果共用同一個表格，沒有狙擊欄位
+            snipe = reprice_snipe(r["snipe_quantity"], r["snipe_resale"], r["snipe_cost"], tax_rate)
+            value = snipe["profit"] if is_worth_sniping(snipe, min_profit) else 0
+            if value != r.get("snipe", 0):
+                r["snipe"] = value
+                changed = True
+        if changed:
+            self._render_scan_results()
+
+    def finish_scan(self, error, summary=None):
+        self._log_frame_latency("favorites", "最愛掃描")
+        self.btn_scan.configure(state="normal")
+        self.scan_progress.pack_forget()
         
-        for r in results:
-            val_str = f"{r['heat']:.1f}" if hours >= 24 else f"{int(r['heat'])}"
-            self.scan_tree.insert("", "end", values=(
-                r['name'],
-                val_str,
-                f"{int(r['avg']):,}",
-                f"{r['stock']:,}",
-                f"{int(r['min']):,}",
-                r['id']
-            ))
+        if error:
+            messagebox.showerror("掃描錯誤", error)
+            return
             
-        # Store raw results for click mapping
-        self.last_scan_results = results
-        self.append_log(f"掃描完成，找到 {len(results)} 個項目。")
+        self.append_log(summary or f"掃描完成，找到 {len(self.last_scan_results)} 個項目。")
 
     def on_scan_result_click(self, event):
         item = self.scan_tree.selection()
@@ -2391,18 +3089,13 @@ class FF14MarketApp(ctk.CTk):
             self.search_entry.delete(0, "end")
             self.search_entry.insert(0, str(item_id))
 
-            # Fetch Data Directly
-            if self.is_loading: return
-            self.is_loading = True
-            
+            # Fetch Data Directly（取代尚未完成的舊請求）
             self.status_bar.configure(text=f"正在載入 {display_name} ...", text_color="yellow")
             
-            threading.Thread(target=self.fetch_market_data, args=(item_id,), daemon=True).start()
-            
             if hasattr(self, 'lbl_craft_status'):
                 self.lbl_craft_status.configure(text=f"正同步搜尋配方: {display_name}...", text_color="cyan")
             
-            threading.Thread(target=self._process_crafting_logic, args=(item_id, item_name), daemon=True).start()
+            self._submit_item_load(item_id, item_name)
 
     # ========================================================
     # [P3] 價格警報系統
@@ -2488,8 +3181,9 @@ class FF14MarketApp(ctk.CTk):
                 item_entry.delete(0, "end")
                 price_entry.delete(0, "end")
                 refresh_list()
-                # 確保監控執行緒在運行
-                if not self._alert_running:
+                self._reload_alert_index()
+                # 確保監控排程已啟用
+                if not self.scheduler.is_enabled("price_alerts"):
                     self._start_alert_monitor()
 
         def delete_alert():
@@ -2499,6 +3193,7 @@ class FF14MarketApp(ctk.CTk):
             alert_id = int(sel[0])
             self.db.delete_price_alert(alert_id)
             refresh_list()
+            self._reload_alert_index()
 
         # 按鈕列
         btn_frame = ctk.CTkFrame(win, fg_color="transparent")
@@ -2511,59 +3206,108 @@ class FF14MarketApp(ctk.CTk):
 
         refresh_list()
 
+    # ========================================================
+    # [P5] 背景排程
+    # ========================================================
+    def _register_scheduled_jobs(self):
+        """將價格警報、自動刷新、熱賣快取預熱註冊到統一排程器"""
+        has_alerts = self._reload_alert_index() > 0
+        # 警報：高優先權，閒置時仍持續檢查（使用者可能正掛機等價格）
+        self.scheduler.register("price_alerts", self._check_alerts, self._alert_interval,
+                                priority=HIGH, enabled=has_alerts, initial_delay=30)
+        # 自動刷新：先在背景探測 lastUploadTime，有變化才回主執行緒刷新；使用者離開時暫停
+        self.scheduler.register("auto_refresh", self._auto_refresh_probe,
+                                self._auto_refresh_interval, priority=NORMAL,
+                                pause_on_idle=True, enabled=False)
+        # 熱賣快取預熱：最近查看過的組合在過期前於背景重新掃描，只在限速額度有餘裕時執行
+        self.scheduler.register("hot_cache_warm", self._warm_hot_cache, 60, priority=LOW,
+                                pause_on_idle=True, budget=8)
+
+        # 全市場索引：未完成時繼續完整掃描，完成後以最近更新物品增量更新
+        self.scheduler.register("market_index", self._update_market_index, 300, priority=LOW,
+                                pause_on_idle=True, budget=2, initial_delay=60,
+                                enabled=bool(self.config["market_index_enabled"]))
+
+        # 掛單快照：記憶體中累積，定期一次寫回資料庫（不需 API 請求）
+        self.scheduler.register("listing_churn_flush", self.listing_tracker.flush, 60, priority=LOW, budget=0)
+
+        # 任何鍵盤 / 滑鼠操作都視為使用者仍在使用
+        for seq in ("<KeyPress>", "<ButtonPress>", "<Motion>"):
+            self.bind_all(seq, lambda e: self.scheduler.touch(), add="+")
+
+        self.scheduler.start()
+        if has_alerts:
+            logging.info(f"[警報] 背景監控已啟動，每 {self._alert_interval} 秒檢查一次")
+
+    def _warm_hot_cache(self):
+        """[排程執行緒] 最近查看過、即將過期的熱賣組合在背景重新掃描，切換時可直接顯示"""
+        for key in self.hot_cache.keys_due(refresh_before=60):
+            server, hours, sample_size = key
+            results, error = self.api.fetch_hot_items(server=server, sample_size=sample_size, analysis_hours=hours)
+            if error:
+                logging.warning(f"[市場熱賣] 背景更新 {server} ({hours}h) 失敗: {error}")
+                continue
+            self._resolve_hot_names(results)
+            self.hot_cache.put(key, results)
+            logging.info(f"[市場熱賣] 快取已於背景更新 ({server}, {hours}h, {len(results)} 筆)")
+
+            def _refresh_view(key=key):
+                # 使用者正在看這個組合時，直接換上新結果
+                if self._hot_cache_key(self._hot_params()) == key:
+                    self._show_cached_hot_results()
+            self.after(0, _refresh_view)
+
+    def _update_market_index(self):
+        """[排程執行緒] 更新目前伺服器的全市場索引"""
+        server = self.selected_dc
+        if not server or server == "尚未設定伺服器":
+            return
+        # 每次最多抓取固定批次；使用者閒置時在批次之間停止（pause_on_idle 只在工作開始時檢查）
+        self.market_index.run_once(server, token=self.scheduler.idle_token())
+
     def _start_alert_monitor(self):
         """啟動背景價格警報監控"""
-        if self._alert_running:
-            return
-        self._alert_running = True
-        def monitor_loop():
-            while self._alert_running:
-                try:
-                    self._check_alerts()
-                except Exception as e:
-                    logging.debug(f"Alert check error: {e}")
-                time.sleep(self._alert_interval)
-        t = threading.Thread(target=monitor_loop, daemon=True)
-        t.start()
+        self.scheduler.set_enabled("price_alerts", True)
         logging.info(f"[警報] 背景監控已啟動，每 {self._alert_interval} 秒檢查一次")
 
     def _check_alerts(self):
-        """檢查所有啟用的警報"""
-        alerts = self.db.get_price_alerts(enabled_only=True)
-        if not alerts:
+        """
+        檢查所有啟用的警報：依伺服器分組，每組以精簡欄位批次查詢（每批最多 100 個物品），
+        再對照以物品 ID 索引的警報表一次判斷，請求數與批次數成正比而非警報數。
+        """
+        if not self._reload_alert_index():
             return
-        
-        for alert in alerts:
-            try:
-                server = alert.get('server') or self.selected_dc
-                data, status = self.api.fetch_market_data(server, alert['item_id'])
-                if status != 200 or not data:
-                    continue
-                
-                listings = data.get('listings', [])
-                if not listings:
-                    continue
-                
-                current_min = listings[0].get('pricePerUnit', 0)
-                if current_min <= 0:
-                    continue
-                
-                triggered = False
-                if alert['direction'] == 'below' and current_min <= alert['target_price']:
-                    triggered = True
-                elif alert['direction'] == 'above' and current_min >= alert['target_price']:
-                    triggered = True
-                
-                if triggered:
-                    self.db.mark_alert_triggered(alert['id'])
-                    dir_text = "低於" if alert['direction'] == 'below' else "高於"
-                    msg = f"🔔 {alert['item_name']}\n目前最低價: {current_min:,.0f}\n目標: {dir_text} {alert['target_price']:,.0f}"
-                    logging.info(f"[警報觸發] {msg}")
-                    self._show_alert_notification(alert['item_name'], current_min, alert['target_price'], alert['direction'])
-                    
-                time.sleep(0.5)  # 避免 API 過度請求
-            except Exception as e:
-                logging.debug(f"Alert check for {alert.get('item_name', '?')} failed: {e}")
+
+        index = self.alert_index
+        for server, item_ids in index.items_by_server().items():
+            batches = self.api.iter_market_data_batches(
+                server, item_ids, batch_size=ALERT_BATCH_SIZE, query=ALERT_QUERY, fields=ALERT_FIELDS)
+            for _, batch_data in batches:
+                for item_id, item_data in batch_data.items():
+                    try:
+                        for alert, current_min in index.evaluate(server, item_id, item_data):
+                            self._fire_alert(alert, current_min)
+                    except Exception as e:
+                        logging.debug(f"Alert check for item {item_id} failed: {e}")
+
+    def _reload_alert_index(self):
+        """從資料庫重建警報索引，回傳啟用中的警報數"""
+        self.alert_index.rebuild(self.db.get_price_alerts(enabled_only=True), default_server=self.selected_dc)
+        return len(self.alert_index)
+
+    def _on_market_payload(self, server, item_id, data):
+        """[MarketAPI hook，任意執行緒] 每筆新的市場資料都對照警報索引並更新掛單快照，不額外發出請求"""
+        for alert, current_min in self.alert_index.evaluate_payload(server, item_id, data):
+            self._fire_alert(alert, current_min)
+        self.listing_tracker.observe(server, item_id, data)
+
+    def _fire_alert(self, alert, current_min):
+        """標記警報已觸發並通知使用者"""
+        self.db.mark_alert_triggered(alert['id'])
+        dir_text = "低於" if alert['direction'] == 'below' else "高於"
+        msg = f"🔔 {alert['item_name']}\n目前最低價: {current_min:,.0f}\n目標: {dir_text} {alert['target_price']:,.0f}"
+        logging.info(f"[警報觸發] {msg}")
+        self._show_alert_notification(alert['item_name'], current_min, alert['target_price'], alert['direction'])
 
     def _show_alert_notification(self, item_name, current_price, target_price, direction):
         """在主執行緒顯示警報通知"""
@@ -2587,31 +3331,51 @@ class FF14MarketApp(ctk.CTk):
         """切換自動刷新模式"""
         if self.auto_refresh_var.get():
             self._auto_refresh_active = True
-            self._schedule_auto_refresh()
-            self.status_bar.configure(text=f"🔄 自動刷新已開啟（每 {self._auto_refresh_interval // 60} 分鐘）", text_color="#4CC9F0")
+            self.scheduler.set_enabled("auto_refresh", True)
+            self.status_bar.configure(text=f"🔄 自動刷新已開啟（目前每 {self._auto_refresh_interval} 秒，依銷售速度調整）", text_color="#4CC9F0")
             logging.info(f"[自動刷新] 已開啟，間隔 {self._auto_refresh_interval}s")
         else:
             self._auto_refresh_active = False
-            if self._auto_refresh_job:
-                self.after_cancel(self._auto_refresh_job)
-                self._auto_refresh_job = None
+            self.scheduler.set_enabled("auto_refresh", False)
             self.status_bar.configure(text="🔄 自動刷新已關閉", text_color="#AAA")
             logging.info("[自動刷新] 已關閉")
 
-    def _schedule_auto_refresh(self):
-        """排程下一次自動刷新"""
+    def _auto_refresh_probe(self):
+        """
+        [排程執行緒] 以只含 lastUploadTime 的精簡請求探測資料是否更新；
+        未更新時略過整個刷新（抓取、分析、表格、走勢圖、製作計算）。
+        """
+        item_id, data, server = self.current_item_id, self.current_data, self.selected_dc
+        if not self._auto_refresh_active or not item_id or self.is_loading:
+            return
+        known = data.get("lastUploadTime") if data else None
+        latest = self.api.fetch_last_upload_time(server, item_id)
+        if known and latest and latest <= known:
+            logging.debug(f"[自動刷新] {self.current_item_name} 無新資料，略過刷新")
+            return
+        # 有新上傳：丟棄單品快取，避免刷新時拿到舊資料
+        self.api.invalidate_market_cache(server, item_id)
+        self.after(0, self._auto_refresh_tick)
+
+    def _adapt_auto_refresh_interval(self, analysis):
+        """[主執行緒] 依目前物品的銷售速度調整自動刷新間隔"""
+        interval = DataAnalyzer.suggest_refresh_interval(analysis.get("velocity", 0))
+        if interval == self._auto_refresh_interval:
+            return
+        self._auto_refresh_interval = interval
+        self.scheduler.set_interval("auto_refresh", interval)
         if self._auto_refresh_active:
-            self._auto_refresh_job = self.after(self._auto_refresh_interval * 1000, self._auto_refresh_tick)
+            logging.info(f"[自動刷新] 依銷售速度調整間隔為 {interval}s")
 
     def _auto_refresh_tick(self):
-        """執行自動刷新"""
+        """[主執行緒] 執行自動刷新（探測到新資料後由排程器觸發）"""
         if not self._auto_refresh_active:
             return
         if self.current_item_id and not self.is_loading:
             logging.info(f"[自動刷新] 刷新 {self.current_item_name}")
             self.start_search(use_current_id=True)
-        self._schedule_auto_refresh()
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # [P5] 打包後的子行程分析需要
     app = FF14MarketApp()
     app.mainloop()
\ No newline at end of file
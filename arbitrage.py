@@ -0,0 +1,209 @@
+"""
+跨服套利掃描 (Cross-world Arbitrage)
+=============================
+對一批物品抓取「資料中心」層級的市場資料，找出「在 A 服買進、到 B 服上架」的路線：
+
+- 每個物品依 (品質, 世界) 分組上架與銷售紀錄，各走訪一次
+- 買進端：依單價排序的上架階梯建立累積數量 / 成本，只買稅後仍有利潤的部分
+- 數量上限：目的地世界的銷售速度 × 預計出清天數（避免買進賣不掉的量）
+- 資料新舊加權：兩個世界中較舊的上傳時間，每經過半衰期分數減半
+
+請求以多個執行緒同時抓取不同批次，總請求速率仍由 MarketAPI 的共用限速器控制。
+"""
+
+import bisect
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+ARBITRAGE_BATCH_SIZE = 100   # Universalis 多物品查詢上限
+ARBITRAGE_MAX_PARALLEL = 4   # 同時進行的批次數
+ARBITRAGE_HISTORY_ENTRIES = 100
+ARBITRAGE_QUERY = f"listings=100&entries={ARBITRAGE_HISTORY_ENTRIES}"
+ARBITRAGE_FIELDS = (
+    "itemID", "worldUploadTimes",
+    "listings.pricePerUnit", "listings.quantity", "listings.hq", "listings.worldName", "listings.worldID",
+    "listings.lastReviewTime",
+    "recentHistory.pricePerUnit", "recentHistory.quantity", "recentHistory.hq", "recentHistory.worldName",
+    "recentHistory.timestamp",
+)
+ARBITRAGE_INDEX_LIMIT = 500   # 從全市場索引取樣時，依銷售速度取前 N 個物品
+
+DEFAULT_HOLD_DAYS = 3          # 預計在目的地出清的天數
+DEFAULT_AGE_HALF_LIFE = 6 * 3600
+MIN_VELOCITY_SPAN = 3600       # 換算每日銷售速度時，歷史涵蓋時間至少以 1 小時計
+
+
+def _ts(value):
+    """Universalis 的時間戳有秒與毫秒兩種格式。"""
+    value = value or 0
+    return value / 1000 if value > 2000000000 else value
+
+
+def _world_upload_times(item_data):
+    """{世界名稱: 最後上傳時間}；沒有 worldUploadTimes 時以上架的 lastReviewTime 代替。"""
+    id_to_name = {}
+    reviewed = {}
+    for l in item_data.get("listings", []):
+        name = l.get("worldName")
+        if not name:
+            continue
+        if l.get("worldID") is not None:
+            id_to_name[str(l["worldID"])] = name
+        reviewed[name] = max(reviewed.get(name, 0), _ts(l.get("lastReviewTime")))
+    for world_id, uploaded in (item_data.get("worldUploadTimes") or {}).items():
+        name = id_to_name.get(str(world_id))
+        if name:
+            reviewed[name] = max(reviewed.get(name, 0), _ts(uploaded))
+    return reviewed
+
+
+def find_routes(item_id, item_data, tax_rate=0.05, velocity_days=7, hold_days=DEFAULT_HOLD_DAYS,
+                half_life=DEFAULT_AGE_HALF_LIFE, min_profit=0, now_ts=None):
+    """
+    計算單一物品的套利路線。每個 (品質, 買進世界) 只保留分數最高的賣出世界。
+    Return: [{"id", "hq", "buy_world", "buy_price", "sell_world", "sell_price", "quantity",
+              "cost", "profit", "unit_spread", "dest_velocity", "age", "score"}]
+    """
+    now_ts = now_ts or time.time()
+    velocity_days = max(1, velocity_days)
+    cutoff = now_ts - velocity_days * 86400
+
+    ladders = {}   # (hq, world) -> [(price, qty)]，依單價遞增
+    for l in sorted(item_data.get("listings", []), key=lambda x: x.get("pricePerUnit", 0)):
+        world = l.get("worldName")
+        price = l.get("pricePerUnit", 0)
+        if world and price > 0:
+            ladders.setdefault((bool(l.get("hq")), world), []).append((price, l.get("quantity", 0)))
+
+    history = item_data.get("recentHistory", [])
+    sold = {}      # (hq, world) -> 時段內銷售數量
+    for h in history:
+        world = h.get("worldName")
+        if world and h.get("pricePerUnit", 0) > 0 and _ts(h.get("timestamp")) > cutoff:
+            key = (bool(h.get("hq")), world)
+            sold[key] = sold.get(key, 0) + h.get("quantity", 0)
+
+    # 歷史只抓整個資料中心最近 N 筆：熱門物品的 N 筆可能只涵蓋數小時，
+    # 此時以實際涵蓋的時間換算每日速度，而不是整個 velocity_days
+    span = velocity_days * 86400
+    if len(history) >= ARBITRAGE_HISTORY_ENTRIES:
+        oldest_sale = min((_ts(h.get("timestamp")) for h in history), default=0)
+        if oldest_sale:
+            span = min(span, max(MIN_VELOCITY_SPAN, now_ts - oldest_sale))
+    span_days = span / 86400.0
+
+    uploads = _world_upload_times(item_data)
+    keep = 1 - tax_rate
+    routes = []
+
+    for hq in (False, True):
+        worlds = [w for (q, w) in ladders if q == hq]
+        if len(worlds) < 2:
+            continue
+        for buy_world in worlds:
+            ladder = ladders[(hq, buy_world)]
+            prices = [p for p, _ in ladder]
+            # 累積數量 / 成本：cum_qty[i] = 前 i 筆上架的總數量
+            cum_qty, cum_cost = [0], [0]
+            for price, qty in ladder:
+                cum_qty.append(cum_qty[-1] + qty)
+                cum_cost.append(cum_cost[-1] + price * qty)
+
+            best = None
+            for sell_world in worlds:
+                if sell_world == buy_world:
+                    continue
+                # 以比目的地最低價少 1 的價格上架
+                sell_price = ladders[(hq, sell_world)][0][0] - 1
+                revenue = sell_price * keep
+                # 稅後仍有利潤的上架筆數
+                n = bisect.bisect_left(prices, revenue)
+                if n == 0:
+                    continue
+                dest_velocity = sold.get((hq, sell_world), 0) / span_days
+                max_qty = int(dest_velocity * hold_days)
+                if max_qty <= 0:
+                    continue
+
+                # 依目的地可出清數量截斷（最後一筆上架可能只需部分，但上架須整筆購買）
+                k = min(n, bisect.bisect_left(cum_qty, max_qty, 1, n + 1))
+                quantity = cum_qty[k]
+                cost = cum_cost[k]
+                sellable = min(quantity, max_qty)
+                profit = sellable * revenue - cost
+                if profit <= min_profit:
+                    continue
+
+                oldest = min(uploads.get(buy_world, 0), uploads.get(sell_world, 0))
+                age = max(0.0, now_ts - oldest) if oldest else None
+                weight = 0.5 ** (age / half_life) if age is not None else 0.25
+                route = {
+                    "id": int(item_id),
+                    "hq": hq,
+                    "buy_world": buy_world,
+                    "buy_price": prices[0],
+                    "sell_world": sell_world,
+                    "sell_price": sell_price,
+                    "quantity": quantity,
+                    "cost": cost,
+                    "profit": profit,
+                    "unit_spread": revenue - prices[0],
+                    "dest_velocity": dest_velocity,
+                    "age": age,
+                    "score": profit * weight,
+                }
+                if best is None or route["score"] > best["score"]:
+                    best = route
+            if best:
+                routes.append(best)
+    return routes
+
+
+def iter_arbitrage_scan(api, server, item_ids, tax_rate=0.05, velocity_days=7, hold_days=DEFAULT_HOLD_DAYS,
+                        min_profit=0, token=None, max_parallel=ARBITRAGE_MAX_PARALLEL):
+    """
+    將 item_ids 分成多批同時抓取（server 需為資料中心），依完成順序 yield (routes, done, total)。
+    單一批次失敗只影響該批物品。
+    """
+    total = len(item_ids)
+    chunks = [item_ids[i:i + ARBITRAGE_BATCH_SIZE] for i in range(0, total, ARBITRAGE_BATCH_SIZE)]
+
+    def scan_chunk(chunk):
+        routes = []
+        for _, batch_data in api.iter_market_data_batches(server, chunk, batch_size=ARBITRAGE_BATCH_SIZE,
+                                                          query=ARBITRAGE_QUERY, fields=ARBITRAGE_FIELDS):
+            now_ts = time.time()
+            for key, item_data in batch_data.items():
+                routes.extend(find_routes(key, item_data, tax_rate, velocity_days, hold_days,
+                                          min_profit=min_profit, now_ts=now_ts))
+        return routes
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_parallel, len(chunks))), thread_name_prefix="arbitrage")
+    futures = {executor.submit(scan_chunk, chunk): len(chunk) for chunk in chunks}
+    done = 0
+    try:
+        for future in as_completed(futures):
+            if token and token.cancelled:
+                return
+            done += futures[future]
+            try:
+                routes = future.result()
+            except Exception as e:
+                logging.error(f"[跨服套利] 批次失敗: {e}")
+                routes = []
+            yield routes, done, total
+    finally:
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def candidates_from_index(index, limit=ARBITRAGE_INDEX_LIMIT):
+    """從全市場索引依銷售速度取前 limit 個有上架的物品 ID。"""
+    with index.reading():
+        velocity = index.columns["velocity"]
+        min_price = index.columns["min_price"]
+        positions = [i for i in range(len(index.ids)) if min_price[i] > 0 and velocity[i] > 0]
+        positions.sort(key=velocity.__getitem__, reverse=True)
+        return [index.ids[i] for i in positions[:limit]]
@@ -24,6 +24,21 @@ copy market_api.py "%BACKUP_DIR%\"
 copy database.py "%BACKUP_DIR%\"
 copy crafting_service.py "%BACKUP_DIR%\"
 copy recipe_provider.py "%BACKUP_DIR%\"
+copy rate_limiter.py "%BACKUP_DIR%\"
+copy chinese_converter.py "%BACKUP_DIR%\"
+copy task_executor.py "%BACKUP_DIR%\"
+copy analysis_worker.py "%BACKUP_DIR%\"
+copy scanner.py "%BACKUP_DIR%\"
+copy scheduler.py "%BACKUP_DIR%\"
+copy price_alerts.py "%BACKUP_DIR%\"
+copy hot_cache.py "%BACKUP_DIR%\"
+copy sales_index.py "%BACKUP_DIR%\"
+copy market_index.py "%BACKUP_DIR%\"
+copy market_query.py "%BACKUP_DIR%\"
+copy arbitrage.py "%BACKUP_DIR%\"
+copy sniping.py "%BACKUP_DIR%\"
+copy listing_churn.py "%BACKUP_DIR%\"
+copy update_items_cache.py "%BACKUP_DIR%\"
 copy items_cache_tw.json "%BACKUP_DIR%\"
 copy recipes_cache.json "%BACKUP_DIR%\"
 copy meta_items.json "%BACKUP_DIR%\"
@@ -35,6 +35,8 @@ copy "market_app.db" "dist\FF14MarketApp\"
 copy "使用說明.txt" "dist\FF14MarketApp\"
 copy "README.md" "dist\FF14MarketApp\"
 copy "update_items_cache.py" "dist\FF14MarketApp\"
+copy "rate_limiter.py" "dist\FF14MarketApp\"
+copy "chinese_converter.py" "dist\FF14MarketApp\"
 
 echo.
 echo.
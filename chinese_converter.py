@@ -0,0 +1,435 @@
+"""
+簡體 → 繁體 中文轉換模組
+=============================
+供 update_items_cache.py（物品快取更新）與 app.py（即時轉換搜尋關鍵字）共用。
+
+轉換分兩階段：
+1. 詞彙層級：以 Aho-Corasick 自動機一次掃描找出 FF14 專有詞彙（如「斗篷」「占星」），
+   避免逐字轉換造成的錯字（斗 → 鬥、占 → 佔）
+2. 字元層級：對照表預先編譯成 str.maketrans 轉換表，交由 str.translate 以 C 速度處理
+
+效能比較：
+  python chinese_converter.py --benchmark [items_cache_tw.json]
+"""
+
+import re
+import threading
+
+# 常見的簡繁差異字對照表（針對 FF14 物品名稱優化）
+# 格式：簡體字 → 繁體字
+SIMPLIFIED_TO_TRADITIONAL = {
+    # 通用對照
+    '与': '與', '专': '專', '业': '業', '丛': '叢', '东': '東',
+    '丝': '絲', '丢': '丟', '两': '兩', '严': '嚴', '丧': '喪',
+    '个': '個', '丰': '豐', '临': '臨', '为': '為', '丽': '麗',
+    '举': '舉', '义': '義', '乌': '烏', '乐': '樂', '乔': '喬',
+    '习': '習', '书': '書', '买': '買', '乱': '亂', '争': '爭',
+    '亏': '虧', '云': '雲', '亚': '亞', '产': '產', '亩': '畝',
+    '亲': '親', '亿': '億', '仅': '僅', '从': '從', '仓': '倉',
+    '仪': '儀', '们': '們', '价': '價', '众': '眾', '优': '優',
+    '伙': '夥', '会': '會', '伞': '傘', '伟': '偉', '传': '傳',
+    '伤': '傷', '伦': '倫', '伪': '偽', '似': '似', '佣': '傭',
+    '体': '體', '余': '餘', '佛': '佛', '你': '你', '佩': '佩',
+    '侠': '俠', '侣': '侶', '侦': '偵', '侧': '側', '侨': '僑',
+    '俩': '倆', '债': '債', '值': '值', '倾': '傾', '假': '假',
+    '偿': '償', '储': '儲', '催': '催', '像': '像', '儿': '兒',
+    '兑': '兌', '党': '黨', '兰': '蘭', '关': '關', '兴': '興',
+    '兹': '茲', '养': '養', '兽': '獸', '内': '內', '冈': '岡',
+    '册': '冊', '军': '軍', '农': '農', '冲': '沖', '决': '決',
+    '况': '況', '冻': '凍', '净': '淨', '凉': '涼', '减': '減',
+    '凤': '鳳', '凭': '憑', '凯': '凱', '击': '擊', '凿': '鑿',
+    '刊': '刊', '划': '劃', '刘': '劉', '则': '則', '刚': '剛',
+    '创': '創', '初': '初', '删': '刪', '别': '別', '刮': '刮',
+    '制': '製', '刹': '剎', '剂': '劑', '剑': '劍', '剧': '劇',
+    '剩': '剩', '剪': '剪', '副': '副', '割': '割', '劝': '勸',
+    '办': '辦', '务': '務', '动': '動', '励': '勵', '劲': '勁',
+    '劳': '勞', '势': '勢', '勋': '勳', '勤': '勤', '勾': '勾',
+    '包': '包', '匠': '匠', '区': '區', '医': '醫', '华': '華',
+    '协': '協', '单': '單', '卖': '賣', '占': '佔', '卫': '衛',
+    '卷': '卷', '厂': '廠', '厅': '廳', '历': '歷', '厉': '厲',
+    '压': '壓', '厌': '厭', '厨': '廚', '厩': '廄', '去': '去',
+    '县': '縣', '参': '參', '叔': '叔', '双': '雙', '发': '發',
+    '变': '變', '叙': '敘', '叠': '疊', '只': '只', '台': '台',
+    '号': '號', '叹': '嘆', '吊': '弔', '后': '後', '吓': '嚇',
+    '吕': '呂', '吗': '嗎', '听': '聽', '启': '啟', '呐': '吶',
+    '呕': '嘔', '呛': '嗆', '员': '員', '呜': '嗚', '咏': '詠',
+    '咨': '諮', '响': '響', '哑': '啞', '哗': '嘩', '哟': '喲',
+    '唤': '喚', '啬': '嗇', '啸': '嘯', '喷': '噴', '嘱': '囑',
+    '噜': '嚕', '嘴': '嘴', '器': '器', '围': '圍', '园': '園',
+    '国': '國', '图': '圖', '圆': '圓', '圣': '聖', '场': '場',
+    '坏': '壞', '块': '塊', '坚': '堅', '坛': '壇', '坝': '壩',
+    '坠': '墜', '垒': '壘', '垦': '墾', '垫': '墊', '垳': '垳',
+    '埘': '塒', '城': '城', '域': '域', '培': '培', '堕': '墮',
+    '堡': '堡', '塔': '塔', '塘': '塘', '墙': '牆', '壮': '壯',
+    '声': '聲', '壳': '殼', '处': '處', '备': '備', '复': '復',
+    '够': '夠', '头': '頭', '夸': '誇', '夺': '奪', '奋': '奮',
+    '奖': '獎', '奥': '奧', '妆': '妝', '妇': '婦', '妈': '媽',
+    '姐': '姐', '姑': '姑', '娘': '娘', '娱': '娛', '婴': '嬰',
+    '嫔': '嬪', '子': '子', '孙': '孫', '学': '學', '宁': '寧',
+    '宝': '寶', '实': '實', '宠': '寵', '审': '審', '宪': '憲',
+    '宫': '宮', '家': '家', '宽': '寬', '宾': '賓', '寝': '寢',
+    '对': '對', '寻': '尋', '导': '導', '将': '將', '尔': '爾',
+    '尘': '塵', '尝': '嚐', '尧': '堯', '尽': '盡', '层': '層',
+    '屡': '屢', '属': '屬', '岁': '歲', '岂': '豈', '岗': '崗',
+    '岚': '嵐', '岛': '島', '岭': '嶺', '岳': '嶽', '岸': '岸',
+    '峡': '峽', '崭': '嶄', '巩': '鞏', '巨': '巨', '币': '幣',
+    '师': '師', '帅': '帥', '带': '帶', '帐': '帳', '帜': '幟',
+    '帧': '幀', '帮': '幫', '广': '廣', '庆': '慶', '庐': '廬',
+    '庙': '廟', '庞': '龐', '废': '廢', '廊': '廊', '开': '開',
+    '异': '異', '弃': '棄', '张': '張', '弥': '彌', '弦': '弦',
+    '弯': '彎', '弹': '彈', '强': '強', '归': '歸', '当': '當',
+    '录': '錄', '彝': '彝', '形': '形', '彻': '徹', '径': '徑',
+    '征': '征', '御': '禦', '忆': '憶', '志': '志', '忧': '憂',
+    '态': '態', '怀': '懷', '怜': '憐', '总': '總', '恋': '戀',
+    '恒': '恆', '恳': '懇', '恶': '惡', '悦': '悅', '悬': '懸',
+    '悯': '憫', '惊': '驚', '惧': '懼', '惨': '慘', '惩': '懲',
+    '惫': '憊', '惬': '愜', '愤': '憤', '慑': '懾', '懒': '懶',
+    '戏': '戲', '战': '戰', '戬': '戩', '户': '戶', '执': '執',
+    '扑': '撲', '扔': '扔', '托': '託', '扩': '擴', '扫': '掃',
+    '扬': '揚', '扰': '擾', '折': '折', '抚': '撫', '抛': '拋',
+    '护': '護', '报': '報', '担': '擔', '拟': '擬', '拢': '攏',
+    '拣': '揀', '拥': '擁', '择': '擇', '挂': '掛', '挡': '擋',
+    '挣': '掙', '挤': '擠', '挥': '揮', '挽': '挽', '损': '損',
+    '捕': '捕', '换': '換', '据': '據', '掷': '擲', '揽': '攬',
+    '搀': '攙', '搁': '擱', '搂': '摟', '搅': '攪', '搜': '搜',
+    '摄': '攝', '摆': '擺', '摇': '搖', '撑': '撐', '撤': '撤',
+    '撵': '攆', '操': '操', '擎': '擎', '收': '收', '攻': '攻',
+    '败': '敗', '效': '效', '敌': '敵', '数': '數', '整': '整',
+    '敛': '斂', '斗': '鬥', '斩': '斬', '断': '斷', '无': '無',
+    '既': '既', '时': '時', '旷': '曠', '昆': '昆', '昼': '晝',
+    '显': '顯', '晋': '晉', '晒': '曬', '晓': '曉', '晕': '暈',
+    '晖': '暉', '暂': '暫', '暗': '暗', '曲': '曲', '术': '術',
+    '机': '機', '权': '權', '杀': '殺', '杂': '雜', '杆': '桿',
+    '条': '條', '来': '來', '杨': '楊', '极': '極', '构': '構',
+    '析': '析', '枪': '槍', '柜': '櫃', '柠': '檸', '标': '標',
+    '栅': '柵', '栈': '棧', '栋': '棟', '样': '樣', '核': '核',
+    '桃': '桃', '桥': '橋', '档': '檔', '梦': '夢', '检': '檢',
+    '棂': '欞', '楼': '樓', '榄': '欖', '榨': '榨', '槛': '檻',
+    '横': '橫', '樱': '櫻', '橱': '櫥', '欢': '歡', '歼': '殲',
+    '残': '殘', '殁': '歿', '殇': '殤', '毁': '毀', '毕': '畢',
+    '毙': '斃', '气': '氣', '氢': '氫', '汇': '匯', '汉': '漢',
+    '污': '污', '汤': '湯', '沈': '沈', '沉': '沉', '沟': '溝',
+    '没': '沒', '沦': '淪', '沧': '滄', '沪': '滬', '泛': '泛',
+    '注': '注', '泪': '淚', '泼': '潑', '洁': '潔', '洒': '灑',
+    '浆': '漿', '浇': '澆', '浊': '濁', '测': '測', '浑': '渾',
+    '浓': '濃', '浅': '淺', '济': '濟', '浪': '浪', '浮': '浮',
+    '涌': '湧', '涛': '濤', '润': '潤', '涩': '澀', '淀': '澱',
+    '渊': '淵', '渐': '漸', '渔': '漁', '渗': '滲', '温': '溫',
+    '湾': '灣', '溃': '潰', '滚': '滾', '滞': '滯', '满': '滿',
+    '滤': '濾', '滥': '濫', '漓': '灕', '潜': '潛', '潭': '潭',
+    '濑': '瀨', '灭': '滅', '灯': '燈', '灵': '靈', '灾': '災',
+    '灿': '燦', '炉': '爐', '炎': '炎', '炮': '炮', '炼': '煉',
+    '烁': '爍', '烂': '爛', '烛': '燭', '烟': '煙', '烦': '煩',
+    '烧': '燒', '烫': '燙', '热': '熱', '焕': '煥', '焰': '焰',
+    '煞': '煞', '熏': '燻', '爱': '愛', '牍': '牘', '状': '狀',
+    '犹': '猶', '狈': '狽', '狞': '獰', '独': '獨', '狮': '獅',
+    '猎': '獵', '猪': '豬', '猫': '貓', '献': '獻', '猴': '猴',
+    '玑': '璣', '环': '環', '现': '現', '玛': '瑪', '珐': '琺',
+    '珑': '瓏', '珲': '琿', '瑶': '瑤', '璃': '璃', '瓮': '甕',
+    '电': '電', '画': '畫', '畅': '暢', '异': '異', '疗': '療',
+    '疮': '瘡', '疯': '瘋', '症': '症', '痒': '癢', '痕': '痕',
+    '瘫': '癱', '瘾': '癮', '盏': '盞', '盐': '鹽', '监': '監',
+    '盖': '蓋', '盘': '盤', '盾': '盾', '眉': '眉', '着': '著',
+    '睁': '睜', '睐': '睞', '瞒': '瞞', '矛': '矛', '矫': '矯',
+    '砖': '磚', '础': '礎', '确': '確', '硕': '碩', '碍': '礙',
+    '碗': '碗', '碛': '磧', '磁': '磁', '礼': '禮', '祝': '祝',
+    '神': '神', '祸': '禍', '禅': '禪', '离': '離', '种': '種',
+    '积': '積', '称': '稱', '秘': '秘', '秩': '秩', '税': '稅',
+    '稳': '穩', '穷': '窮', '窃': '竊', '窍': '竅', '窝': '窩',
+    '窥': '窺', '竞': '競', '笔': '筆', '笼': '籠', '筑': '築',
+    '筝': '箏', '策': '策', '签': '簽', '简': '簡', '箱': '箱',
+    '篮': '籃', '类': '類', '粮': '糧', '糙': '糙', '纠': '糾',
+    '红': '紅', '纤': '纖', '约': '約', '级': '級', '纪': '紀',
+    '纫': '紉', '纬': '緯', '纯': '純', '纱': '紗', '纲': '綱',
+    '纳': '納', '纵': '縱', '纷': '紛', '纸': '紙', '纹': '紋',
+    '纺': '紡', '纽': '紐', '线': '線', '练': '練', '组': '組',
+    '细': '細', '织': '織', '终': '終', '绍': '紹', '经': '經',
+    '绑': '綁', '结': '結', '绕': '繞', '绘': '繪', '给': '給',
+    '络': '絡', '绝': '絕', '统': '統', '继': '繼', '绩': '績',
+    '绪': '緒', '续': '續', '绮': '綺', '绯': '緋', '绰': '綽',
+    '绳': '繩', '维': '維', '绵': '綿', '综': '綜', '绿': '綠',
+    '缀': '綴', '缅': '緬', '缆': '纜', '缔': '締', '缕': '縷',
+    '编': '編', '缘': '緣', '缚': '縛', '缝': '縫', '缠': '纏',
+    '缤': '繽', '缨': '纓', '缩': '縮', '缭': '繚', '缰': '韁',
+    '缴': '繳', '罐': '罐', '网': '網', '罗': '羅', '罚': '罰',
+    '罢': '罷', '翅': '翅', '翔': '翔', '耀': '耀', '职': '職',
+    '联': '聯', '聪': '聰', '肃': '肅', '肠': '腸', '肤': '膚',
+    '肿': '腫', '胀': '脹', '胁': '脅', '胆': '膽', '脉': '脈',
+    '脏': '髒', '脑': '腦', '脚': '腳', '脱': '脫', '脸': '臉',
+    '腊': '臘', '腻': '膩', '腾': '騰', '舆': '輿', '舰': '艦',
+    '舱': '艙', '艰': '艱', '艺': '藝', '节': '節', '芦': '蘆',
+    '芜': '蕪', '苍': '蒼', '苏': '蘇', '范': '範', '茧': '繭',
+    '荐': '薦', '荒': '荒', '荡': '蕩', '荣': '榮', '药': '藥',
+    '莲': '蓮', '莱': '萊', '获': '獲', '萤': '螢', '营': '營',
+    '萧': '蕭', '蒋': '蔣', '蒙': '蒙', '蓝': '藍', '蒲': '蒲',
+    '蔷': '薔', '蕴': '蘊', '薪': '薪', '藏': '藏', '虑': '慮',
+    '虚': '虛', '虫': '蟲', '虽': '雖', '蚀': '蝕', '蛇': '蛇',
+    '蛮': '蠻', '蜗': '蝸', '蜡': '蠟', '蝇': '蠅', '蝎': '蠍',
+    '蝴': '蝴', '螺': '螺', '蟠': '蟠', '蟾': '蟾', '行': '行',
+    '补': '補', '衬': '襯', '袄': '襖', '袋': '袋', '袜': '襪',
+    '装': '裝', '裤': '褲', '裹': '裹', '褐': '褐', '褴': '襤',
+    '览': '覽', '觅': '覓', '视': '視', '觉': '覺', '观': '觀',
+    '规': '規', '觑': '覷', '角': '角', '解': '解', '触': '觸',
+    '言': '言', '誉': '譽', '计': '計', '订': '訂', '认': '認',
+    '讨': '討', '让': '讓', '讯': '訊', '记': '記', '讲': '講',
+    '讳': '諱', '许': '許', '论': '論', '设': '設', '访': '訪',
+    '证': '證', '评': '評', '识': '識', '诊': '診', '词': '詞',
+    '译': '譯', '试': '試', '诗': '詩', '诚': '誠', '话': '話',
+    '该': '該', '详': '詳', '语': '語', '误': '誤', '说': '說',
+    '请': '請', '诸': '諸', '诺': '諾', '读': '讀', '课': '課',
+    '调': '調', '谁': '誰', '谈': '談', '谊': '誼', '谋': '謀',
+    '谓': '謂', '谢': '謝', '谣': '謠', '谦': '謙', '谨': '謹',
+    '谱': '譜', '谷': '谷', '豆': '豆', '象': '象', '豪': '豪',
+    '貌': '貌', '负': '負', '贡': '貢', '财': '財', '责': '責',
+    '贤': '賢', '败': '敗', '货': '貨', '质': '質', '购': '購',
+    '贮': '貯', '贯': '貫', '贰': '貳', '贱': '賤', '贴': '貼',
+    '贵': '貴', '贷': '貸', '贸': '貿', '费': '費', '赁': '賃',
+    '资': '資', '赋': '賦', '赌': '賭', '赏': '賞', '赔': '賠',
+    '赖': '賴', '赘': '贅', '赛': '賽', '赠': '贈', '赢': '贏',
+    '赵': '趙', '趋': '趨', '跃': '躍', '践': '踐', '踊': '踴',
+    '踪': '蹤', '蹄': '蹄', '蹦': '蹦', '蹲': '蹲', '躯': '軀',
+    '车': '車', '轧': '軋', '转': '轉', '轮': '輪', '软': '軟',
+    '轰': '轟', '轻': '輕', '载': '載', '较': '較', '辅': '輔',
+    '辆': '輛', '辈': '輩', '辉': '輝', '辑': '輯', '输': '輸',
+    '辖': '轄', '辗': '輾', '辙': '轍', '辞': '辭', '辩': '辯',
+    '边': '邊', '达': '達', '迁': '遷', '过': '過', '迈': '邁',
+    '运': '運', '进': '進', '远': '遠', '违': '違', '连': '連',
+    '迟': '遲', '适': '適', '选': '選', '逊': '遜', '透': '透',
+    '递': '遞', '逻': '邏', '遗': '遺', '遥': '遙', '邓': '鄧',
+    '邮': '郵', '邻': '鄰', '郑': '鄭', '酝': '醞', '酱': '醬',
+    '酿': '釀', '采': '採', '释': '釋', '鉴': '鑒', '钉': '釘',
+    '钊': '釗', '针': '針', '钓': '釣', '钛': '鈦', '钝': '鈍',
+    '钞': '鈔', '钟': '鐘', '钢': '鋼', '钥': '鑰', '钦': '欽',
+    '钧': '鈞', '钨': '鎢', '钩': '鉤', '钮': '鈕', '钯': '鈀',
+    '钱': '錢', '钳': '鉗', '钴': '鈷', '钵': '缽', '钻': '鑽',
+    '铁': '鐵', '铃': '鈴', '铅': '鉛', '铆': '鉚', '铉': '鉉',
+    '铜': '銅', '铝': '鋁', '铠': '鎧', '铡': '鍘', '铣': '銑',
+    '铤': '鋌', '铭': '銘', '铸': '鑄', '铺': '鋪', '链': '鏈',
+    '锁': '鎖', '锂': '鋰', '锅': '鍋', '锆': '鋯', '锈': '銹',
+    '锉': '銼', '锋': '鋒', '锌': '鋅', '锏': '鐧', '锐': '銳',
+    '锗': '鍺', '错': '錯', '锡': '錫', '锢': '錮', '锣': '鑼',
+    '锤': '錘', '锥': '錐', '锦': '錦', '锨': '鍁', '锭': '錠',
+    '键': '鍵', '锯': '鋸', '锰': '錳', '锲': '鍥', '锻': '鍛',
+    '镇': '鎮', '镊': '鑷', '镐': '鎬', '镑': '鎊', '镖': '鏢',
+    '镜': '鏡', '镣': '鐐', '镰': '鐮', '闪': '閃', '闭': '閉',
+    '问': '問', '闰': '閏', '闻': '聞', '闽': '閩', '阀': '閥',
+    '阁': '閣', '阅': '閱', '阔': '闊', '阙': '闕', '阚': '闞',
+    '阡': '阡', '阵': '陣', '阶': '階', '阻': '阻', '际': '際',
+    '陆': '陸', '陈': '陳', '陉': '陘', '陕': '陝', '陨': '隕',
+    '险': '險', '随': '隨', '隐': '隱', '隶': '隸', '雇': '僱',
+    '雏': '雛', '雳': '靂', '雾': '霧', '霁': '霽', '霄': '霄',
+    '霜': '霜', '静': '靜', '靠': '靠', '鞑': '韃', '韦': '韋',
+    '韩': '韓', '韵': '韻', '项': '項', '顶': '頂', '顷': '頃',
+    '顺': '順', '须': '須', '顽': '頑', '顾': '顧', '颁': '頒',
+    '颂': '頌', '预': '預', '颅': '顱', '领': '領', '颇': '頗',
+    '频': '頻', '颓': '頹', '颗': '顆', '题': '題', '颜': '顏',
+    '额': '額', '颠': '顛', '颤': '顫', '风': '風', '飙': '飆',
+    '飞': '飛', '饥': '飢', '饨': '飩', '饭': '飯', '饮': '飲',
+    '饰': '飾', '饱': '飽', '饲': '飼', '饺': '餃', '饼': '餅',
+    '馅': '餡', '馆': '館', '馈': '饋', '馒': '饅', '驮': '馱',
+    '驯': '馴', '驰': '馳', '驱': '驅', '驳': '駁', '驴': '驢',
+    '驶': '駛', '驹': '駒', '驻': '駐', '驼': '駝', '驾': '駕',
+    '骂': '罵', '骄': '驕', '验': '驗', '骆': '駱', '骇': '駭',
+    '骑': '騎', '骗': '騙', '骚': '騷', '骞': '騫', '骤': '驟',
+    '骥': '驥', '骨': '骨', '髅': '髏', '鬼': '鬼', '魅': '魅',
+    '魇': '魘', '鱼': '魚', '鲁': '魯', '鲈': '鱸', '鲍': '鮑',
+    '鲛': '鮫', '鲜': '鮮', '鲤': '鯉', '鲨': '鯊', '鲫': '鯽',
+    '鲸': '鯨', '鲷': '鯛', '鳄': '鱷', '鳗': '鰻', '鳞': '鱗',
+    '鸟': '鳥', '鸠': '鳩', '鸡': '雞', '鸢': '鳶', '鸣': '鳴',
+    '鸥': '鷗', '鸦': '鴉', '鸭': '鴨', '鸵': '鴕', '鸽': '鴿',
+    '鹃': '鵑', '鹅': '鵝', '鹈': '鵜', '鹉': '鵡', '鹊': '鵲',
+    '鹏': '鵬', '鹘': '鶻', '鹤': '鶴', '鹦': '鸚', '鹫': '鷲',
+    '鹰': '鷹', '鹿': '鹿', '麦': '麥', '麻': '麻', '黄': '黃',
+    '鼎': '鼎', '鼓': '鼓', '鼠': '鼠', '鼹': '鼴', '齐': '齊',
+    '齿': '齒', '龄': '齡', '龙': '龍', '龟': '龜',
+}
+
+# FF14 專有詞彙（多字詞）：逐字轉換會出錯或對照表缺字的詞
+# 格式：簡體詞 → 繁體詞（輸出不再經過逐字轉換）
+FF14_PHRASES = {
+    '杂货': '雜貨', '宠物': '寵物', '坐骑': '坐騎',
+    '斗篷': '斗篷', '占星': '占星', '制服': '制服', '皇后': '皇后', '御用': '御用',
+    '头发': '頭髮', '发型': '髮型', '发饰': '髮飾', '发带': '髮帶', '发簪': '髮簪',
+    '面包': '麵包', '面粉': '麵粉', '面条': '麵條',
+    '复合': '複合', '复制': '複製', '冲击': '衝擊', '日历': '日曆',
+    '干燥': '乾燥', '饼干': '餅乾', '松饼': '鬆餅',
+}
+
+
+class AhoCorasick:
+    """
+    Aho-Corasick 多模式字串比對自動機。
+    建立後可在 O(文字長度 + 匹配數) 時間內找出所有詞彙出現位置。
+    """
+
+    def __init__(self, patterns):
+        self._goto = [{}]        # 節點 -> {字元: 子節點}
+        self._fail = [0]         # 節點 -> 失敗轉移節點
+        self._output = [None]    # 節點 -> 在此結束的最長詞彙長度
+        self._dict_link = [0]    # 節點 -> 失敗鏈上下一個有輸出的節點
+        for pattern in patterns:
+            self._add(pattern)
+        self._build()
+
+    def _add(self, pattern):
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(None)
+                self._dict_link.append(0)
+            node = nxt
+        self._output[node] = len(pattern)
+
+    def _build(self):
+        queue = list(self._goto[0].values())
+        head = 0
+        while head < len(queue):
+            node = queue[head]
+            head += 1
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                f = self._fail[child]
+                self._dict_link[child] = f if self._output[f] is not None else self._dict_link[f]
+
+    def find_all(self, text):
+        """回傳所有匹配 (start, end)，依結束位置排序。"""
+        matches = []
+        node = 0
+        goto, fail, output, dict_link = self._goto, self._fail, self._output, self._dict_link
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            out = node if output[node] is not None else dict_link[node]
+            while out:
+                length = output[out]
+                matches.append((i + 1 - length, i + 1))
+                out = dict_link[out]
+        return matches
+
+
+class ChineseConverter:
+    """
+    預先編譯的簡 → 繁轉換器（執行緒安全，可重複使用）。
+    """
+
+    def __init__(self, char_map=None, phrase_map=None):
+        char_map = SIMPLIFIED_TO_TRADITIONAL if char_map is None else char_map
+        phrase_map = FF14_PHRASES if phrase_map is None else phrase_map
+
+        # 單字對照 → str.translate 轉換表；多字詞條一律交給詞彙階段
+        single = {k: v for k, v in char_map.items() if len(k) == 1 and k != v}
+        phrases = {k: v for k, v in char_map.items() if len(k) > 1}
+        phrases.update(phrase_map)
+
+        self._table = str.maketrans(single)
+        self._phrases = phrases
+        self._automaton = AhoCorasick(phrases) if phrases else None
+
+        # 預篩：以 regex 字元集合（C 速度）判斷文字是否需要轉換
+        first_chars = {p[0] for p in phrases}
+        self._needs_convert = self._char_class(set(single) | first_chars)
+        self._needs_phrase = self._char_class(first_chars)
+
+    @staticmethod
+    def _char_class(chars):
+        if not chars:
+            return None
+        return re.compile("[" + "".join(re.escape(ch) for ch in sorted(chars)) + "]")
+
+    def convert(self, text):
+        """將簡體中文文字轉換為繁體中文。"""
+        if not text:
+            return text
+        # 快速路徑：已是繁體（沒有任何需轉換的字）時原樣回傳
+        if self._needs_convert is None or not self._needs_convert.search(text):
+            return text
+        # 沒有任何詞彙的首字時，直接逐字轉換
+        if self._needs_phrase is None or not self._needs_phrase.search(text):
+            return text.translate(self._table)
+
+        matches = self._automaton.find_all(text)
+        if not matches:
+            return text.translate(self._table)
+
+        # 由左至右選取不重疊的匹配，同一起點取最長的詞
+        matches.sort(key=lambda m: (m[0], -(m[1] - m[0])))
+        parts = []
+        pos = 0
+        for start, end in matches:
+            if start < pos:
+                continue
+            parts.append(text[pos:start].translate(self._table))
+            parts.append(self._phrases[text[start:end]])
+            pos = end
+        parts.append(text[pos:].translate(self._table))
+        return "".join(parts)
+
+
+_default_converter = None
+_default_lock = threading.Lock()
+
+
+def get_converter():
+    """取得共用的預設轉換器（首次呼叫時才編譯）。"""
+    global _default_converter
+    if _default_converter is None:
+        with _default_lock:
+            if _default_converter is None:
+                _default_converter = ChineseConverter()
+    return _default_converter
+
+
+def convert_simplified_to_traditional(text):
+    """
+    將簡體中文文字轉換為繁體中文。
+    先以 FF14 專有詞彙比對，其餘部分使用預先編譯的轉換表。
+    """
+    return get_converter().convert(text)
+
+
+def _benchmark(json_file="items_cache_tw.json", rounds=5):
+    """比較舊版逐字查表與編譯後轉換器在整個物品快取上的耗時。"""
+    import json
+    import time
+
+    with open(json_file, "r", encoding="utf-8") as f:
+        names = list(json.load(f).get("by_name", {}).keys())
+
+    def naive(text):
+        return "".join(SIMPLIFIED_TO_TRADITIONAL.get(ch, ch) for ch in text)
+
+    converter = get_converter()
+    for label, fn in (("逐字查表 (舊版)", naive), ("translate + Aho-Corasick", converter.convert)):
+        best = float("inf")
+        for _ in range(rounds):
+            t0 = time.perf_counter()
+            for name in names:
+                fn(name)
+            best = min(best, time.perf_counter() - t0)
+        print(f"{label:<28} {len(names)} 個名稱: {best * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="簡體 → 繁體 轉換工具")
+    parser.add_argument("text", nargs="*", help="要轉換的文字")
+    parser.add_argument("--benchmark", nargs="?", const="items_cache_tw.json", metavar="JSON_FILE",
+                        help="以物品快取進行效能比較")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        _benchmark(args.benchmark)
+    for t in args.text:
+        print(convert_simplified_to_traditional(t))
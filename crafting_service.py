@@ -1,18 +1,106 @@
 import logging
 import math
 
+
+def _market_min_price(item_id, prices):
+    price = prices.get(item_id, 0)
+    return price if price > 0 else math.inf
+
+
+def solve_recipe_costs(item_id, recipes, prices, visited=None, depth=0, max_depth=10):
+    """
+    [純函式] 遞迴計算一個物品的最佳成本（製作 vs 購買）。
+    只使用 ID / 數字，不碰 DB 或 API，可直接送到子行程執行。
+
+    recipes: {item_id: [(mat_id, amount), ...]}（製作樹中所有有配方的物品）
+    prices:  {item_id: 市場最低價}
+    Returns: {"cost", "source", "materials": [{"id", "amount", "price", "subtotal", "source", "sub_materials"}]}
+    """
+    visited = visited or set()
+    if item_id in visited or depth >= max_depth:
+        return {"cost": _market_min_price(item_id, prices), "materials": [], "source": "購買"}
+
+    visited.add(item_id)
+    buy_cost = _market_min_price(item_id, prices)
+
+    recipe = recipes.get(item_id)
+    if not recipe:
+        return {"cost": buy_cost, "materials": [], "source": "購買"}
+
+    craft_cost = 0
+    material_details = []
+    for mat_id, amount in recipe:
+        sub_result = solve_recipe_costs(mat_id, recipes, prices, visited.copy(), depth + 1, max_depth)
+        if sub_result["cost"] == math.inf:
+            craft_cost = math.inf
+            break
+        craft_cost += sub_result["cost"] * amount
+        material_details.append({
+            "id": mat_id,
+            "amount": amount,
+            "price": sub_result["cost"],
+            "subtotal": sub_result["cost"] * amount,
+            "source": sub_result["source"],
+            "sub_materials": sub_result["materials"],
+        })
+
+    if craft_cost < buy_cost:
+        return {"cost": craft_cost, "materials": material_details, "source": "製作"}
+    return {"cost": buy_cost, "materials": [], "source": "購買"}
+
+
+def solve_top_recipe(item_id, recipes, prices, max_depth=10):
+    """
+    [純函式] 頂層物品：每個材料各自求最佳成本，缺貨材料以 0 顯示並標記不可製作。
+    Returns: {"total_cost", "product_price", "profit", "materials"}
+    """
+    total_craft_cost = 0
+    is_craftable = True
+    materials = []
+    for mat_id, amount in recipes.get(item_id, []):
+        sub_result = solve_recipe_costs(mat_id, recipes, prices, set(), 0, max_depth)
+        mat_cost = sub_result["cost"]
+        if mat_cost == math.inf:
+            is_craftable = False
+            mat_cost = 0  # 在UI上顯示為0，但標記為缺貨
+        total_craft_cost += mat_cost * amount
+        materials.append({
+            "id": mat_id,
+            "amount": amount,
+            "price": mat_cost,
+            "subtotal": mat_cost * amount,
+            "source": "缺貨" if sub_result["cost"] == math.inf else sub_result["source"],
+            "sub_materials": sub_result["materials"],
+        })
+
+    final_cost = total_craft_cost if is_craftable else math.inf
+    prod_market_price = prices.get(item_id, 0)
+    final_profit = 0
+    if prod_market_price > 0 and final_cost != math.inf:
+        final_profit = prod_market_price - final_cost
+
+    return {
+        "total_cost": final_cost if final_cost != math.inf else 0,
+        "product_price": prod_market_price,
+        "profit": final_profit,
+        "materials": materials,
+    }
+
+
 class CraftingService:
-    def __init__(self, api, recipe_provider, db_manager):
+    def __init__(self, api, recipe_provider, db_manager, backend=None):
         self.api = api
         self.recipe_provider = recipe_provider
         self.db = db_manager
+        self.backend = backend  # [P5] 可選的 AnalysisBackend（子行程計算）
         self.MAX_RECURSION_DEPTH = 10 # 防止無限遞迴
         self._no_recipe_cache = set()  # [P2] 無配方物品快取
 
     def get_crafting_data(self, item_id, server_dc):
         """
         計算指定物品的製作成本與預期利潤 (包含遞迴成本分析)。
-        此方法負責處理頂層物品，並呼叫遞迴函式來處理子材料。
+        I/O（配方、市價）在此取得，成本計算交給純函式 solve_top_recipe，
+        有 backend 時可在子行程執行，不與 UI 搶 GIL。
         """
         # 1. [P2] 快取檢查
         if item_id in self._no_recipe_cache:
@@ -28,73 +116,37 @@ class CraftingService:
             server_dc = "Japan"  # 預設備案
 
         try:
-            # 2. 遞迴獲取整個製作樹中所有需要的 item ID
+            # 2. 遞迴獲取整個製作樹中所有需要的 item ID 與配方
             all_ids_needed = set()
-            self._get_full_recipe_tree(item_id, all_ids_needed, set())
+            recipes = {}
+            self._get_full_recipe_tree(item_id, all_ids_needed, set(), recipes)
             
             # 3. 一次性批次查詢所有物品的市場價格
             market_data, status_code = self.api.fetch_market_data_batch(server_dc, list(all_ids_needed))
             if status_code != 200:
                 return {"status": "api_error", "code": status_code, "message": f"API 請求失敗 ({status_code})"}
+            prices = {iid: self._get_price_from_market_data(iid, market_data) for iid in all_ids_needed}
 
-            # 4. 建立頂層物品的材料列表
-            total_craft_cost = 0
-            top_level_materials = []
-            is_craftable = True
-
-            for mat in top_recipe["materials"]:
-                mat_id = mat["id"]
-                mat_amount = mat["amount"]
-
-                # 為每個材料遞迴計算其最佳成本
-                sub_result = self._calculate_cost_recursive(mat_id, market_data, set())
-                
-                mat_cost = sub_result["cost"]
-                if mat_cost == math.inf:
-                    is_craftable = False
-                    mat_cost = 0 # 在UI上顯示為0，但標記為缺貨
-
-                total_craft_cost += mat_cost * mat_amount
-
-                mat_name = self.db.get_item_name_by_id(mat_id) or f"Item {mat_id}"
-                
-                source_display = "⚙️ 製作" if sub_result["source"] == "製作" else "✅ 購買"
-                if sub_result["cost"] == math.inf:
-                    source_display = "⚠️ 缺貨"
-
-                details = {
-                    "name": mat_name,
-                    "amount": mat_amount,
-                    "price": mat_cost,
-                    "subtotal": mat_cost * mat_amount,
-                    "status": source_display,
-                    "sub_materials": sub_result.get("materials", [])
-                }
-                top_level_materials.append(details)
-
-            final_cost = total_craft_cost if is_craftable else math.inf
-            
-            # 5. 取得成品市價以計算利潤
-            prod_market_price = self._get_price_from_market_data(item_id, market_data)
-            
-            final_profit = 0
-            if prod_market_price > 0 and final_cost != math.inf:
-                final_profit = prod_market_price - final_cost
+            # 4. 計算成本（純數字），再補上名稱與顯示狀態
+            if self.backend:
+                solved = self.backend.solve_crafting(item_id, recipes, prices, self.MAX_RECURSION_DEPTH)
+            else:
+                solved = solve_top_recipe(item_id, recipes, prices, self.MAX_RECURSION_DEPTH)
 
             return {
                 "status": "success",
-                "total_cost": final_cost if final_cost != math.inf else 0,
-                "product_price": prod_market_price,
-                "profit": final_profit,
-                "materials": top_level_materials
+                "total_cost": solved["total_cost"],
+                "product_price": solved["product_price"],
+                "profit": solved["profit"],
+                "materials": self._decorate_materials(solved["materials"])
             }
 
         except Exception as e:
             logging.error(f"Crafting Service Error: {e}", exc_info=True)
             return {"status": "error", "message": str(e)}
 
-    def _get_full_recipe_tree(self, item_id, all_ids_set, visited_set, depth=0):
-        """遞迴遍歷製作樹，收集所有需要的 Item ID。"""
+    def _get_full_recipe_tree(self, item_id, all_ids_set, visited_set, recipes=None, depth=0):
+        """遞迴遍歷製作樹，收集所有需要的 Item ID（以及各自的配方）。"""
         if item_id in visited_set or depth >= self.MAX_RECURSION_DEPTH:
             return
             
@@ -104,9 +156,11 @@ class CraftingService:
         recipe = self.recipe_provider.get_recipe(item_id)
         if not recipe:
             return
+        if recipes is not None:
+            recipes[item_id] = [(mat["id"], mat["amount"]) for mat in recipe["materials"]]
 
         for mat in recipe["materials"]:
-            self._get_full_recipe_tree(mat["id"], all_ids_set, visited_set, depth + 1)
+            self._get_full_recipe_tree(mat["id"], all_ids_set, visited_set, recipes, depth + 1)
 
     def _get_price_from_market_data(self, item_id, market_data):
         """從已獲取的市場數據中提取物品的最低價。"""
@@ -115,56 +169,19 @@ class CraftingService:
             return item_data["listings"][0]["pricePerUnit"]
         return 0
 
-    def _calculate_cost_recursive(self, item_id, market_data, visited_set, depth=0):
-        """遞迴計算一個物品的最佳成本（製作 vs 購買）。"""
-        if item_id in visited_set or depth >= self.MAX_RECURSION_DEPTH:
-            price = self._get_price_from_market_data(item_id, market_data)
-            return {"cost": price if price > 0 else math.inf, "materials": [], "source": "購買"}
-
-        visited_set.add(item_id)
-
-        buy_cost = self._get_price_from_market_data(item_id, market_data)
-        if buy_cost == 0:
-            buy_cost = math.inf
-
-        recipe = self.recipe_provider.get_recipe(item_id)
-        if not recipe:
-            return {"cost": buy_cost, "materials": [], "source": "購買"}
-
-        craft_cost = 0
-        material_details = []
-        is_craftable = True
-        
-        for mat in recipe["materials"]:
-            sub_result = self._calculate_cost_recursive(mat["id"], market_data, visited_set.copy(), depth + 1)
-            
-            if sub_result["cost"] == math.inf:
-                is_craftable = False
-                break 
-
-            mat_cost = sub_result["cost"]
-            craft_cost += mat_cost * mat["amount"]
-
-            mat_name = self.db.get_item_name_by_id(mat["id"]) or f"Item {mat['id']}"
-            
-            source_display = "⚙️ 製作" if sub_result["source"] == "製作" else "✅ 購買"
-            if sub_result["cost"] == math.inf:
-                 source_display = "⚠️ 缺貨"
-
-            details = {
-                "name": mat_name,
+    def _decorate_materials(self, materials):
+        """將計算結果的 ID / source 轉成 UI 需要的名稱與狀態文字。"""
+        decorated = []
+        for mat in materials:
+            source_display = "⚙️ 製作" if mat["source"] == "製作" else "✅ 購買"
+            if mat["source"] == "缺貨":
+                source_display = "⚠️ 缺貨"
+            decorated.append({
+                "name": self.db.get_item_name_by_id(mat["id"]) or f"Item {mat['id']}",
                 "amount": mat["amount"],
-                "price": mat_cost,
-                "subtotal": mat_cost * mat["amount"],
+                "price": mat["price"],
+                "subtotal": mat["subtotal"],
                 "status": source_display,
-                "sub_materials": sub_result.get("materials", [])
-            }
-            material_details.append(details)
-
-        if not is_craftable:
-            craft_cost = math.inf
-
-        if craft_cost < buy_cost:
-            return {"cost": craft_cost, "materials": material_details, "source": "製作"}
-        else:
-            return {"cost": buy_cost, "materials": [], "source": "購買"}
\ No newline at end of file
+                "sub_materials": self._decorate_materials(mat["sub_materials"])
+            })
+        return decorated
@@ -96,6 +96,35 @@ class DatabaseManager:
                               enabled INTEGER DEFAULT 1,
                               triggered INTEGER DEFAULT 0,
                               created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+
+                # [P5] Hot Scan Cache：(伺服器, 時段, 取樣數) -> 結果 JSON
+                c.execute('''CREATE TABLE IF NOT EXISTS hot_scan_cache
+                             (server TEXT NOT NULL,
+                              hours INTEGER NOT NULL,
+                              sample_size INTEGER NOT NULL,
+                              results TEXT NOT NULL,
+                              fetched_at REAL NOT NULL,
+                              PRIMARY KEY(server, hours, sample_size))''')
+
+                # [P5] Market Index：每個伺服器每個物品一列市場摘要
+                c.execute('''CREATE TABLE IF NOT EXISTS market_index
+                             (server TEXT NOT NULL,
+                              item_id INTEGER NOT NULL,
+                              min_price REAL, min_hq REAL,
+                              avg_sale REAL, avg_sale_hq REAL,
+                              velocity REAL, velocity_hq REAL,
+                              stock REAL, last_upload REAL,
+                              updated_at REAL,
+                              PRIMARY KEY(server, item_id))''')
+
+                # [P5] Listing Churn：每個伺服器每個物品最新一份掛單快照與累計統計（JSON）
+                c.execute('''CREATE TABLE IF NOT EXISTS listing_churn
+                             (server TEXT NOT NULL,
+                              item_id INTEGER NOT NULL,
+                              snapshot TEXT NOT NULL,
+                              uploaded_at REAL NOT NULL,
+                              stats TEXT NOT NULL,
+                              PRIMARY KEY(server, item_id))''')
                 
                 # Ensure default servers exist
                 default_servers = ['伊弗利特', '利維坦', '奧汀', '巴哈姆特', '泰坦', '迦樓羅', '鳳凰', '繁中服']
@@ -480,3 +509,88 @@ class DatabaseManager:
                 conn.commit()
         except Exception as e:
             logging.error(f"Mark alert triggered failed: {e}")
+
+    # --- [P5] Hot Scan Cache ---
+    def save_hot_scan_cache(self, server, hours, sample_size, results, fetched_at):
+        try:
+            with self.get_connection() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO hot_scan_cache (server, hours, sample_size, results, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                    (server, hours, sample_size, json.dumps(results, ensure_ascii=False), fetched_at))
+                conn.commit()
+        except Exception as e:
+            logging.error(f"Save hot scan cache failed: {e}")
+
+    def load_hot_scan_cache(self, cutoff):
+        """回傳 [(server, hours, sample_size, results, fetched_at)]，並刪除 fetched_at 早於 cutoff 的舊資料。"""
+        try:
+            with self.get_connection() as conn:
+                conn.execute("DELETE FROM hot_scan_cache WHERE fetched_at < ?", (cutoff,))
+                rows = conn.execute(
+                    "SELECT server, hours, sample_size, results, fetched_at FROM hot_scan_cache"
+                ).fetchall()
+                conn.commit()
+            return [(r[0], r[1], r[2], json.loads(r[3]), r[4]) for r in rows]
+        except Exception as e:
+            logging.error(f"Load hot scan cache failed: {e}")
+            return []
+
+    def clear_hot_scan_cache(self):
+        try:
+            with self.get_connection() as conn:
+                conn.execute("DELETE FROM hot_scan_cache")
+                conn.commit()
+        except Exception as e:
+            logging.error(f"Clear hot scan cache failed: {e}")
+
+    # --- [P5] Market Index ---
+    def save_market_index_rows(self, server, rows):
+        """rows: [(item_id, (min_price, min_hq, avg_sale, avg_sale_hq, velocity, velocity_hq, stock, last_upload), updated_at)]"""
+        try:
+            with self.get_connection() as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO market_index (server, item_id, min_price, min_hq, avg_sale, avg_sale_hq, "
+                    "velocity, velocity_hq, stock, last_upload, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(server, item_id, *values, updated_at) for item_id, values, updated_at in rows])
+                conn.commit()
+        except Exception as e:
+            logging.error(f"Save market index failed: {e}")
+
+    def save_listing_churn_rows(self, rows):
+        """rows: [(server, item_id, snapshot dict, uploaded_at, stats dict)]"""
+        try:
+            with self.get_connection() as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO listing_churn (server, item_id, snapshot, uploaded_at, stats) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [(server, item_id, json.dumps(snapshot), uploaded_at, json.dumps(stats))
+                     for server, item_id, snapshot, uploaded_at, stats in rows])
+                conn.commit()
+        except Exception as e:
+            logging.error(f"Save listing churn failed: {e}")
+
+    def load_listing_churn(self, server, item_id):
+        """回傳 (snapshot dict, uploaded_at, stats dict)；沒有紀錄時回傳 None"""
+        try:
+            with self.get_connection() as conn:
+                row = conn.execute(
+                    "SELECT snapshot, uploaded_at, stats FROM listing_churn WHERE server = ? AND item_id = ?",
+                    (server, item_id)).fetchone()
+            if not row:
+                return None
+            return json.loads(row[0]), row[1], json.loads(row[2])
+        except Exception as e:
+            logging.error(f"Load listing churn failed: {e}")
+            return None
+
+    def load_market_index(self, server):
+        """回傳 [(item_id, values tuple, updated_at)]"""
+        try:
+            with self.get_connection() as conn:
+                rows = conn.execute(
+                    "SELECT item_id, min_price, min_hq, avg_sale, avg_sale_hq, velocity, velocity_hq, stock, "
+                    "last_upload, updated_at FROM market_index WHERE server = ?", (server,)).fetchall()
+            return [(r[0], tuple(r[1:9]), r[9]) for r in rows]
+        except Exception as e:
+            logging.error(f"Load market index failed: {e}")
+            return []
@@ -0,0 +1,78 @@
+"""
+市場熱賣結果快取 (Hot Scan Cache)
+=============================
+以 (伺服器, 分析時段, 取樣數) 為鍵保存多組掃描結果：
+
+- 記憶體 + SQLite 兩層，重新開啟程式後仍可立即顯示上次的結果
+- 超過 TTL 的結果仍可顯示（標示為舊資料），同時在背景重新掃描
+- 最近被查看過的組合會在到期前由排程器於背景預先更新（keys_due）
+"""
+
+import threading
+import time
+
+
+class HotScanCache:
+    """
+    db: DatabaseManager（可為 None，僅使用記憶體）
+    ttl: 結果視為新鮮的秒數
+    max_age: 超過此秒數的結果不再載入 / 顯示
+    warm_window: 最近多少秒內被查看過的組合才會在背景預先更新
+    """
+
+    def __init__(self, db=None, ttl=300, max_age=24 * 3600, warm_window=1800):
+        self.db = db
+        self.ttl = ttl
+        self.max_age = max_age
+        self.warm_window = warm_window
+        self._lock = threading.Lock()
+        self._entries = {}       # key -> (results, fetched_at)
+        self._last_access = {}   # key -> time.time()
+        self._load()
+
+    @staticmethod
+    def make_key(server, hours, sample_size):
+        return (server, int(hours), int(sample_size))
+
+    def _load(self):
+        if not self.db:
+            return
+        for server, hours, sample_size, results, fetched_at in self.db.load_hot_scan_cache(time.time() - self.max_age):
+            self._entries[self.make_key(server, hours, sample_size)] = (results, fetched_at)
+
+    def get(self, key):
+        """回傳 (results, fetched_at) 或 None；同時記錄此組合最近被查看。"""
+        with self._lock:
+            self._last_access[key] = time.time()
+            entry = self._entries.get(key)
+        if entry and time.time() - entry[1] > self.max_age:
+            return None
+        return entry
+
+    def is_fresh(self, entry):
+        return bool(entry) and (time.time() - entry[1]) < self.ttl
+
+    def put(self, key, results, fetched_at=None):
+        fetched_at = fetched_at or time.time()
+        with self._lock:
+            self._entries[key] = (results, fetched_at)
+            self._last_access.setdefault(key, fetched_at)
+        if self.db:
+            self.db.save_hot_scan_cache(*key, results, fetched_at)
+
+    def keys_due(self, refresh_before=60):
+        """最近被查看過、且將在 refresh_before 秒內過期（或已過期）的組合。"""
+        now = time.time()
+        with self._lock:
+            return [
+                key for key, (_, fetched_at) in self._entries.items()
+                if now - self._last_access.get(key, 0) < self.warm_window
+                and now - fetched_at >= self.ttl - refresh_before
+            ]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._last_access.clear()
+        if self.db:
+            self.db.clear_hot_scan_cache()
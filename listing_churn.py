@@ -0,0 +1,203 @@
+"""
+掛單流動追蹤 (Listing Churn)
+=============================
+每次收到含 listingID 的市場資料，就與同一 (伺服器, 物品) 的上一份快照比對：
+
+- 新增的 listingID 若低於上一份快照同品質的最低價 → 一次削價；既有掛單降價到最低價以下也算
+- 消失的 listingID 若對得上兩份快照之間的成交紀錄（單價 / 數量 / HQ）→ 售出，否則 → 下架
+- 首次出現時間記在快照中，掛單消失時累計存活時間
+
+比對只需兩個 listingID 集合的差集；快照與累計統計保存在 SQLite，
+重新開啟程式後仍延續。寫入先暫存在記憶體，由排程器定期一次寫回（flush）；
+寫回後已超過 MAX_SNAPSHOT_GAP 的快照（或超過 MAX_TRACKED 的最舊快照）移出記憶體。
+"""
+
+import logging
+import threading
+import time
+
+MAX_SNAPSHOT_GAP = 6 * 3600   # 兩份快照相隔超過此秒數時不比對，只重設基準（中間的變化無法歸因）
+MAX_TRACKED = 2000            # 記憶體中最多保留的物品數；已寫回的舊快照在 flush 後移出，需要時再從資料庫載入
+
+
+def _ts(value):
+    value = value or 0
+    return value / 1000 if value > 2000000000 else value
+
+
+def _new_stats(now):
+    return {"since": now, "observed": 0.0, "snapshots": 1, "added": 0, "undercuts": 0,
+            "removed": 0, "sold": 0, "delisted": 0, "lifetime_total": 0.0, "lifetime_count": 0}
+
+
+def summarize(stats):
+    """
+    累計統計 -> 顯示用指標：
+    undercuts_per_day: 每日被削價次數；avg_lifetime_hours: 掛單平均存活時數；
+    delist_rate: 消失的掛單中非售出（下架 / 改價重掛）的比例
+    """
+    if not stats:
+        return None
+    observed_days = stats["observed"] / 86400.0
+    classified = stats["sold"] + stats["delisted"]
+    return {
+        "snapshots": stats["snapshots"],
+        "observed_hours": stats["observed"] / 3600.0,
+        "undercuts_per_day": stats["undercuts"] / observed_days if observed_days > 0 else None,
+        "avg_lifetime_hours": (stats["lifetime_total"] / stats["lifetime_count"] / 3600.0
+                               if stats["lifetime_count"] else None),
+        "delist_rate": stats["delisted"] / classified if classified else None,
+    }
+
+
+class ListingTracker:
+    """db: DatabaseManager（可為 None，僅保存在記憶體）"""
+
+    def __init__(self, db=None):
+        self.db = db
+        self._lock = threading.Lock()
+        self._state = {}    # (server, item_id) -> {"snapshot", "uploaded_at", "stats"}
+        self._dirty = set()
+
+    def _current(self, key):
+        """
+        目前的 state：記憶體中有就直接回傳，否則從資料庫載入（不放入記憶體）。
+        資料庫查詢不持有鎖，避免 SQLite 阻擋其他執行緒；沒有紀錄時回傳 None。
+        """
+        with self._lock:
+            state = self._state.get(key)
+        if state is None and self.db:
+            row = self.db.load_listing_churn(*key)
+            if row:
+                snapshot, uploaded_at, stats = row
+                state = {"snapshot": snapshot, "uploaded_at": uploaded_at, "stats": stats}
+        return state
+
+    def observe(self, server, item_id, item_data):
+        """
+        以一份市場資料更新快照與統計（MarketAPI payload hook 使用，任意執行緒）。
+        沒有 listingID 的精簡資料（警報 / 索引查詢）或與上一份相同的資料直接略過。
+        """
+        listings = item_data.get("listings")
+        if not listings or "listingID" not in listings[0]:
+            return
+        try:
+            key = (server, int(item_id))
+        except (TypeError, ValueError):
+            return
+        uploaded_at = _ts(item_data.get("lastUploadTime")) or time.time()
+        current = {str(l["listingID"]): [l.get("pricePerUnit", 0), l.get("quantity", 0), bool(l.get("hq"))]
+                   for l in listings if l.get("listingID") is not None}
+
+        known = self._current(key)
+        with self._lock:
+            # 查詢資料庫期間其他執行緒可能已更新此物品，以記憶體中的為準
+            state = self._state.setdefault(key, known) if known else self._state.get(key)
+            if state and uploaded_at <= state["uploaded_at"]:
+                return
+            if state is None or uploaded_at - state["uploaded_at"] > MAX_SNAPSHOT_GAP:
+                stats = state["stats"] if state else _new_stats(uploaded_at)
+                snapshot = {lid: values + [None] for lid, values in current.items()}
+            else:
+                stats = state["stats"]
+                snapshot = self._diff(state, current, uploaded_at, item_data.get("recentHistory"))
+                stats["observed"] += uploaded_at - state["uploaded_at"]
+                stats["snapshots"] += 1
+            self._state[key] = {"snapshot": snapshot, "uploaded_at": uploaded_at, "stats": stats}
+            self._dirty.add(key)
+
+    @staticmethod
+    def _diff(state, current, uploaded_at, history):
+        """比對上一份快照，更新 state["stats"]，回傳新的快照。"""
+        previous = state["snapshot"]
+        stats = state["stats"]
+        prev_uploaded = state["uploaded_at"]
+        # 消失時間取兩份快照的中點
+        seen_at = (prev_uploaded + uploaded_at) / 2
+
+        prev_min = {}
+        for price, _, hq, _ in previous.values():
+            if price > 0 and (hq not in prev_min or price < prev_min[hq]):
+                prev_min[hq] = price
+
+        snapshot = {}
+        for lid, (price, qty, hq) in current.items():
+            old = previous.get(lid)
+            floor = prev_min.get(hq)
+            if old is None:
+                stats["added"] += 1
+                if floor is not None and price < floor:
+                    stats["undercuts"] += 1
+                snapshot[lid] = [price, qty, hq, seen_at]
+            else:
+                # 既有掛單改價到原最低價以下，同樣視為削價
+                if price < old[0] and floor is not None and price < floor:
+                    stats["undercuts"] += 1
+                snapshot[lid] = [price, qty, hq, old[3]]
+
+        removed = previous.keys() - current.keys()
+        if not removed:
+            return snapshot
+
+        # 兩份快照之間的成交：(單價, 數量, HQ) -> 筆數
+        sales = None
+        if history is not None:
+            sales = {}
+            for h in history:
+                if prev_uploaded - 60 <= _ts(h.get("timestamp")) <= uploaded_at + 60:
+                    sale = (h.get("pricePerUnit", 0), h.get("quantity", 0), bool(h.get("hq")))
+                    sales[sale] = sales.get(sale, 0) + 1
+
+        for lid in removed:
+            price, qty, hq, first_seen = previous[lid]
+            stats["removed"] += 1
+            if first_seen is not None:
+                stats["lifetime_total"] += seen_at - first_seen
+                stats["lifetime_count"] += 1
+            if sales is None:
+                continue
+            if sales.get((price, qty, hq)):
+                sales[(price, qty, hq)] -= 1
+                stats["sold"] += 1
+            else:
+                stats["delisted"] += 1
+        return snapshot
+
+    def stats(self, server, item_id):
+        """回傳 summarize() 後的指標；沒有紀錄時回傳 None。"""
+        state = self._current((server, int(item_id)))
+        if not state:
+            return None
+        with self._lock:
+            return summarize(state["stats"])
+
+    def flush(self):
+        """將有變動的快照一次寫回資料庫（排程器定期呼叫），之後移出閒置的快照。"""
+        with self._lock:
+            rows = []
+            for server, item_id in self._dirty:
+                state = self._state[(server, item_id)]
+                rows.append((server, item_id, state["snapshot"], state["uploaded_at"], dict(state["stats"])))
+            self._dirty.clear()
+        if self.db and rows:
+            self.db.save_listing_churn_rows(rows)
+            logging.debug(f"[掛單流動] 寫回 {len(rows)} 個物品的快照")
+        if self.db:
+            self._evict(time.time())
+
+    def _evict(self, now):
+        """
+        移出已寫回（非 dirty）的快照：超過 MAX_SNAPSHOT_GAP 的下次收到資料時本來就只會重設基準；
+        仍超過 MAX_TRACKED 時再依上傳時間由舊到新移出。需要時 _load 會從資料庫讀回。
+        """
+        with self._lock:
+            clean = [(state["uploaded_at"], key) for key, state in self._state.items() if key not in self._dirty]
+            evict = [key for uploaded_at, key in clean if now - uploaded_at > MAX_SNAPSHOT_GAP]
+            excess = len(self._state) - len(evict) - MAX_TRACKED
+            if excess > 0:
+                clean = sorted(item for item in clean if now - item[0] <= MAX_SNAPSHOT_GAP)
+                evict.extend(key for _, key in clean[:excess])
+            for key in evict:
+                del self._state[key]
+        if evict:
+            logging.debug(f"[掛單流動] 移出 {len(evict)} 個閒置快照，記憶體中保留 {len(self._state)} 個")
@@ -5,6 +5,21 @@ import logging
 from datetime import datetime
 import time
 
+from rate_limiter import TokenBucket
+from sales_index import SalesIndex
+from sniping import best_snipe_listings, is_worth_sniping
+
+UNIVERSALIS_RATE = 15.0   # Universalis 每秒請求數上限（所有掃描 / 伺服器共用）
+
+# [P5] 市場熱賣一次計算的所有時段（小時）；切換時段只需重新排序
+HOT_WINDOWS = (24, 48, 72, 168)
+HOT_SPAN_HOURS = max(HOT_WINDOWS)
+
+# [P5] 記憶在 payload dict 上的分析中間結果
+PARTITION_KEY = "_partitions"       # {"all" / "hq" / "nq": (已排序上架, 已排序歷史)}
+METRICS_MEMO_KEY = "_metricsByView"  # {"all" / "hq" / "nq": 分析結果}
+
+
 class MarketAPI:
     def __init__(self):
         self.headers = {
@@ -32,6 +47,33 @@ class MarketAPI:
         self._search_cache = {}   # key: query -> (results, timestamp)
         self._cache_ttl = 180     # 快取有效期：3 分鐘
 
+        # [P5] 共用限速預算：多伺服器同時掃描時，總請求速率仍不超過上限
+        self.rate_limiter = TokenBucket(rate=UNIVERSALIS_RATE, capacity=UNIVERSALIS_RATE)
+
+        # [P5] 每收到一筆新的市場資料就呼叫 hook(server, item_id, data)，例如即時檢查價格警報
+        self._payload_hooks = []
+
+    def add_payload_hook(self, fn):
+        self._payload_hooks.append(fn)
+
+    def _notify_payload(self, server, item_id, data):
+        """hook 失敗只記錄，不影響原本的查詢。"""
+        for hook in self._payload_hooks:
+            try:
+                hook(server, item_id, data)
+            except Exception as e:
+                logging.debug(f"Payload hook failed for {server}:{item_id}: {e}")
+
+    def _universalis_get(self, url, timeout):
+        """所有 Universalis 請求的入口：先取得限速 token，收到 429 時全域降速。"""
+        self.rate_limiter.acquire()
+        resp = self.session.get(url, timeout=timeout)
+        if resp.status_code == 429:
+            self.rate_limiter.penalize(pause_seconds=2.0)
+        else:
+            self.rate_limiter.reward()
+        return resp
+
     def search_item_web(self, query):
         """Searches for an item using Cafemaker API (with cache)."""
         # [P1] 檢查快取
@@ -79,19 +121,53 @@ class MarketAPI:
 
         url = f"https://universalis.app/api/v2/{server}/{item_id}?entries=500"
         try:
-            resp = self.session.get(url, timeout=15)
+            resp = self._universalis_get(url, timeout=15)
             if resp.status_code == 404:
                 return None, 404
             if resp.status_code != 200:
                 logging.error(f"Universalis API Error: {resp.status_code}")
                 return None, resp.status_code
             data = resp.json()
+            SalesIndex.for_item(data)  # [P5] 收到資料時建立一次銷售累積索引
+            DataAnalyzer.partition_payload(data)  # [P5] 與 HQ / NQ 分區
             self._market_cache[cache_key] = (data, time.time())
+            self._notify_payload(server, item_id, data)
             return data, 200
         except Exception as e:
             logging.error(f"Fetch market data failed: {e}")
             raise e
 
+    def fetch_last_upload_time(self, server, item_id):
+        """
+        [P5] 輕量新鮮度探測：只取 lastUploadTime（毫秒），不含上架與歷史。
+        回傳 None 表示查詢失敗，呼叫端應視為「可能有變化」。
+        """
+        url = (f"https://universalis.app/api/v2/{server}/{item_id}"
+               f"?listings=0&entries=0&fields=lastUploadTime")
+        try:
+            resp = self._universalis_get(url, timeout=10)
+            if resp.status_code != 200:
+                return None
+            return resp.json().get("lastUploadTime")
+        except Exception as e:
+            logging.debug(f"Freshness probe failed for {server}:{item_id}: {e}")
+            return None
+
+    def invalidate_market_cache(self, server, item_id):
+        """資料已確定更新時，丟棄單品快取，讓下一次查詢直接向 API 取得。"""
+        self._market_cache.pop(f"{server}:{item_id}", None)
+
+    def fetch_marketable_items(self):
+        """[P5] 取得所有可在市場板交易的物品 ID（Universalis /marketable）。"""
+        try:
+            resp = self._universalis_get("https://universalis.app/api/v2/marketable", timeout=15)
+            if resp.status_code == 200:
+                return resp.json()
+            logging.error(f"Marketable items fetch failed: {resp.status_code}")
+        except Exception as e:
+            logging.error(f"Fetch marketable items failed: {e}")
+        return []
+
     
     def fetch_recently_updated_items(self, server, entries=50):
         """
@@ -101,7 +177,7 @@ class MarketAPI:
         """
         url = f"https://universalis.app/api/v2/extra/stats/most-recently-updated?world={server}&entries={entries}"
         try:
-            resp = self.session.get(url, timeout=10)
+            resp = self._universalis_get(url, timeout=10)
             if resp.status_code == 200:
                 data = resp.json()
                 raw_items = data.get("items", [])
@@ -123,51 +199,69 @@ class MarketAPI:
             logging.error(f"Fetch recently updated items failed: {e}")
             return []
 
-    def fetch_market_data_batch(self, server, item_ids):
+    def fetch_market_data_batch(self, server, item_ids, token=None):
         """
         Fetches market data for multiple items by batching requests to avoid URL length limits.
         Returns a dictionary mapping ItemID to its market data.
+        token: 取消旗標，每批之間檢查；取消時回傳已抓到的部分
         """
-        if not item_ids:
-            return {}, 200
-
         all_items_data = {}
-        batch_size = 50  # Universalis can handle up to 100 IDs per request
+        for _, batch_data in self.iter_market_data_batches(server, item_ids):
+            all_items_data.update(batch_data)
+            if token and token.cancelled:
+                break
+        return all_items_data, 200
+
+    def iter_market_data_batches(self, server, item_ids, batch_size=50, query="entries=500", fields=None):
+        """
+        [Streaming] 逐批抓取市場資料，每完成一批就 yield (batch_ids, {item_id_str: data})。
+        失敗的批次 yield 空 dict，呼叫端仍可更新進度；可隨時停止迭代。
+
+        query / fields 可縮小回應內容（例如警報只需要最低價），
+        fields 以單一物品的欄位名稱指定，多物品批次會自動加上 "items." 前綴。
+        """
         item_ids_str = [str(i) for i in item_ids]
 
         for i in range(0, len(item_ids_str), batch_size):
             batch_ids = item_ids_str[i:i + batch_size]
             ids_str = ",".join(batch_ids)
-            url = f"https://universalis.app/api/v2/{server}/{ids_str}?entries=500"
+            url = f"https://universalis.app/api/v2/{server}/{ids_str}?{query}"
+            if fields:
+                prefix = "items." if len(batch_ids) > 1 else ""
+                url += "&fields=" + ",".join(prefix + f for f in fields)
             
             logging.info(f"Fetching batch {i//batch_size + 1}, IDs: {len(batch_ids)}")
+            batch_data = {}
 
             try:
-                resp = self.session.get(url, timeout=20)
+                resp = self._universalis_get(url, timeout=20)
                 if resp.status_code != 200:
                     logging.error(f"Universalis Batch Error: {resp.status_code} for IDs {ids_str}")
-                    # Skip this batch on error, or handle as needed
-                    continue
-                
-                data = resp.json()
-                
-                # Case 1: Multiple items -> data["items"] is a dict
-                if "items" in data:
-                    all_items_data.update(data["items"])
-                # Case 2: Single item in response (for a batch of one)
-                elif "itemID" in data:
-                    all_items_data[str(data["itemID"])] = data
-                # Should not be here if asking for multiple, but safe to handle
-
-                time.sleep(0.3) # Gentle rate limit
+                else:
+                    data = resp.json()
+                    
+                    # Case 1: Multiple items -> data["items"] is a dict
+                    if "items" in data:
+                        batch_data = data["items"]
+                    # Case 2: Single item in response (for a batch of one)
+                    elif "itemID" in data:
+                        batch_data = {str(data["itemID"]): data}
+                    # Should not be here if asking for multiple, but safe to handle
+
+                    for item_id, item_data in batch_data.items():
+                        if "recentHistory" in item_data:
+                            SalesIndex.for_item(item_data)
+                        self._notify_payload(server, item_id, item_data)
 
             except Exception as e:
                 logging.error(f"Batch fetch for IDs {ids_str} failed: {e}")
-                continue # Move to the next batch
 
-        return all_items_data, 200
+            yield batch_ids, batch_data
+
+            if i + batch_size < len(item_ids_str):
+                time.sleep(0.3) # Gentle rate limit
 
-    def fetch_hot_items(self, server, sample_size=200, analysis_hours=24, progress_callback=None):
+    def fetch_hot_items(self, server, sample_size=200, analysis_hours=24, progress_callback=None, token=None):
         """
         市場熱賣掃描策略：
         1. 取得最近被更新的物品 ID（活躍交易指標）
@@ -180,9 +274,11 @@ class MarketAPI:
             sample_size: 取樣數量（最近更新物品數）
             analysis_hours: 分析時間範圍（小時）
             progress_callback: 進度回呼 fn(float 0~1)
+            token: 取消旗標，每個步驟與每批請求之間檢查；取消時回傳 ([], "掃描已取消")
 
         Returns:
-            (results_list, error_msg) - results 按銷售速度降序排列
+            (results_list, error_msg) - results 按 analysis_hours 的銷售速度降序排列；
+            每列的 "windows" 含所有 HOT_WINDOWS 時段，可用 rank_hot_window 直接改排其他時段
         """
         try:
             # Step 1: 取得最近被更新的物品 ID
@@ -191,6 +287,8 @@ class MarketAPI:
             logging.info(f"[市場熱賣] 正在取得最近 {sample_size} 個活躍物品 ID...")
             
             item_ids = self.fetch_recently_updated_items(server, entries=sample_size)
+            if token and token.cancelled:
+                return [], "掃描已取消"
             
             if not item_ids:
                 return [], "無法取得最近更新的物品清單，請確認伺服器名稱是否正確"
@@ -200,7 +298,9 @@ class MarketAPI:
                 progress_callback(0.2)
             
             # Step 2: 批量查詢市場資料
-            data_map, status = self.fetch_market_data_batch(server, item_ids)
+            data_map, status = self.fetch_market_data_batch(server, item_ids, token)
+            if token and token.cancelled:
+                return [], "掃描已取消"
             
             if status != 200 or not data_map:
                 return [], f"批量查詢失敗 (HTTP {status})"
@@ -209,52 +309,37 @@ class MarketAPI:
             if progress_callback:
                 progress_callback(0.7)
             
-            # Step 3: 過濾 + 計算銷售速度
+            # Step 3: 過濾 + 每個物品的銷售紀錄只分桶一次，同時算出所有時段
             results = []
             raw_list = list(data_map.values())
             cleaned_list = DataAnalyzer.clean_market_data(raw_list, min_price_threshold=300)
+            now_ts = datetime.now().timestamp()
+            all_windows = tuple(sorted(set(HOT_WINDOWS) | {analysis_hours}))
             
             for item_data in cleaned_list:
-                item_id = item_data.get("itemID")
-                history = item_data.get("recentHistory", [])
+                windows, trend, accel = DataAnalyzer.hot_windows(SalesIndex.for_item(item_data), now_ts, all_windows)
                 
-                # 計算指定時間內的銷售數量
-                sold_count, _ = DataAnalyzer.calculate_velocity_in_timeframe(history, analysis_hours)
-                
-                # 計算日均銷售速度
-                if analysis_hours >= 24:
-                    heat_val = sold_count / (analysis_hours / 24.0)
-                else:
-                    heat_val = sold_count  # 小時級別直接顯示數量
-                
-                # 跳過完全沒銷售的物品
-                if sold_count == 0:
+                # 跳過整個觀察期間完全沒銷售的物品
+                if windows[all_windows[-1]]["sold"] == 0:
                     continue
                 
                 # 取得價格資訊
-                min_price = item_data.get("minPrice", 0)
                 listings = item_data.get("listings", [])
                 current_stock = len(listings)
                 avg_price = int(sum(l["pricePerUnit"] for l in listings) / current_stock) if current_stock else 0
                 
-                # 計算交易筆數（用於排名參考）
-                now_ts = datetime.now().timestamp()
-                cutoff = now_ts - (analysis_hours * 3600)
-                tx_count = len([h for h in history if h.get("timestamp", 0) > cutoff])
-                
                 results.append({
-                    "id": item_id,
-                    "name": str(item_id),  # 稍後由 UI 層替換為中文名
-                    "heat": heat_val,       # 銷售速度（個/日 or 個/Nh）
-                    "sold": sold_count,     # 時段內總銷售數
-                    "tx_count": tx_count,   # 交易筆數
+                    "id": item_data.get("itemID"),
+                    "name": str(item_data.get("itemID")),  # 稍後由 UI 層替換為中文名
+                    "windows": windows,     # {時段: {"heat", "sold", "tx_count"}}
+                    "trend": trend,         # 近 24h 銷量 / 前 6 日日均（None = 無基準）
+                    "accel": accel,         # 銷量加速度（個/日²）
                     "avg": avg_price,       # 當前掛單均價
-                    "min": min_price,       # 最低價
+                    "min": item_data.get("minPrice", 0),  # 最低價
                     "stock": current_stock  # 庫存數
                 })
             
-            # Step 4: 排序（銷售速度降序，同速度按交易筆數降序）
-            results.sort(key=lambda x: (x["heat"], x["tx_count"]), reverse=True)
+            results = DataAnalyzer.rank_hot_window(results, analysis_hours)
             
             if progress_callback:
                 progress_callback(1.0)
@@ -268,16 +353,88 @@ class MarketAPI:
 
 
 class DataAnalyzer:
+    # [P5] 指標依設定鍵分組：設定變更時只重算依賴到變更鍵的組別，不重新整理原始資料
+    # 依賴已包含上游指標（例如去化天數用到銷售速度，因此也依賴 velocity_days）；順序即計算順序
+    METRIC_STAGES = ("velocity", "avg_price", "stock", "worlds", "profit", "arbitrage", "sniping", "stacks")
+    METRIC_DEPENDENCIES = {
+        "velocity": ("velocity_days",),
+        "avg_price": ("avg_price_entries", "avg_price_days_limit"),
+        "stock": ("velocity_days",),
+        "worlds": ("velocity_days",),
+        "profit": ("market_tax_rate", "avg_price_entries", "avg_price_days_limit"),
+        "arbitrage": ("market_tax_rate", "velocity_days"),
+        "sniping": ("market_tax_rate", "sniping_min_profit", "avg_price_entries", "avg_price_days_limit"),
+        "stacks": (),
+    }
+    METRIC_CONFIG_DEFAULTS = {
+        "velocity_days": 7, "avg_price_entries": 20, "avg_price_days_limit": 30,
+        "market_tax_rate": 5, "sniping_min_profit": 2000,
+    }
+
     @staticmethod
-    def calculate_metrics(data, config, hq_only=False):
-        # 1. Configuration & Initial Setup
-        velocity_days = max(1, config.get("velocity_days", 7))
-        avg_entries = config.get("avg_price_entries", 20)
-        
-        # [Phase 2 Configs]
-        avg_price_days_limit = config.get("avg_price_days_limit", 30)
-        tax_rate = config.get("market_tax_rate", 5) / 100.0
-        sniping_threshold = config.get("sniping_min_profit", 2000)
+    def metric_config(config):
+        """分析實際使用的設定值（記錄在分析結果的 _config，供之後比對變更）。"""
+        return {key: config.get(key, default) for key, default in DataAnalyzer.METRIC_CONFIG_DEFAULTS.items()}
+
+    @staticmethod
+    def affected_stages(changed_keys):
+        changed_keys = set(changed_keys)
+        return [stage for stage in DataAnalyzer.METRIC_STAGES
+                if changed_keys.intersection(DataAnalyzer.METRIC_DEPENDENCIES[stage])]
+
+    # 檢視 -> SalesIndex 的 hq 參數
+    VIEW_HQ = {"all": None, "hq": True, "nq": False}
+
+    @staticmethod
+    def calculate_metrics(data, config, hq_only=False, view=None):
+        """view: all / hq / nq；未指定時依 hq_only 決定。"""
+        view = view or ("hq" if hq_only else "all")
+        cfg = DataAnalyzer.metric_config(config)
+        context = DataAnalyzer._prepare_metrics(data, view)
+        if context is None:
+            metrics = DataAnalyzer._empty_metrics()
+            metrics["_config"] = cfg
+            return metrics
+
+        metrics = {}
+        for stage in DataAnalyzer.METRIC_STAGES:
+            metrics.update(getattr(DataAnalyzer, f"_metrics_{stage}")(context, cfg, metrics))
+        metrics["merged_listings"] = context["listings"]
+        metrics["merged_history"] = context["history"]
+        metrics["_context"] = context
+        metrics["_config"] = cfg
+        return metrics
+
+    @staticmethod
+    def recompute_metrics(analysis, config):
+        """
+        [P5] 設定變更後只重算受影響的指標組，沿用已整理好的上架 / 歷史資料。
+        Return: (新的分析結果, 重算的組別)；沒有組別受影響時回傳原結果。
+        """
+        context = analysis.get("_context") if analysis else None
+        if context is None:
+            return analysis, []
+        cfg = DataAnalyzer.metric_config(config)
+        old_cfg = analysis.get("_config", {})
+        stages = DataAnalyzer.affected_stages(k for k, v in cfg.items() if old_cfg.get(k) != v)
+        if not stages:
+            return analysis, []
+
+        metrics = dict(analysis)
+        for stage in stages:
+            metrics.update(getattr(DataAnalyzer, f"_metrics_{stage}")(context, cfg, metrics))
+        metrics["_config"] = cfg
+        return metrics, stages
+
+    @staticmethod
+    def partition_payload(data):
+        """
+        [P5] 將上架 / 歷史攤平並各排序一次，再依 HQ / NQ 拆分（拆分後維持排序）。
+        結果記憶在 payload 上，切換 HQ 顯示時不需重新篩選與排序。
+        """
+        parts = data.get(PARTITION_KEY)
+        if parts is not None:
+            return parts
 
         listings = []
         history = []
@@ -288,47 +445,106 @@ class DataAnalyzer:
                 listings.extend(item_data.get("listings", []))
                 history.extend(item_data.get("recentHistory", []))
         else:
-            listings = data.get("listings", [])
-            history = data.get("recentHistory", [])
-
-        # --- 1. STRICT HQ/NQ FILTERING (GLOBAL) ---
-        if hq_only:
-            listings = [l for l in listings if l.get("hq")]
-            history = [h for h in history if h.get("hq")]
+            listings = list(data.get("listings", []))
+            history = list(data.get("recentHistory", []))
 
         listings.sort(key=lambda x: x.get("pricePerUnit", 0))
         history.sort(key=lambda x: x.get("timestamp", 0), reverse=True)
 
+        hq_listings, nq_listings, hq_history, nq_history = [], [], [], []
+        for l in listings:
+            (hq_listings if l.get("hq") else nq_listings).append(l)
+        for h in history:
+            (hq_history if h.get("hq") else nq_history).append(h)
+
+        parts = {"all": (listings, history), "hq": (hq_listings, hq_history), "nq": (nq_listings, nq_history)}
+        data[PARTITION_KEY] = parts
+        return parts
+
+    @staticmethod
+    def metrics_for_view(data, config, view="all"):
+        """
+        [P5] 取得某個檢視（all / hq / nq）的分析結果，記憶在 payload 上。
+        已算過的檢視直接回傳；設定變更過則只重算受影響的指標組。
+        """
+        memo = data.setdefault(METRICS_MEMO_KEY, {})
+        analysis = memo.get(view)
+        if analysis is None:
+            analysis = DataAnalyzer.calculate_metrics(data, config, view=view)
+        else:
+            analysis, _ = DataAnalyzer.recompute_metrics(analysis, config)
+        memo[view] = analysis
+        return analysis
+
+    @staticmethod
+    def cached_metrics(data, config, view="all"):
+        """已記憶且設定未變更的分析結果；沒有時回傳 None（不計算）。"""
+        analysis = data.get(METRICS_MEMO_KEY, {}).get(view)
+        if analysis is None or analysis.get("_config") != DataAnalyzer.metric_config(config):
+            return None
+        return analysis
+
+    @staticmethod
+    def _prepare_metrics(data, view="all"):
+        """取出已排序的分區並分離異常值（與設定無關，每個檢視只做一次）。"""
+        listings, history = DataAnalyzer.partition_payload(data)[view]
+
         if not history and not listings:
-            return DataAnalyzer._empty_metrics()
-        
-        # Define current time once
-        now_ts = datetime.now().timestamp()
+            return None
 
-        # --- 2. VELOCITY & OUTLIER REMOVAL ---
+        # --- 2. OUTLIER REMOVAL ---
         valid_history = [h for h in history if h.get("pricePerUnit", 0) > 0]
+        outliers = []
         
         if valid_history:
             prices = sorted([h['pricePerUnit'] for h in valid_history])
             median_price = prices[len(prices)//2]
-            valid_history = [
-                h for h in valid_history 
-                if 0.1 * median_price <= h['pricePerUnit'] <= 10 * median_price
-            ]
-        
-        check_days_ago = now_ts - (velocity_days * 24 * 3600)
-        recent_sales = [h for h in valid_history if h['timestamp'] > check_days_ago]
-        
-        total_quantity_sold = sum(h['quantity'] for h in recent_sales)
-        total_tx_sold = len(recent_sales)
+            in_band = []
+            for h in valid_history:
+                if 0.1 * median_price <= h['pricePerUnit'] <= 10 * median_price:
+                    in_band.append(h)
+                else:
+                    outliers.append(h)
+            valid_history = in_band
+
+        return {
+            "listings": listings,
+            "history": history,
+            "valid_history": valid_history,
+            "outliers": outliers,
+            "index": SalesIndex.for_item(data),
+            "view": view,
+            # 同一份資料的所有指標都以同一個時間點計算
+            "now_ts": datetime.now().timestamp(),
+        }
+
+    @staticmethod
+    def _metrics_velocity(context, cfg, metrics):
+        # [P5] 銷量取自收到資料時建立的累積索引，再扣掉落在時段內的異常值
+        velocity_days = max(1, cfg["velocity_days"])
+        velocity_hours = velocity_days * 24
+        index, now_ts = context["index"], context["now_ts"]
+        total_quantity_sold, total_tx_sold = index.window(
+            velocity_hours, hq=DataAnalyzer.VIEW_HQ[context["view"]], now_ts=now_ts)
+        for h in context["outliers"]:
+            if index.in_window(h['timestamp'], velocity_hours, now_ts):
+                total_quantity_sold -= h['quantity']
+                total_tx_sold -= 1
         
-        velocity_items = total_quantity_sold / float(velocity_days)
-        velocity_tx = total_tx_sold / float(velocity_days)
+        return {
+            "velocity": total_quantity_sold / float(velocity_days),
+            "velocity_tx": total_tx_sold / float(velocity_days),
+        }
 
+    @staticmethod
+    def _metrics_avg_price(context, cfg, metrics):
         # --- 3. AVERAGE PRICE (3-STAGE FALLBACK) ---
+        valid_history = context["valid_history"]
+        listings = context["listings"]
+
         # Stage 1: Recent Valid History (within N days)
-        avg_price_cutoff = now_ts - (avg_price_days_limit * 24 * 3600)
-        recent_avg_candidates = [h for h in valid_history if h['timestamp'] > avg_price_cutoff][:avg_entries]
+        avg_price_cutoff = context["now_ts"] - (cfg["avg_price_days_limit"] * 24 * 3600)
+        recent_avg_candidates = [h for h in valid_history if h['timestamp'] > avg_price_cutoff][:cfg["avg_price_entries"]]
         
         avg_sale_price = 0
         avg_price_type = "Normal" # Normal, Old, Est, None
@@ -351,27 +567,94 @@ class DataAnalyzer:
                 else:
                     avg_price_type = "None"
 
+        return {"avg_sale_price": avg_sale_price, "avg_price_type": avg_price_type}
+
+    @staticmethod
+    def _metrics_stock(context, cfg, metrics):
         # --- 4. ZOMBIE LISTING FILTER (Effective Stock) ---
+        listings = context["listings"]
         min_price = listings[0]['pricePerUnit'] if listings else 0
         effective_limit = min_price * 1.5
         effective_listings = [l for l in listings if l.get("pricePerUnit", 0) <= effective_limit]
         effective_stock = sum(l.get("quantity", 0) for l in effective_listings)
         
+        velocity_items = metrics["velocity"]
         days_to_sell = 999.0
         if velocity_items > 0:
             days_to_sell = effective_stock / velocity_items
-        
+
+        return {
+            "min_price": min_price,
+            "days_to_sell": days_to_sell,
+            "stock_total": effective_stock,
+            "total_stock_raw": sum(l.get("quantity", 0) for l in listings),
+        }
+
+    @staticmethod
+    def _metrics_worlds(context, cfg, metrics):
+        """
+        [P5] 資料中心查詢時依世界分組：最低價、銷售速度、有效庫存、去化天數。
+        上架與歷史各走訪一次；只有一個世界（單一伺服器查詢）時回傳空列表。
+        """
+        velocity_days = max(1, cfg["velocity_days"])
+        velocity_hours = velocity_days * 24
+        index, now_ts = context["index"], context["now_ts"]
+        worlds = {}
+
+        def group(name):
+            if name not in worlds:
+                worlds[name] = {"world": name, "min_price": 0, "stock": 0, "listings": 0, "sold": 0}
+            return worlds[name]
+
+        # 上架已依單價排序：每個世界的第一筆即為最低價
+        for l in context["listings"]:
+            name = l.get("worldName")
+            if not name:
+                continue
+            w = group(name)
+            price = l.get("pricePerUnit", 0)
+            if not w["listings"]:
+                w["min_price"] = price
+            w["listings"] += 1
+            if price <= w["min_price"] * 1.5:
+                w["stock"] += l.get("quantity", 0)
+
+        # 與整體銷售速度相同：已排除異常值、使用同樣的分桶時段
+        for h in context["valid_history"]:
+            name = h.get("worldName")
+            if name and index.in_window(h['timestamp'], velocity_hours, now_ts):
+                group(name)["sold"] += h.get("quantity", 0)
+
+        if len(worlds) < 2:
+            return {"world_breakdown": []}
+        for w in worlds.values():
+            w["velocity"] = w.pop("sold") / float(velocity_days)
+            w["days_to_sell"] = w["stock"] / w["velocity"] if w["velocity"] > 0 else 999.0
+        rows = sorted(worlds.values(), key=lambda w: (w["min_price"] <= 0, w["min_price"]))
+        return {"world_breakdown": rows}
+
+    @staticmethod
+    def _metrics_profit(context, cfg, metrics):
         # --- 5. REVENUE & PROFIT ---
+        tax_rate = cfg["market_tax_rate"] / 100.0
+        min_price = metrics["min_price"]
         expected_revenue_per_unit = min_price * (1 - tax_rate)
         
         # Flip Profit: (Avg * (1-Tax)) - Min
-        flip_profit = (avg_sale_price * (1 - tax_rate)) - min_price
+        flip_profit = (metrics["avg_sale_price"] * (1 - tax_rate)) - min_price
 
         roi = 0
         if min_price > 0:
             roi = (flip_profit / min_price) * 100
 
+        return {"profit": expected_revenue_per_unit, "flip_profit": flip_profit, "roi": roi}
+
+    @staticmethod
+    def _metrics_arbitrage(context, cfg, metrics):
         # --- 6. ARBITRAGE (Dynamic Warning) ---
+        tax_rate = cfg["market_tax_rate"] / 100.0
+        listings = context["listings"]
+        velocity_items = metrics["velocity"]
         arbitrage_spread = 0
         arbitrage_warning = False
         
@@ -403,72 +686,36 @@ class DataAnalyzer:
                 last_upload = global_min_entry['time']
                 if last_upload > 2000000000: last_upload /= 1000
                 
-                if (now_ts - last_upload) > warning_threshold:
+                if (context["now_ts"] - last_upload) > warning_threshold:
                     arbitrage_warning = True
 
+        return {"arbitrage": arbitrage_spread, "arbitrage_warning": arbitrage_warning}
+
+    @staticmethod
+    def _metrics_sniping(context, cfg, metrics):
         # --- 7. SNIPING VALIDATION (Total Profit & ROI) ---
-        sniping_profit = 0
-        sniping_cost = 0
-        
-        if len(listings) >= 2:
-            first_l = listings[0]
-            second_l = listings[1]
-            first_price = first_l['pricePerUnit']
-            second_price = second_l['pricePerUnit']
-            
-            # Additional Sniping Context
-            qty_stack = first_l['quantity']
-            total_cost = first_price * qty_stack
-            
-            # Sanity Check (2nd price vs Avg) - Skip validation if Avg is None or unreliable?
-            # Let's keep strict validation against "Absurd" prices.
-            is_valid_gap = True
-            if avg_sale_price > 0 and second_price > (avg_sale_price * 3.0):
-                is_valid_gap = False
-            
-            if is_valid_gap:
-                unit_profit = (second_price * (1 - tax_rate)) - first_price
-                total_snipe_profit = unit_profit * qty_stack
-                
-                snipe_roi = (unit_profit / first_price) * 100 if first_price > 0 else 0
-                
-                # Logic: Total Profit > Threshold OR (ROI > 200% AND Cost < 5000)
-                is_worth = False
-                if total_snipe_profit >= sniping_threshold:
-                    is_worth = True
-                elif snipe_roi > 200 and total_cost < 5000:
-                    is_worth = True # "Penny stock" sniping
-                
-                if is_worth:
-                    sniping_profit = total_snipe_profit
-                    sniping_cost = total_cost
+        # [P5] 走訪整條上架階梯，找出買到斷層前的最佳位置（不只比較第 1、2 筆）
+        tax_rate = cfg["market_tax_rate"] / 100.0
+        sniping_threshold = cfg["sniping_min_profit"]
+        snipe = best_snipe_listings(context["listings"], tax_rate, metrics["avg_sale_price"])
         
+        # Logic: Total Profit > Threshold OR (ROI > 200% AND Cost < 5000)
+        is_worth = is_worth_sniping(snipe, sniping_threshold)
+
+        return {
+            "sniping_profit": snipe["profit"] if is_worth else 0, # Now Total Profit
+            "sniping_cost": snipe["cost"] if is_worth else 0,     # [Phase 3] New Field
+            "sniping_count": snipe["count"] if is_worth else 0,   # [P5] 需買下的上架筆數
+            "sniping_resale": snipe["resale"] if is_worth else 0, # [P5] 斷層（轉賣）價格
+        }
+
+    @staticmethod
+    def _metrics_stacks(context, cfg, metrics):
         # --- 8. Stack Sales Data (Popularity) ---
         # Replacing old optimization with top 3 popular stack sizes
         from collections import Counter
-        stack_counts = Counter(h['quantity'] for h in valid_history)
-        top_stacks = stack_counts.most_common(3) # [(qty, count), ...]
-        
-        return {
-            "velocity": velocity_items,
-            "velocity_tx": velocity_tx,
-            "avg_sale_price": avg_sale_price,
-            "avg_price_type": avg_price_type, # [Phase 3] New Tag
-            "min_price": min_price,
-            "profit": expected_revenue_per_unit,
-            "flip_profit": flip_profit,
-            "roi": roi,
-            "arbitrage": arbitrage_spread,
-            "arbitrage_warning": arbitrage_warning,
-            "sniping_profit": sniping_profit, # Now Total Profit
-            "sniping_cost": sniping_cost,     # [Phase 3] New Field
-            "days_to_sell": days_to_sell,
-            "stock_total": effective_stock,
-            "total_stock_raw": sum(l.get("quantity", 0) for l in listings),
-            "stack_popularity": top_stacks, # New field
-            "merged_listings": listings,
-            "merged_history": history
-        }
+        stack_counts = Counter(h['quantity'] for h in context["valid_history"])
+        return {"stack_popularity": stack_counts.most_common(3)} # [(qty, count), ...]
 
     @staticmethod
     def _empty_metrics():
@@ -476,8 +723,9 @@ class DataAnalyzer:
             "velocity": 0, "velocity_tx": 0, "avg_sale_price": 0, "avg_price_type": "None",
             "min_price": 0, "profit": 0, "flip_profit": 0, "roi": 0, "arbitrage": 0, 
             "arbitrage_warning": False, "sniping_profit": 0, "sniping_cost": 0,
+            "sniping_count": 0, "sniping_resale": 0,
             "days_to_sell": 999, "stock_total": 0, "total_stock_raw": 0, 
-            "stack_diff": 0, "stack_popularity": [],
+            "stack_diff": 0, "stack_popularity": [], "world_breakdown": [],
             "merged_listings": [], "merged_history": []
         }
 
@@ -503,22 +751,75 @@ class DataAnalyzer:
             cleaned.append(item_data)
         return cleaned
 
+    # 自動刷新間隔（秒）：(每日銷量下限, 間隔)，銷售越快刷新越頻繁
+    REFRESH_TIERS = ((50, 60), (10, 120), (1, 300))
+    SLOW_REFRESH_INTERVAL = 900
+
     @staticmethod
-    def calculate_velocity_in_timeframe(history, hours=24):
+    def suggest_refresh_interval(velocity):
+        """依每日銷售速度建議自動刷新間隔（秒）。"""
+        for min_velocity, interval in DataAnalyzer.REFRESH_TIERS:
+            if velocity >= min_velocity:
+                return interval
+        return DataAnalyzer.SLOW_REFRESH_INTERVAL
+
+    @staticmethod
+    def hot_windows(index, now_ts, windows=HOT_WINDOWS):
+        """
+        以銷售累積索引一次取得各時段的銷量（每個時段兩次陣列查詢）。
+        Return: ({時段: {"heat", "sold", "tx_count"}}, trend, accel)
+        """
+        span = max(windows)
+        result = {}
+        for w in windows:
+            sold, tx = index.window(w, now_ts=now_ts)
+            result[w] = {
+                "heat": sold / (w / 24.0) if w >= 24 else sold,  # 日均（小時級別直接顯示數量）
+                "sold": sold,
+                "tx_count": tx,
+            }
+
+        # 趨勢：最近 24h 與之前各日日均相比；加速度：最近三個 24h 銷量的二階差分
+        cum = [index.window(d * 24, now_ts=now_ts)[0] for d in range(4)]
+        day = [cum[d + 1] - cum[d] for d in range(3)]
+        base_days = (span - 24) / 24.0
+        total = index.window(span, now_ts=now_ts)[0]
+        baseline = (total - day[0]) / base_days if base_days > 0 else 0
+        trend = day[0] / baseline if baseline > 0 else None
+        accel = (day[0] - day[1]) - (day[1] - day[2])
+        return result, trend, accel
+
+    @staticmethod
+    def rank_hot_window(results, hours):
+        """
+        依指定時段排序熱賣結果（不需重新查詢）：
+        將該時段的 heat / sold / tx_count 填入每列，略過該時段沒有銷售的物品，
+        依銷售速度降序、同速度按交易筆數降序。
+        """
+        ranked = []
+        for r in results:
+            if "windows" not in r:
+                # 舊版快取資料只有單一時段
+                ranked.append(r)
+                continue
+            w = r["windows"].get(hours) or r["windows"].get(str(hours))
+            if not w or w["sold"] == 0:
+                continue
+            ranked.append(dict(r, heat=w["heat"], sold=w["sold"], tx_count=w["tx_count"]))
+        ranked.sort(key=lambda x: (x["heat"], x["tx_count"]), reverse=True)
+        return ranked
+
+    @staticmethod
+    def calculate_velocity_in_timeframe(history, hours=24, index=None):
         """
         Calculates sales count within the last N hours.
         Return: (sold_count, is_unstable)
         is_unstable: True if the extrapolated daily velocity is highly volatile compared to actual short-term data.
+        index: 已建立的 SalesIndex（例如 SalesIndex.for_item(item_data)），可省去逐筆過濾
         """
-        if not history:
-            return 0, False
-            
-        now_ts = datetime.now().timestamp()
-        cutoff = now_ts - (hours * 3600)
-        
-        valid_history = [h for h in history if h.get("pricePerUnit", 0) > 0]
-        recent_sales = [h for h in valid_history if h['timestamp'] > cutoff]
-        
-        sold_count = sum(h['quantity'] for h in recent_sales)
-        
+        if index is None:
+            if not history:
+                return 0, False
+            index = SalesIndex(history)
+        sold_count, _ = index.window(hours)
         return sold_count, False
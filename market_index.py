@@ -0,0 +1,209 @@
+"""
+全市場價格索引 (Market Index)
+=============================
+在背景把「所有可交易物品」的市場摘要抓回本機，之後任何查詢（例如
+「流速 > 10 的最便宜物品」）都在本機完成，不需要逐一查 API。
+
+- 物品清單：Universalis /marketable
+- 每批 100 個 ID、只取摘要欄位（不含上架與歷史明細），請求經由共用限速器
+- 每個伺服器一份欄位式索引（每個欄位一個 array），並存於 SQLite
+- 建好後以 fetch_recently_updated_items 增量更新；中斷的完整掃描下次會從未索引的物品繼續
+- 排程每次只抓取有限批次（INDEX_MAX_BATCHES_PER_RUN），首次建立索引分散在多次排程中完成
+"""
+
+import logging
+import threading
+import time
+from array import array
+from contextlib import contextmanager
+
+INDEX_BATCH_SIZE = 100   # Universalis 多物品查詢上限
+INDEX_QUERY = "listings=0&entries=0"
+INDEX_FIELDS = ("itemID", "lastUploadTime", "minPrice", "minPriceHQ", "averagePrice", "averagePriceHQ",
+                "regularSaleVelocity", "hqSaleVelocity", "unitsForSale")
+INDEX_RECENT_ENTRIES = 200   # 每次增量更新的最近更新物品數
+INDEX_MAX_AGE = 24 * 3600    # 超過此秒數未更新的物品在完整掃描時重新抓取
+INDEX_MAX_BATCHES_PER_RUN = 10   # 排程每次最多抓取的批次數；完整掃描分多次執行，不長時間佔用排程 worker
+INDEX_MAX_ATTEMPTS = 3       # 請求後始終沒有出現在回應中的物品（unresolved / 批次失敗）最多再試的次數
+
+# 索引欄位（全部以 float 儲存）
+COLUMNS = ("min_price", "min_hq", "avg_sale", "avg_sale_hq", "velocity", "velocity_hq", "stock", "last_upload")
+
+
+def summarize_item(item_data):
+    """將精簡 payload 轉為索引欄位值（順序同 COLUMNS）。"""
+    last_upload = item_data.get("lastUploadTime") or 0
+    if last_upload > 2000000000:
+        last_upload /= 1000
+    return (
+        float(item_data.get("minPrice") or 0),
+        float(item_data.get("minPriceHQ") or 0),
+        float(item_data.get("averagePrice") or 0),
+        float(item_data.get("averagePriceHQ") or 0),
+        float(item_data.get("regularSaleVelocity") or 0),
+        float(item_data.get("hqSaleVelocity") or 0),
+        float(item_data.get("unitsForSale") or 0),
+        float(last_upload),
+    )
+
+
+class MarketIndex:
+    """單一伺服器的欄位式索引：ids[i] 對應每個欄位 array 的第 i 筆。"""
+
+    def __init__(self, server):
+        self.server = server
+        self.ids = array("l")
+        self.columns = {name: array("d") for name in COLUMNS}
+        self.updated_at = array("d")
+        self.version = 0          # 每次內容變動 +1，查詢層據此判斷排序快取是否過期
+        self._pos = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, item_id):
+        return item_id in self._pos
+
+    @contextmanager
+    def reading(self):
+        """
+        一致的讀取區段：期間阻擋 upsert，ids 與各欄位 array 長度、內容保持一致。
+        用法：with index.reading(): ...（區段內不可再呼叫 upsert）
+        """
+        with self._lock:
+            yield self
+
+    def upsert(self, item_id, values, updated_at=None):
+        updated_at = updated_at or time.time()
+        with self._lock:
+            pos = self._pos.get(item_id)
+            if pos is None:
+                self._pos[item_id] = len(self.ids)
+                self.ids.append(item_id)
+                for name, value in zip(COLUMNS, values):
+                    self.columns[name].append(value)
+                self.updated_at.append(updated_at)
+            else:
+                for name, value in zip(COLUMNS, values):
+                    self.columns[name][pos] = value
+                self.updated_at[pos] = updated_at
+            self.version += 1
+
+    def row(self, item_id):
+        pos = self._pos.get(item_id)
+        if pos is None:
+            return None
+        data = {name: self.columns[name][pos] for name in COLUMNS}
+        data["id"] = item_id
+        return data
+
+    def stale_ids(self, max_age):
+        cutoff = time.time() - max_age
+        return [i for i, t in zip(self.ids, self.updated_at) if t < cutoff]
+
+
+class MarketIndexCrawler:
+    """抓取並維護各伺服器的 MarketIndex。"""
+
+    def __init__(self, api, db):
+        self.api = api
+        self.db = db
+        self._indexes = {}
+        self._universe = None
+        self._missing = {}   # server -> {item_id: 請求過但未出現在回應中的次數}
+        self._lock = threading.Lock()
+
+    def get_index(self, server):
+        """取得伺服器索引（首次使用時從 SQLite 載入）。"""
+        with self._lock:
+            index = self._indexes.get(server)
+            if index is None:
+                index = MarketIndex(server)
+                for item_id, values, updated_at in self.db.load_market_index(server):
+                    index.upsert(item_id, values, updated_at)
+                self._indexes[server] = index
+                if len(index):
+                    logging.info(f"[市場索引] 載入 {server} 索引 {len(index)} 筆")
+            return index
+
+    def universe(self):
+        if self._universe is None:
+            ids = self.api.fetch_marketable_items()
+            if ids:
+                self._universe = ids
+        return self._universe or []
+
+    def _fetch_into(self, index, item_ids, token=None, progress=None):
+        """分批抓取 item_ids 並寫入索引與資料庫；回傳實際更新的物品數。"""
+        total = len(item_ids)
+        done = updated = 0
+        batches = self.api.iter_market_data_batches(index.server, item_ids, batch_size=INDEX_BATCH_SIZE,
+                                                    query=INDEX_QUERY, fields=INDEX_FIELDS)
+        missing = self._missing.setdefault(index.server, {})
+        for batch_ids, batch_data in batches:
+            if token and token.cancelled:
+                break
+            for key in set(batch_ids) - set(batch_data):
+                item_id = int(key)
+                missing[item_id] = missing.get(item_id, 0) + 1
+            now = time.time()
+            rows = []
+            for key, item_data in batch_data.items():
+                values = summarize_item(item_data)
+                index.upsert(int(key), values, now)
+                rows.append((int(key), values, now))
+            if rows:
+                self.db.save_market_index_rows(index.server, rows)
+            done += len(batch_ids)
+            updated += len(rows)
+            if progress:
+                progress(done, total)
+        return updated
+
+    def _pending_ids(self, index, universe):
+        """尚未索引的物品（排除多次請求都沒有回應的）+ 過舊的物品。"""
+        missing = self._missing.get(index.server, {})
+        unindexed = [i for i in universe if i not in index and missing.get(i, 0) < INDEX_MAX_ATTEMPTS]
+        return unindexed + index.stale_ids(INDEX_MAX_AGE)
+
+    def crawl_full(self, server, token=None, progress=None, max_batches=None):
+        """
+        抓取尚未索引或過舊的可交易物品（未索引的優先）。
+        max_batches: 本次最多抓取的批次數；剩下的物品下次呼叫時繼續。
+        """
+        index = self.get_index(server)
+        universe = self.universe()
+        if not universe:
+            logging.warning("[市場索引] 無法取得可交易物品清單")
+            return 0
+        todo = self._pending_ids(index, universe)
+        if not todo:
+            return 0
+        remaining = len(todo)
+        if max_batches is not None:
+            todo = todo[:max_batches * INDEX_BATCH_SIZE]
+        logging.info(f"[市場索引] {server} 完整掃描：本次 {len(todo)} / 待抓 {remaining} / 共 {len(universe)} 個物品")
+        updated = self._fetch_into(index, todo, token, progress)
+        logging.info(f"[市場索引] {server} 完整掃描更新 {updated} 筆，索引共 {len(index)} 筆")
+        return updated
+
+    def refresh_recent(self, server, entries=INDEX_RECENT_ENTRIES):
+        """增量更新：只重新抓取最近有上傳的物品。"""
+        item_ids = self.api.fetch_recently_updated_items(server, entries=entries)
+        if not item_ids:
+            return 0
+        updated = self._fetch_into(self.get_index(server), item_ids)
+        logging.debug(f"[市場索引] {server} 增量更新 {updated} 筆")
+        return updated
+
+    def run_once(self, server, token=None, progress=None, max_batches=INDEX_MAX_BATCHES_PER_RUN):
+        """
+        排程入口：索引未涵蓋全部物品時繼續完整掃描（每次最多 max_batches 批），否則做增量更新。
+        token 可為任何有 cancelled 屬性的物件，每批之間檢查（例如使用者閒置時停止）。
+        """
+        index = self.get_index(server)
+        universe = self.universe()
+        if universe and self._pending_ids(index, universe):
+            return self.crawl_full(server, token, progress, max_batches)
+        return self.refresh_recent(server)
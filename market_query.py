@@ -0,0 +1,223 @@
+"""
+本機市場查詢引擎 (Market Query)
+=============================
+在 market_index 的欄位式索引上做篩選與排序，完全不需要網路：
+
+    where:    "velocity > 10 and roi >= 20 and days_to_sell < 3"
+    order_by: "roi desc"（或 "-roi"）
+
+- 條件對每個欄位 array 逐一建立符合遮罩，再依預先排好的排序順序取前 N 筆
+- 排序順序依 (欄位, HQ) 快取，索引內容變動（version 改變）時才重新排序
+- 衍生欄位（profit / roi / days_to_sell）依稅率計算一次後同樣快取；稅率變更只重算 profit / roi
+
+命令列用法（不需開啟 GUI）：
+    python market_query.py --server 奧汀 --where "velocity > 10 and roi > 20" --order "roi desc"
+    python market_query.py --server 奧汀 --category 製作材料 --order "days_to_sell asc"
+"""
+
+import argparse
+import operator
+import re
+import time
+
+from market_index import COLUMNS, MarketIndex
+
+# 查詢可用欄位（HQ 模式下 min_price / avg_sale / velocity 改用 HQ 欄位）
+FIELDS = ("min_price", "avg_sale", "velocity", "stock", "last_upload", "profit", "roi", "days_to_sell")
+HQ_COLUMNS = {"min_price": "min_hq", "avg_sale": "avg_sale_hq", "velocity": "velocity_hq"}
+TAX_FIELDS = ("profit", "roi")   # 稅率變更時需要重算的衍生欄位
+
+_OPS = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le,
+        "=": operator.eq, "==": operator.eq, "!=": operator.ne}
+_CLAUSE = re.compile(r"^\s*([a-z_]+)\s*(>=|<=|==|!=|>|<|=)\s*(-?[\d.]+)\s*$")
+
+
+class QueryError(ValueError):
+    pass
+
+
+def parse_where(where):
+    """'a > 1 and b <= 2' -> [(field, op_fn, value)]；空字串代表不篩選。"""
+    clauses = []
+    if not where or not where.strip():
+        return clauses
+    for part in re.split(r"\s+and\s+|\s*&&\s*|\s*,\s*", where.strip(), flags=re.IGNORECASE):
+        m = _CLAUSE.match(part.lower())
+        if not m:
+            raise QueryError(f"無法解析條件: {part}")
+        field, op, value = m.groups()
+        if field not in FIELDS:
+            raise QueryError(f"未知欄位: {field}（可用: {', '.join(FIELDS)}）")
+        try:
+            number = float(value)
+        except ValueError:
+            raise QueryError(f"無法解析數值: {value}")
+        clauses.append((field, _OPS[op], number))
+    return clauses
+
+
+def parse_order(order_by):
+    """'roi desc' / '-roi' / 'velocity' -> (field, descending)"""
+    text = (order_by or "velocity desc").strip().lower()
+    descending = False
+    if text.startswith("-"):
+        text, descending = text[1:].strip(), True
+    parts = text.split()
+    field = parts[0] if parts else "velocity"
+    if len(parts) > 1:
+        descending = parts[1] == "desc"
+    if field not in FIELDS:
+        raise QueryError(f"未知排序欄位: {field}")
+    return field, descending
+
+
+class QueryEngine:
+    """單一 MarketIndex 的查詢引擎。tax_rate: 市場稅率（0.05 = 5%）"""
+
+    def __init__(self, index, tax_rate=0.05):
+        self.index = index
+        self.tax_rate = tax_rate
+        self._cache_version = None
+        self._derived = {}   # (field, hq) -> list
+        self._orders = {}    # (field, hq) -> 由小到大的位置列表
+
+    def _check_cache(self):
+        if self._cache_version != self.index.version:
+            self._derived.clear()
+            self._orders.clear()
+            self._cache_version = self.index.version
+
+    def set_tax_rate(self, tax_rate):
+        """更新稅率；只捨棄依賴稅率的衍生欄位（profit / roi）與其排序。回傳是否有變更。"""
+        if tax_rate == self.tax_rate:
+            return False
+        self.tax_rate = tax_rate
+        for cache in (self._derived, self._orders):
+            for key in [k for k in cache if k[0] in TAX_FIELDS]:
+                del cache[key]
+        return True
+
+    def column(self, field, hq=False):
+        """取得欄位值序列（衍生欄位計算後快取）。"""
+        self._check_cache()
+        if field in COLUMNS or field in HQ_COLUMNS:
+            return self.index.columns[HQ_COLUMNS.get(field, field) if hq else field]
+        key = (field, hq)
+        if key not in self._derived:
+            mins = self.column("min_price", hq)
+            avgs = self.column("avg_sale", hq)
+            if field == "profit":
+                keep = 1 - self.tax_rate
+                values = [a * keep - m if m > 0 and a > 0 else 0.0 for m, a in zip(mins, avgs)]
+            elif field == "roi":
+                profit = self.column("profit", hq)
+                values = [p / m * 100 if m > 0 else 0.0 for p, m in zip(profit, mins)]
+            elif field == "days_to_sell":
+                stock = self.index.columns["stock"]
+                values = [s / v if v > 0 else 999.0 for s, v in zip(stock, self.column("velocity", hq))]
+            else:
+                raise QueryError(f"未知欄位: {field}")
+            self._derived[key] = values
+        return self._derived[key]
+
+    def order(self, field, hq=False):
+        self._check_cache()
+        key = (field, hq)
+        if key not in self._orders:
+            values = self.column(field, hq)
+            self._orders[key] = sorted(range(len(values)), key=values.__getitem__)
+        return self._orders[key]
+
+    def run(self, where="", order_by="velocity desc", hq=False, ids=None, limit=100):
+        """
+        執行查詢。ids: 只在這些物品中查詢（例如我的最愛）。
+        回傳 (rows, matched, elapsed_ms)；rows 含所有 FIELDS 與 id。
+        """
+        start = time.perf_counter()
+        clauses = parse_where(where)
+        field, descending = parse_order(order_by)
+
+        with self.index.reading():
+            size = len(self.index.ids)
+            mask = bytearray(b"\x01") * size
+            if ids is not None:
+                mask = bytearray(size)
+                for i, item_id in enumerate(self.index.ids):
+                    if item_id in ids:
+                        mask[i] = 1
+            # 沒有價格的物品（未上架）不列入
+            for i, m in enumerate(self.column("min_price", hq)):
+                if m <= 0:
+                    mask[i] = 0
+            for f, op, value in clauses:
+                col = self.column(f, hq)
+                for i in range(size):
+                    if mask[i] and not op(col[i], value):
+                        mask[i] = 0
+
+            matched = sum(mask)
+            order = self.order(field, hq)
+            positions = []
+            for pos in (reversed(order) if descending else order):
+                if mask[pos]:
+                    positions.append(pos)
+                    if len(positions) >= limit:
+                        break
+
+            rows = []
+            for pos in positions:
+                row = {f: self.column(f, hq)[pos] for f in FIELDS}
+                row["id"] = self.index.ids[pos]
+                rows.append(row)
+
+        return rows, matched, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="在本機全市場索引上查詢（需先於主程式建立索引）")
+    parser.add_argument("--server", required=True, help="伺服器 / 資料中心名稱")
+    parser.add_argument("--where", default="", help='條件，例如 "velocity > 10 and roi > 20"')
+    parser.add_argument("--order", default="velocity desc", help='排序，例如 "roi desc"')
+    parser.add_argument("--hq", action="store_true", help="使用 HQ 價格 / 流速")
+    parser.add_argument("--favorites", action="store_true", help="只查詢我的最愛")
+    parser.add_argument("--category", default=None, help="只查詢此最愛分類（名稱，隱含 --favorites）")
+    parser.add_argument("--limit", type=int, default=30)
+    parser.add_argument("--db", default="market_app.db")
+    args = parser.parse_args()
+
+    from database import DatabaseManager
+    db = DatabaseManager(args.db)
+    index = MarketIndex(args.server)
+    for item_id, values, updated_at in db.load_market_index(args.server):
+        index.upsert(item_id, values, updated_at)
+    if not len(index):
+        print(f"{args.server} 尚無索引資料，請先在主程式的參數設定中啟用「全市場價格索引」")
+        return
+
+    settings = db.load_settings({"market_tax_rate": 5})
+    engine = QueryEngine(index, tax_rate=settings["market_tax_rate"] / 100.0)
+    ids = None
+    if args.category:
+        cat_id = next((cid for cid, name in db.get_categories() if name == args.category), None)
+        if cat_id is None:
+            print(f"找不到最愛分類: {args.category}")
+            return
+        ids = {row[0] for row in db.get_favorites(cat_id)}
+    elif args.favorites:
+        ids = {row[0] for row in db.get_favorites()}
+    try:
+        rows, matched, elapsed = engine.run(args.where, args.order, args.hq, ids, args.limit)
+    except QueryError as e:
+        print(f"查詢錯誤: {e}")
+        return
+
+    print(f"{args.server}: 索引 {len(index)} 筆，符合 {matched} 筆，{elapsed:.1f} ms")
+    print(f"{'ID':>7}  {'名稱':<20} {'最低價':>10} {'均價':>10} {'流速':>7} {'庫存':>6} {'ROI%':>7} {'去化天數':>8}")
+    for r in rows:
+        name = db.get_item_name_by_id(r["id"]) or ""
+        print(f"{r['id']:>7}  {name[:20]:<20} {r['min_price']:>10,.0f} {r['avg_sale']:>10,.0f} "
+              f"{r['velocity']:>7.1f} {r['stock']:>6.0f} {r['roi']:>7.1f} {r['days_to_sell']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
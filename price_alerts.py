@@ -0,0 +1,121 @@
+"""
+價格警報索引 (Price Alert Index)
+=============================
+將啟用中的警報整理成 {伺服器: {物品 ID: [警報...]}}，
+收到一筆市場資料時只需一次字典查詢即可判斷是否有警報被觸發，
+檢查成本與警報數量無關。
+
+觸發的警報會立即從索引移除，避免同一份資料被多個執行緒重複通知。
+MarketAPI 的 payload hook 會把每一筆收到的市場資料送進 evaluate_payload，
+搜尋、製作樹、最愛掃描、熱賣掃描抓到的資料都能順便觸發警報，不需額外請求。
+"""
+
+import threading
+
+# 警報檢查只需要最低價：每個物品只取 1 筆上架、不取歷史、只保留價格欄位
+ALERT_BATCH_SIZE = 100   # Universalis 多物品查詢上限
+ALERT_QUERY = "listings=1&entries=0"
+ALERT_FIELDS = ("itemID", "listings.pricePerUnit")
+
+
+def lowest_listing_price(item_data):
+    """回傳市場資料中的最低上架單價；沒有上架時回傳 0。"""
+    prices = [l.get("pricePerUnit", 0) for l in item_data.get("listings", [])]
+    prices = [p for p in prices if p > 0]
+    return min(prices) if prices else 0
+
+
+def is_triggered(alert, price):
+    if price <= 0:
+        return False
+    if alert["direction"] == "below":
+        return price <= alert["target_price"]
+    return price >= alert["target_price"]
+
+
+class AlertIndex:
+    """
+    以 (伺服器, 物品 ID) 索引的警報表。
+    default_server: 警報未指定伺服器時使用的伺服器
+    """
+
+    def __init__(self, alerts=(), default_server=None):
+        self._lock = threading.Lock()
+        self._by_server = {}
+        self._item_ids = frozenset()
+        self._fired = set()   # 已觸發的警報 ID；資料庫尚未更新前重建索引也不會再放回
+        self.rebuild(alerts, default_server)
+
+    def rebuild(self, alerts, default_server=None):
+        by_server = {}
+        with self._lock:
+            fired = set(self._fired)
+        for alert in alerts:
+            server = alert.get("server") or default_server
+            if not server or alert.get("id") in fired:
+                continue
+            by_server.setdefault(server, {}).setdefault(int(alert["item_id"]), []).append(alert)
+        with self._lock:
+            self._by_server = by_server
+            self._item_ids = frozenset(i for items in by_server.values() for i in items)
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(alerts) for items in self._by_server.values() for alerts in items.values())
+
+    def items_by_server(self):
+        """{伺服器: [物品 ID...]}，供批次查詢使用。"""
+        with self._lock:
+            return {server: list(items) for server, items in self._by_server.items() if items}
+
+    def evaluate(self, server, item_id, item_data):
+        """
+        以一筆市場資料檢查該伺服器 / 物品的所有警報。
+        回傳 [(alert, 最低價)]；觸發的警報會從索引移除。
+        """
+        with self._lock:
+            alerts = self._by_server.get(server, {}).get(int(item_id))
+            if not alerts:
+                return []
+        price = lowest_listing_price(item_data)
+        if price <= 0:
+            return []
+
+        fired = []
+        with self._lock:
+            items = self._by_server.get(server, {})
+            remaining = []
+            for alert in items.get(int(item_id), []):
+                if is_triggered(alert, price):
+                    fired.append((alert, price))
+                else:
+                    remaining.append(alert)
+            if remaining:
+                items[int(item_id)] = remaining
+            else:
+                items.pop(int(item_id), None)
+            self._fired.update(alert.get("id") for alert, _ in fired)
+        return fired
+
+    def evaluate_payload(self, server, item_id, item_data):
+        """
+        以任意來源的完整市場資料檢查警報（payload hook 使用）。
+        除了查詢的伺服器本身，若資料為整個資料中心（上架含 worldName），
+        也會以各世界自己的最低價檢查指定該世界的警報。
+        """
+        try:
+            item_id = int(item_id)
+        except (TypeError, ValueError):
+            return []
+        if item_id not in self._item_ids:
+            return []
+
+        fired = self.evaluate(server, item_id, item_data)
+        by_world = {}
+        for l in item_data.get("listings", []):
+            world = l.get("worldName")
+            if world and world != server:
+                by_world.setdefault(world, []).append(l)
+        for world, listings in by_world.items():
+            fired.extend(self.evaluate(world, item_id, {"listings": listings}))
+        return fired
@@ -0,0 +1,129 @@
+import threading
+import time
+import logging
+
+
+class TokenBucket:
+    """
+    執行緒安全的 Token Bucket 限速器。
+    多個 worker 共用同一個 bucket，確保總請求速率不超過 rate (次/秒)。
+
+    支援自適應退避：
+    - penalize(): 收到 429 時呼叫，速率減半並暫停一段時間
+    - reward(): 請求成功時呼叫，速率緩慢回升至設定上限
+    """
+
+    def __init__(self, rate=10.0, capacity=None, min_rate=0.5):
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.min_rate = min(float(min_rate), self.max_rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._pause_until = 0.0
+        self._last_penalty = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self._last
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._last = now
+
+    def acquire(self, tokens=1.0, timeout=None):
+        """
+        阻塞直到取得 tokens。
+        Returns: True 取得成功；若設定 timeout 且逾時則回傳 False。
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._pause_until and self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait = max(self._pause_until - now, (tokens - self._tokens) / self.rate)
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(max(wait, 0.001))
+
+    def try_acquire(self, tokens=1.0):
+        """非阻塞版本：有足夠 tokens 才扣除並回傳 True。"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now >= self._pause_until and self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def available(self):
+        """目前可用的 tokens 數量（僅供參考）。"""
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens
+
+    def penalize(self, pause_seconds=1.0):
+        """收到 429：速率減半，並讓所有 worker 暫停 pause_seconds 秒。"""
+        with self._lock:
+            now = time.monotonic()
+            # 同一波併發請求同時收到 429 時只減速一次，避免速率瞬間崩落
+            if now - self._last_penalty > 1.0:
+                self.rate = max(self.min_rate, self.rate / 2.0)
+                self._last_penalty = now
+            self._pause_until = max(self._pause_until, now + pause_seconds)
+            self._tokens = 0.0
+        logging.warning(f"[限速] 伺服器要求降速，目前速率 {self.rate:.1f} 次/秒，暫停 {pause_seconds:.1f} 秒")
+
+    def reward(self):
+        """請求成功：速率以 5% 緩慢回升，不超過設定上限。"""
+        if self.rate >= self.max_rate:
+            return
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate * 1.05 + 0.01)
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD 自適應併發上限（類似 TCP 壅塞控制）。
+
+    - 成功且延遲正常：上限每輪 +1（加法增加，每個請求 +1/limit）
+    - 收到 429 或延遲超過 latency_target：上限減半（乘法減少，同一輪只減一次）
+    呼叫端以 acquire() / release(latency, status) 包住每個請求。
+    """
+
+    def __init__(self, initial=2, min_limit=1, max_limit=8, latency_target=2.0):
+        self.min_limit = max(1, int(min_limit))
+        self.max_limit = max(self.min_limit, int(max_limit))
+        self.limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.latency_target = latency_target
+        self._in_flight = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self._in_flight >= int(self.limit):
+                self._cond.wait()
+            self._in_flight += 1
+
+    def release(self, latency=None, status=200):
+        """請求完成：依結果調整上限。status 為 None 代表網路錯誤（不調整）。"""
+        with self._cond:
+            self._in_flight -= 1
+            now = time.monotonic()
+            if status == 429 or (latency is not None and latency > self.latency_target):
+                # 一輪（約一個延遲目標時間）內只減半一次，避免同一波 429 讓上限崩落
+                if now - self._last_decrease > self.latency_target:
+                    old = self.limit
+                    self.limit = max(float(self.min_limit), self.limit / 2.0)
+                    self._last_decrease = now
+                    logging.info(f"[併發] {'429' if status == 429 else f'延遲 {latency:.1f}s'}，"
+                                 f"併發上限 {old:.1f} → {self.limit:.1f}")
+            elif status == 200:
+                self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
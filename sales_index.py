@@ -0,0 +1,106 @@
+"""
+銷售累積索引 (Sales Index)
+=============================
+收到市場資料時，將 recentHistory 依「整點小時」分桶一次，並建立累積和：
+
+- 全部 / HQ / NQ 各一組累積陣列（數量、交易筆數）
+- 任意時段的銷量 = 兩次陣列查詢相減，不需再逐筆過濾歷史紀錄
+
+時段以小時為單位：「最近 N 小時」= 目前這一小時（尚未結束）加上前 N-1 個整點小時。
+超過 max_hours 的舊紀錄併入最舊的桶，總量仍正確，但不再細分時間。
+"""
+
+from array import array
+from datetime import datetime
+
+BUCKET_SECONDS = 3600
+DEFAULT_MAX_HOURS = 35 * 24   # 涵蓋 30 天的銷售速度設定
+INDEX_KEY = "_salesIndex"     # 記憶在 payload dict 上的欄位名稱
+
+
+def _flatten_history(item_data):
+    if "items" in item_data and isinstance(item_data["items"], dict):
+        history = []
+        for sub in item_data["items"].values():
+            history.extend(sub.get("recentHistory", []))
+        return history
+    return item_data.get("recentHistory", [])
+
+
+class SalesIndex:
+    """單一物品的小時分桶累積銷售索引。"""
+
+    def __init__(self, history, now_ts=None, max_hours=DEFAULT_MAX_HOURS):
+        now_ts = now_ts or datetime.now().timestamp()
+        sales = [h for h in history if h.get("pricePerUnit", 0) > 0]
+
+        self.end = int(now_ts // BUCKET_SECONDS)
+        newest = max((int(h.get("timestamp", 0) // BUCKET_SECONDS) for h in sales), default=self.end)
+        self.end = max(self.end, newest)
+        oldest = min((int(h.get("timestamp", 0) // BUCKET_SECONDS) for h in sales), default=self.end)
+        self.start = max(oldest, self.end - max_hours + 1)
+        size = self.end - self.start + 1
+
+        # series -> (每桶數量, 每桶筆數)；None = 全部
+        bins = {}
+
+        def add(key, b, qty):
+            if key not in bins:
+                bins[key] = (array("l", [0]) * size, array("l", [0]) * size)
+            q, t = bins[key]
+            q[b] += qty
+            t[b] += 1
+
+        for h in sales:
+            b = max(0, int(h.get("timestamp", 0) // BUCKET_SECONDS) - self.start)
+            qty = h.get("quantity", 0)
+            add(None, b, qty)
+            add("hq" if h.get("hq") else "nq", b, qty)
+
+        # 轉為累積和：cum[i] = 前 i 個桶的總和
+        self._cum = {}
+        for key, (q, t) in bins.items():
+            cq, ct = array("l", [0]) * (size + 1), array("l", [0]) * (size + 1)
+            for i in range(size):
+                cq[i + 1] = cq[i] + q[i]
+                ct[i + 1] = ct[i] + t[i]
+            self._cum[key] = (cq, ct)
+
+    @classmethod
+    def for_item(cls, item_data):
+        """取得（必要時建立）記憶在 payload 上的索引。"""
+        index = item_data.get(INDEX_KEY)
+        if index is None:
+            index = cls(_flatten_history(item_data))
+            item_data[INDEX_KEY] = index
+        return index
+
+    def _series(self, hq=None):
+        if hq is None:
+            return self._cum.get(None)
+        return self._cum.get("hq" if hq else "nq")
+
+    def _bounds(self, hours, now_ts=None):
+        """最近 hours 小時對應的累積陣列索引 (lo, hi)。"""
+        now_bucket = int((now_ts or datetime.now().timestamp()) // BUCKET_SECONDS)
+        hi = min(now_bucket, self.end) - self.start + 1
+        lo = now_bucket - int(hours) + 1 - self.start
+        size = self.end - self.start + 1
+        return max(0, min(lo, size)), max(0, min(hi, size))
+
+    def window(self, hours, hq=None, now_ts=None):
+        """最近 hours 小時的 (銷售數量, 交易筆數)。hq: None=全部 / True / False。"""
+        series = self._series(hq)
+        if series is None:
+            return 0, 0
+        lo, hi = self._bounds(hours, now_ts)
+        if hi <= lo:
+            return 0, 0
+        cq, ct = series
+        return cq[hi] - cq[lo], ct[hi] - ct[lo]
+
+    def in_window(self, ts, hours, now_ts=None):
+        """時間戳是否落在 window(hours) 涵蓋的桶內（與 window 相同的分桶規則）。"""
+        lo, hi = self._bounds(hours, now_ts)
+        b = max(0, int(ts // BUCKET_SECONDS) - self.start)
+        return lo <= b < hi
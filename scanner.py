@@ -0,0 +1,161 @@
+"""
+最愛掃描管線 (Scanner Pipeline)
+=============================
+以 generator 串接「抓取 → 分析 → 輸出結果列」：
+每完成一批（批次模式）或一個物品（循序模式）就 yield 一次，
+UI 可以立即插入結果，第一筆結果出現的時間與分類大小無關。
+循序模式以 AIMD 自適應併發（rate_limiter.AdaptiveConcurrency）同時查詢多個物品。
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from analysis_worker import scan_row
+from rate_limiter import AdaptiveConcurrency
+
+
+def iter_batch_scan(api, backend, server, item_ids, hours, token=None, tax_rate=0.05, min_profit=0):
+    """
+    批次模式：每 50 個 ID 一次 API 請求。
+    Yields: (rows, done, total) - rows 為本批的結果列（未排序、不含名稱）
+    """
+    total = len(item_ids)
+    done = 0
+    for batch_ids, batch_data in api.iter_market_data_batches(server, item_ids):
+        if token and token.cancelled:
+            return
+        done += len(batch_ids)
+        rows = backend.scan_rows(list(batch_data.values()), hours, tax_rate, min_profit) if batch_data else []
+        yield rows, done, total
+
+
+SEQUENTIAL_MAX_CONCURRENCY = 8   # 需 ≤ MarketAPI 連線池大小 (10)
+
+
+def _scan_one(api, server, item_id, hours, gate, token=None, max_retries=3, tax_rate=0.05, min_profit=0):
+    """
+    查詢並分析單一物品（可利用單品快取）。
+    429 時由 gate 降低併發並退避重試；其他錯誤只影響這個物品。
+    """
+    try:
+        for attempt in range(max_retries + 1):
+            if token and token.cancelled:
+                return []
+            gate.acquire()
+            start = time.monotonic()
+            status = None
+            try:
+                raw_data, status = api.fetch_market_data(server, item_id)
+            finally:
+                gate.release(time.monotonic() - start, status)
+
+            if status == 429:
+                time.sleep(min(8, 2 ** attempt))
+                continue
+            if status != 200 or not raw_data:
+                logging.warning(f"Item {item_id} fetch failed or empty. Status: {status}")
+                return []
+            row = scan_row(raw_data, hours, tax_rate, min_profit)
+            if not row:
+                return []
+            row["id"] = item_id
+            return [row]
+        logging.warning(f"Item {item_id} 持續被限速 (429)，略過")
+    except Exception as inner_e:
+        logging.error(f"Error scanning item {item_id}: {inner_e}")
+    return []
+
+
+def iter_sequential_scan(api, server, item_ids, hours, token=None, gate=None, tax_rate=0.05, min_profit=0):
+    """
+    循序模式：逐一查詢每個物品，但以 AIMD 自適應併發同時進行多個請求。
+    依完成順序 yield (rows, done, total)；單一物品失敗不影響其他物品。
+    """
+    total = len(item_ids)
+    gate = gate or AdaptiveConcurrency(max_limit=SEQUENTIAL_MAX_CONCURRENCY)
+    executor = ThreadPoolExecutor(max_workers=gate.max_limit, thread_name_prefix="scan")
+    futures = [executor.submit(_scan_one, api, server, item_id, hours, gate, token,
+                               tax_rate=tax_rate, min_profit=min_profit)
+               for item_id in item_ids]
+    try:
+        for done, future in enumerate(as_completed(futures), 1):
+            if token and token.cancelled:
+                return
+            yield future.result(), done, total
+        logging.info(f"循序掃描完成，最終併發上限 {gate.limit:.1f}")
+    finally:
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_scan(api, backend, server, item_ids, hours, is_batch=False, token=None, tax_rate=0.05, min_profit=0):
+    """依模式選擇管線。tax_rate / min_profit 用於狙擊利潤欄位。"""
+    if is_batch:
+        return iter_batch_scan(api, backend, server, item_ids, hours, token, tax_rate, min_profit)
+    return iter_sequential_scan(api, server, item_ids, hours, token, tax_rate=tax_rate, min_profit=min_profit)
+
+
+# ==========================================
+# 多伺服器同時掃描 (Fan-out)
+# ==========================================
+
+FAN_OUT_MAX_PARALLEL = 4   # 同時掃描的伺服器數；總請求速率由 MarketAPI.rate_limiter 共同限制
+
+
+def collect_favorites_scan(api, backend, server, item_ids, hours, token=None, tax_rate=0.05, min_profit=0):
+    """單一伺服器的最愛掃描（批次模式），回傳全部結果列。"""
+    rows = []
+    for batch_rows, _, _ in iter_batch_scan(api, backend, server, item_ids, hours, token, tax_rate, min_profit):
+        rows.extend(batch_rows)
+    return rows
+
+
+def iter_fan_out(servers, scan_fn, token=None, max_parallel=FAN_OUT_MAX_PARALLEL):
+    """
+    對每個伺服器同時執行 scan_fn(server) -> rows，依完成順序 yield (server, rows, error)。
+    單一伺服器失敗只回報錯誤，不影響其他伺服器。
+    """
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_parallel, len(servers))),
+                                  thread_name_prefix="fanout")
+    futures = {executor.submit(scan_fn, server): server for server in servers}
+    try:
+        for future in as_completed(futures):
+            if token and token.cancelled:
+                return
+            server = futures[future]
+            try:
+                yield server, future.result(), None
+            except Exception as e:
+                logging.error(f"[多伺服器掃描] {server} 失敗: {e}")
+                yield server, [], str(e)
+    finally:
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def build_server_matrix(rows_by_server, servers):
+    """
+    合併為「物品 × 伺服器」矩陣，每個物品一列：
+    {"id", "cells": {server: {"min", "heat", "stock", "avg"}}, "best_server", "best_price", "total_heat"}
+    依各伺服器銷售速度總和遞減排序。
+    """
+    matrix = {}
+    for server in servers:
+        for row in rows_by_server.get(server, []):
+            entry = matrix.setdefault(row["id"], {"id": row["id"], "cells": {}})
+            entry["cells"][server] = {
+                "min": row.get("min", 0),
+                "heat": row.get("heat", 0),
+                "stock": row.get("stock", 0),
+                "avg": row.get("avg", 0),
+            }
+
+    for entry in matrix.values():
+        priced = [(cell["min"], server) for server, cell in entry["cells"].items() if cell["min"] > 0]
+        entry["best_price"], entry["best_server"] = min(priced) if priced else (0, None)
+        entry["total_heat"] = sum(cell["heat"] for cell in entry["cells"].values())
+
+    return sorted(matrix.values(), key=lambda e: e["total_heat"], reverse=True)
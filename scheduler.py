@@ -0,0 +1,235 @@
+"""
+背景排程服務 (Scheduler)
+=============================
+所有週期性工作（價格警報、自動刷新、熱賣快取預熱…）統一在此註冊：
+
+- 單一排程執行緒 + 少量 worker，工作之間不會互相搶請求
+- jitter：每次間隔隨機 ±N%，避免多個工作同時觸發
+- 優先權：同時到期時高優先權先執行；低優先權工作只在共用的
+  Universalis 限速器有餘裕時才啟動，讓出額度給使用者的互動查詢
+- 閒置暫停：使用者一段時間沒有操作時，標記 pause_on_idle 的工作暫停
+- 每個工作的執行統計（次數、失敗、平均 / 最長耗時、延後次數）
+"""
+
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+HIGH = 0
+NORMAL = 1
+LOW = 2
+
+
+class JobStats:
+    def __init__(self):
+        self.runs = 0
+        self.failures = 0
+        self.deferred = 0          # 因限速額度不足或閒置而延後的次數
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.last_time = 0.0
+        self.last_run = None       # time.time()
+        self.last_error = None
+
+    @property
+    def avg_time(self):
+        return self.total_time / self.runs if self.runs else 0.0
+
+    def as_dict(self):
+        return {
+            "runs": self.runs,
+            "failures": self.failures,
+            "deferred": self.deferred,
+            "avg_time": self.avg_time,
+            "max_time": self.max_time,
+            "last_time": self.last_time,
+            "last_run": self.last_run,
+            "last_error": self.last_error,
+        }
+
+
+class Job:
+    def __init__(self, name, fn, interval, priority=NORMAL, jitter=0.1,
+                 pause_on_idle=False, budget=1, enabled=True, initial_delay=None):
+        self.name = name
+        self.fn = fn
+        self.interval = interval
+        self.priority = priority
+        self.jitter = jitter
+        self.pause_on_idle = pause_on_idle
+        self.budget = budget       # 預估每次執行需要的 Universalis 請求數
+        self.enabled = enabled
+        self.running = False
+        self.stats = JobStats()
+        self.next_run = time.monotonic() + (interval if initial_delay is None else initial_delay)
+
+    def reschedule(self, delay=None):
+        delay = self.interval if delay is None else delay
+        spread = delay * self.jitter
+        self.next_run = time.monotonic() + max(0.0, delay + random.uniform(-spread, spread))
+
+
+class _IdleToken:
+    """與 TaskExecutor 的 CancelToken 相同介面（只讀 cancelled）"""
+
+    def __init__(self, scheduler):
+        self._scheduler = scheduler
+
+    @property
+    def cancelled(self):
+        return self._scheduler.is_idle() or self._scheduler._stop.is_set()
+
+
+class Scheduler:
+    """
+    rate_limiter: 與 MarketAPI 共用的 TokenBucket（可為 None）
+    idle_timeout: 使用者無操作超過此秒數即視為閒置
+    """
+
+    def __init__(self, rate_limiter=None, idle_timeout=900, workers=2, tick=1.0):
+        self.rate_limiter = rate_limiter
+        self.idle_timeout = idle_timeout
+        self.tick = tick
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._last_activity = time.monotonic()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scheduler")
+        self._thread = None
+
+    # ---------- 註冊與控制 ----------
+
+    def register(self, name, fn, interval, **kwargs):
+        """註冊週期性工作；同名工作會被取代。kwargs 見 Job。"""
+        with self._lock:
+            self._jobs[name] = Job(name, fn, interval, **kwargs)
+        self._wake.set()
+        logging.info(f"[排程] 註冊工作 {name}，間隔 {interval}s")
+
+    def set_enabled(self, name, enabled, run_soon=False):
+        with self._lock:
+            job = self._jobs.get(name)
+            if not job:
+                return
+            job.enabled = enabled
+            if enabled:
+                job.reschedule(0 if run_soon else None)
+        self._wake.set()
+
+    def set_interval(self, name, interval):
+        """調整間隔，從現在起重新計算下次執行時間。"""
+        with self._lock:
+            job = self._jobs.get(name)
+            if job:
+                job.interval = interval
+                job.reschedule()
+        self._wake.set()
+
+    def is_enabled(self, name):
+        job = self._jobs.get(name)
+        return bool(job and job.enabled)
+
+    def run_now(self, name):
+        with self._lock:
+            job = self._jobs.get(name)
+            if job:
+                job.next_run = time.monotonic()
+        self._wake.set()
+
+    def touch(self):
+        """使用者有操作（按鍵 / 滑鼠）時呼叫。"""
+        was_idle = self.is_idle()
+        self._last_activity = time.monotonic()
+        if was_idle:
+            logging.info("[排程] 使用者回來了，恢復閒置暫停的工作")
+            self._wake.set()
+
+    def is_idle(self):
+        return (time.monotonic() - self._last_activity) > self.idle_timeout
+
+    def idle_token(self):
+        """給長時間工作的取消旗標：使用者閒置或排程器停止後 cancelled 為 True（每批之間檢查）"""
+        return _IdleToken(self)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._loop, name="scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        """{job_name: stats dict + enabled / interval / priority}"""
+        with self._lock:
+            return {
+                name: dict(job.stats.as_dict(), enabled=job.enabled,
+                           interval=job.interval, priority=job.priority)
+                for name, job in self._jobs.items()
+            }
+
+    def format_stats(self):
+        lines = []
+        for name, s in self.stats().items():
+            state = "啟用" if s["enabled"] else "停用"
+            lines.append(f"{name} ({state}, 每 {s['interval']}s): 執行 {s['runs']} 次, 失敗 {s['failures']}, "
+                         f"延後 {s['deferred']}, 平均 {s['avg_time']:.2f}s, 最長 {s['max_time']:.2f}s")
+        return "\n".join(lines)
+
+    # ---------- 內部 ----------
+
+    def _has_budget(self, job):
+        """低優先權工作需等共用限速器有足夠額度，高優先權不受限。"""
+        if job.priority == HIGH or self.rate_limiter is None:
+            return True
+        return self.rate_limiter.available() >= job.budget
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self._wake.clear()
+            now = time.monotonic()
+            idle = self.is_idle()
+            with self._lock:
+                due = [j for j in self._jobs.values()
+                       if j.enabled and not j.running and j.next_run <= now]
+                due.sort(key=lambda j: (j.priority, j.next_run))
+                for job in due:
+                    if job.pause_on_idle and idle:
+                        job.stats.deferred += 1
+                        job.reschedule()
+                        continue
+                    if not self._has_budget(job):
+                        job.stats.deferred += 1
+                        job.reschedule(min(job.interval, 10))
+                        continue
+                    job.running = True
+                    self._executor.submit(self._run_job, job)
+                next_due = min((j.next_run for j in self._jobs.values() if j.enabled and not j.running),
+                               default=now + 60)
+            self._wake.wait(timeout=max(self.tick, min(60.0, next_due - time.monotonic())))
+
+    def _run_job(self, job):
+        start = time.monotonic()
+        try:
+            job.fn()
+        except Exception as e:
+            job.stats.failures += 1
+            job.stats.last_error = str(e)
+            logging.warning(f"[排程] 工作 {job.name} 失敗: {e}")
+        finally:
+            elapsed = time.monotonic() - start
+            with self._lock:
+                job.stats.runs += 1
+                job.stats.total_time += elapsed
+                job.stats.last_time = elapsed
+                job.stats.max_time = max(job.stats.max_time, elapsed)
+                job.stats.last_run = time.time()
+                job.running = False
+                job.reschedule()
+            self._wake.set()
@@ -0,0 +1,81 @@
+"""
+狙擊偵測 (Sniping Ladder)
+=============================
+在依單價排序的上架階梯上，找出「買下斷層前所有低價單，再以斷層價格轉賣」的最佳位置：
+
+    買下前 k 筆：數量 Q[k]、成本 C[k]（累積和）
+    以第 k+1 筆的單價轉賣：利潤 = Q[k] × 單價[k] × (1 - 稅率) - C[k]
+
+只走訪階梯一次；HQ 與 NQ 分開計算（HQ 不會以 NQ 價格轉賣，反之亦然）。
+"""
+
+CLIFF_AVG_RATIO = 3.0   # 斷層價格超過均價此倍數時視為不合理的標價，不以此轉賣
+PENNY_MIN_ROI = 200     # 利潤未達門檻時，ROI 超過此百分比且成本低於 PENNY_MAX_COST 仍值得狙擊
+PENNY_MAX_COST = 5000
+
+
+def best_snipe(ladder, tax_rate=0.05, avg_price=0):
+    """
+    ladder: 依單價遞增的 [(單價, 數量)]
+    Return: {"profit", "cost", "quantity", "count", "buy_max", "resale", "roi"}；沒有獲利位置時回傳 None
+    """
+    keep = 1 - tax_rate
+    best = None
+    quantity = cost = 0
+    for k in range(1, len(ladder)):
+        price, qty = ladder[k - 1]
+        quantity += qty
+        cost += price * qty
+        resale = ladder[k][0]
+        if avg_price > 0 and resale > avg_price * CLIFF_AVG_RATIO:
+            break   # 之後的價格只會更高
+        if resale <= price:
+            continue
+        profit = quantity * resale * keep - cost
+        if profit > 0 and (best is None or profit > best["profit"]):
+            best = {
+                "profit": profit,
+                "cost": cost,
+                "quantity": quantity,
+                "count": k,
+                "buy_max": price,
+                "resale": resale,
+                "roi": profit / cost * 100 if cost > 0 else 0,
+            }
+    return best
+
+
+def is_worth_sniping(snipe, min_profit=0):
+    """總利潤達門檻，或 ROI > 200% 且成本 < 5000（小額高報酬）才值得狙擊。"""
+    if not snipe or snipe["profit"] <= 0:
+        return False
+    if snipe["profit"] >= min_profit:
+        return True
+    return snipe["roi"] > PENNY_MIN_ROI and snipe["cost"] < PENNY_MAX_COST
+
+
+def reprice_snipe(quantity, resale, cost, tax_rate=0.05):
+    """同一個買進位置在另一個稅率下的結果（設定變更時重算已掃描的列，不需重抓上架資料）。"""
+    profit = quantity * resale * (1 - tax_rate) - cost
+    return {"profit": profit, "cost": cost, "quantity": quantity, "resale": resale,
+            "roi": profit / cost * 100 if cost > 0 else 0}
+
+
+def best_snipe_listings(listings, tax_rate=0.05, avg_price=0):
+    """
+    以 Universalis 上架列表計算（HQ / NQ 各自一條階梯，取利潤較高者）。
+    listings 不需事先排序。
+    """
+    ladders = {}
+    for l in sorted(listings, key=lambda x: x.get("pricePerUnit", 0)):
+        price = l.get("pricePerUnit", 0)
+        if price > 0:
+            ladders.setdefault(bool(l.get("hq")), []).append((price, l.get("quantity", 0)))
+
+    best = None
+    for hq, ladder in ladders.items():
+        snipe = best_snipe(ladder, tax_rate, avg_price)
+        if snipe and (best is None or snipe["profit"] > best["profit"]):
+            snipe["hq"] = hq
+            best = snipe
+    return best
@@ -0,0 +1,118 @@
+"""
+背景工作執行器 (Task Executor)
+=============================
+取代各 UI 事件直接 new threading.Thread 的做法：
+
+1. 固定數量的 worker（有界），不會因連續點擊而無限制開執行緒
+2. 每個 view（例如 "market"、"crafting"）只保留最新一次請求：
+   送出新工作時，同一 view 的舊工作會被取消（latest request wins）
+3. 兩條優先權通道：
+   - interactive：使用者點擊後等待結果的查詢（市場資料、配方、搜尋）
+   - background：耗時掃描（市場熱賣、最愛掃描），不會佔用互動通道的 worker
+4. 結果回到 UI 執行緒前再檢查一次取消狀態，過期結果直接丟棄
+"""
+
+import itertools
+import logging
+import queue
+import threading
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+
+class CancelToken:
+    """單次請求的取消旗標；同一 view 有新請求時會被設為 cancelled。"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, view):
+        self.view = view
+        self.id = next(self._ids)
+        self._event = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self):
+        self._event.set()
+
+    def __repr__(self):
+        state = "cancelled" if self.cancelled else "active"
+        return f"<CancelToken {self.view}#{self.id} {state}>"
+
+
+class TaskExecutor:
+    """
+    有界 worker + 每個 view 最新請求優先的背景工作執行器。
+
+    dispatch: 將 callable 排入 UI 執行緒的函式（tkinter 使用 lambda fn: app.after(0, fn)）
+    """
+
+    def __init__(self, dispatch, interactive_workers=4, background_workers=2):
+        self._dispatch = dispatch
+        self._lock = threading.Lock()
+        self._latest = {}  # view -> CancelToken
+        self._queues = {INTERACTIVE: queue.Queue(), BACKGROUND: queue.Queue()}
+        self._threads = []
+        for lane, count in ((INTERACTIVE, interactive_workers), (BACKGROUND, background_workers)):
+            for i in range(max(1, count)):
+                t = threading.Thread(target=self._worker, args=(lane,), name=f"{lane}-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def submit(self, view, fn, *args, lane=INTERACTIVE, **kwargs):
+        """
+        送出工作：取消同一 view 尚未完成的舊工作，回傳新的 CancelToken。
+        fn 會以 fn(*args, token=token, **kwargs) 呼叫，需自行在適當時機檢查 token.cancelled。
+        """
+        token = CancelToken(view)
+        with self._lock:
+            previous = self._latest.get(view)
+            self._latest[view] = token
+        if previous is not None and not previous.cancelled:
+            previous.cancel()
+            logging.debug(f"[Executor] 取消舊工作 {previous}")
+        self._queues[lane].put((token, fn, args, kwargs))
+        return token
+
+    def cancel(self, view):
+        """取消指定 view 目前的工作（例如關閉視窗時）。"""
+        with self._lock:
+            token = self._latest.pop(view, None)
+        if token is not None:
+            token.cancel()
+
+    def is_current(self, token):
+        """token 是否仍是該 view 最新且未取消的請求。"""
+        if token is None:
+            return True
+        with self._lock:
+            return not token.cancelled and self._latest.get(token.view) is token
+
+    def call_soon(self, token, fn):
+        """
+        將 UI 更新排回主執行緒；執行前再次檢查 token，過期結果直接丟棄。
+        token 為 None 時不做檢查（相容舊呼叫方式）。
+        """
+        def _run():
+            if not self.is_current(token):
+                logging.debug(f"[Executor] 丟棄過期結果 {token}")
+                return
+            fn()
+        self._dispatch(_run)
+
+    def _worker(self, lane):
+        q = self._queues[lane]
+        while True:
+            token, fn, args, kwargs = q.get()
+            try:
+                # 排隊期間已被新請求取代，直接略過
+                if token.cancelled:
+                    continue
+                fn(*args, token=token, **kwargs)
+            except Exception:
+                logging.exception(f"[Executor] 背景工作失敗 {token}")
+            finally:
+                q.task_done()
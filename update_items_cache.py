@@ -12,6 +12,8 @@ FF14 物品快取自動更新工具
   python update_items_cache.py --full       # 完整重建
   python update_items_cache.py --maps-only  # 只更新藏寶圖別名
   python update_items_cache.py --dry-run    # 預覽模式（不寫入檔案）
+  python update_items_cache.py --workers 8 --rate 10  # 並行抓取（8 個 worker，每秒 10 次）
+  python update_items_cache.py --update-names  # 改名偵測（只重抓指紋有變化的物品）
 """
 
 import json
@@ -20,8 +22,15 @@ import sys
 import time
 import logging
 import argparse
+import hashlib
+import heapq
+import itertools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+from rate_limiter import TokenBucket
+
 # 嘗試匯入 requests（必須）
 try:
     import requests
@@ -32,239 +41,10 @@ except ImportError:
     sys.exit(1)
 
 # ==========================================
-# 簡體 → 繁體 轉換模組（內建對照表）
+# 簡體 → 繁體 轉換模組（chinese_converter.py）
 # ==========================================
 
-# 常見的簡繁差異字對照表（針對 FF14 物品名稱優化）
-# 格式：簡體字 → 繁體字
-SIMPLIFIED_TO_TRADITIONAL = {
-    # 通用對照
-    '与': '與', '专': '專', '业': '業', '丛': '叢', '东': '東',
-    '丝': '絲', '丢': '丟', '两': '兩', '严': '嚴', '丧': '喪',
-    '个': '個', '丰': '豐', '临': '臨', '为': '為', '丽': '麗',
-    '举': '舉', '义': '義', '乌': '烏', '乐': '樂', '乔': '喬',
-    '习': '習', '书': '書', '买': '買', '乱': '亂', '争': '爭',
-    '亏': '虧', '云': '雲', '亚': '亞', '产': '產', '亩': '畝',
-    '亲': '親', '亿': '億', '仅': '僅', '从': '從', '仓': '倉',
-    '仪': '儀', '们': '們', '价': '價', '众': '眾', '优': '優',
-    '伙': '夥', '会': '會', '伞': '傘', '伟': '偉', '传': '傳',
-    '伤': '傷', '伦': '倫', '伪': '偽', '似': '似', '佣': '傭',
-    '体': '體', '余': '餘', '佛': '佛', '你': '你', '佩': '佩',
-    '侠': '俠', '侣': '侶', '侦': '偵', '侧': '側', '侨': '僑',
-    '俩': '倆', '债': '債', '值': '值', '倾': '傾', '假': '假',
-    '偿': '償', '储': '儲', '催': '催', '像': '像', '儿': '兒',
-    '兑': '兌', '党': '黨', '兰': '蘭', '关': '關', '兴': '興',
-    '兹': '茲', '养': '養', '兽': '獸', '内': '內', '冈': '岡',
-    '册': '冊', '军': '軍', '农': '農', '冲': '沖', '决': '決',
-    '况': '況', '冻': '凍', '净': '淨', '凉': '涼', '减': '減',
-    '凤': '鳳', '凭': '憑', '凯': '凱', '击': '擊', '凿': '鑿',
-    '刊': '刊', '划': '劃', '刘': '劉', '则': '則', '刚': '剛',
-    '创': '創', '初': '初', '删': '刪', '别': '別', '刮': '刮',
-    '制': '製', '刹': '剎', '剂': '劑', '剑': '劍', '剧': '劇',
-    '剩': '剩', '剪': '剪', '副': '副', '割': '割', '劝': '勸',
-    '办': '辦', '务': '務', '动': '動', '励': '勵', '劲': '勁',
-    '劳': '勞', '势': '勢', '勋': '勳', '勤': '勤', '勾': '勾',
-    '包': '包', '匠': '匠', '区': '區', '医': '醫', '华': '華',
-    '协': '協', '单': '單', '卖': '賣', '占': '佔', '卫': '衛',
-    '卷': '卷', '厂': '廠', '厅': '廳', '历': '歷', '厉': '厲',
-    '压': '壓', '厌': '厭', '厨': '廚', '厩': '廄', '去': '去',
-    '县': '縣', '参': '參', '叔': '叔', '双': '雙', '发': '發',
-    '变': '變', '叙': '敘', '叠': '疊', '只': '只', '台': '台',
-    '号': '號', '叹': '嘆', '吊': '弔', '后': '後', '吓': '嚇',
-    '吕': '呂', '吗': '嗎', '听': '聽', '启': '啟', '呐': '吶',
-    '呕': '嘔', '呛': '嗆', '员': '員', '呜': '嗚', '咏': '詠',
-    '咨': '諮', '响': '響', '哑': '啞', '哗': '嘩', '哟': '喲',
-    '唤': '喚', '啬': '嗇', '啸': '嘯', '喷': '噴', '嘱': '囑',
-    '噜': '嚕', '嘴': '嘴', '器': '器', '围': '圍', '园': '園',
-    '国': '國', '图': '圖', '圆': '圓', '圣': '聖', '场': '場',
-    '坏': '壞', '块': '塊', '坚': '堅', '坛': '壇', '坝': '壩',
-    '坠': '墜', '垒': '壘', '垦': '墾', '垫': '墊', '垳': '垳',
-    '埘': '塒', '城': '城', '域': '域', '培': '培', '堕': '墮',
-    '堡': '堡', '塔': '塔', '塘': '塘', '墙': '牆', '壮': '壯',
-    '声': '聲', '壳': '殼', '处': '處', '备': '備', '复': '復',
-    '够': '夠', '头': '頭', '夸': '誇', '夺': '奪', '奋': '奮',
-    '奖': '獎', '奥': '奧', '妆': '妝', '妇': '婦', '妈': '媽',
-    '姐': '姐', '姑': '姑', '娘': '娘', '娱': '娛', '婴': '嬰',
-    '嫔': '嬪', '子': '子', '孙': '孫', '学': '學', '宁': '寧',
-    '宝': '寶', '实': '實', '宠': '寵', '审': '審', '宪': '憲',
-    '宫': '宮', '家': '家', '宽': '寬', '宾': '賓', '寝': '寢',
-    '对': '對', '寻': '尋', '导': '導', '将': '將', '尔': '爾',
-    '尘': '塵', '尝': '嚐', '尧': '堯', '尽': '盡', '层': '層',
-    '屡': '屢', '属': '屬', '岁': '歲', '岂': '豈', '岗': '崗',
-    '岚': '嵐', '岛': '島', '岭': '嶺', '岳': '嶽', '岸': '岸',
-    '峡': '峽', '崭': '嶄', '巩': '鞏', '巨': '巨', '币': '幣',
-    '师': '師', '帅': '帥', '带': '帶', '帐': '帳', '帜': '幟',
-    '帧': '幀', '帮': '幫', '广': '廣', '庆': '慶', '庐': '廬',
-    '庙': '廟', '庞': '龐', '废': '廢', '廊': '廊', '开': '開',
-    '异': '異', '弃': '棄', '张': '張', '弥': '彌', '弦': '弦',
-    '弯': '彎', '弹': '彈', '强': '強', '归': '歸', '当': '當',
-    '录': '錄', '彝': '彝', '形': '形', '彻': '徹', '径': '徑',
-    '征': '征', '御': '禦', '忆': '憶', '志': '志', '忧': '憂',
-    '态': '態', '怀': '懷', '怜': '憐', '总': '總', '恋': '戀',
-    '恒': '恆', '恳': '懇', '恶': '惡', '悦': '悅', '悬': '懸',
-    '悯': '憫', '惊': '驚', '惧': '懼', '惨': '慘', '惩': '懲',
-    '惫': '憊', '惬': '愜', '愤': '憤', '慑': '懾', '懒': '懶',
-    '戏': '戲', '战': '戰', '戬': '戩', '户': '戶', '执': '執',
-    '扑': '撲', '扔': '扔', '托': '託', '扩': '擴', '扫': '掃',
-    '扬': '揚', '扰': '擾', '折': '折', '抚': '撫', '抛': '拋',
-    '护': '護', '报': '報', '担': '擔', '拟': '擬', '拢': '攏',
-    '拣': '揀', '拥': '擁', '择': '擇', '挂': '掛', '挡': '擋',
-    '挣': '掙', '挤': '擠', '挥': '揮', '挽': '挽', '损': '損',
-    '捕': '捕', '换': '換', '据': '據', '掷': '擲', '揽': '攬',
-    '搀': '攙', '搁': '擱', '搂': '摟', '搅': '攪', '搜': '搜',
-    '摄': '攝', '摆': '擺', '摇': '搖', '撑': '撐', '撤': '撤',
-    '撵': '攆', '操': '操', '擎': '擎', '收': '收', '攻': '攻',
-    '败': '敗', '效': '效', '敌': '敵', '数': '數', '整': '整',
-    '敛': '斂', '斗': '鬥', '斩': '斬', '断': '斷', '无': '無',
-    '既': '既', '时': '時', '旷': '曠', '昆': '昆', '昼': '晝',
-    '显': '顯', '晋': '晉', '晒': '曬', '晓': '曉', '晕': '暈',
-    '晖': '暉', '暂': '暫', '暗': '暗', '曲': '曲', '术': '術',
-    '机': '機', '权': '權', '杀': '殺', '杂': '雜', '杆': '桿',
-    '条': '條', '来': '來', '杨': '楊', '极': '極', '构': '構',
-    '析': '析', '枪': '槍', '柜': '櫃', '柠': '檸', '标': '標',
-    '栅': '柵', '栈': '棧', '栋': '棟', '样': '樣', '核': '核',
-    '桃': '桃', '桥': '橋', '档': '檔', '梦': '夢', '检': '檢',
-    '棂': '欞', '楼': '樓', '榄': '欖', '榨': '榨', '槛': '檻',
-    '横': '橫', '樱': '櫻', '橱': '櫥', '欢': '歡', '歼': '殲',
-    '残': '殘', '殁': '歿', '殇': '殤', '毁': '毀', '毕': '畢',
-    '毙': '斃', '气': '氣', '氢': '氫', '汇': '匯', '汉': '漢',
-    '污': '污', '汤': '湯', '沈': '沈', '沉': '沉', '沟': '溝',
-    '没': '沒', '沦': '淪', '沧': '滄', '沪': '滬', '泛': '泛',
-    '注': '注', '泪': '淚', '泼': '潑', '洁': '潔', '洒': '灑',
-    '浆': '漿', '浇': '澆', '浊': '濁', '测': '測', '浑': '渾',
-    '浓': '濃', '浅': '淺', '济': '濟', '浪': '浪', '浮': '浮',
-    '涌': '湧', '涛': '濤', '润': '潤', '涩': '澀', '淀': '澱',
-    '渊': '淵', '渐': '漸', '渔': '漁', '渗': '滲', '温': '溫',
-    '湾': '灣', '溃': '潰', '滚': '滾', '滞': '滯', '满': '滿',
-    '滤': '濾', '滥': '濫', '漓': '灕', '潜': '潛', '潭': '潭',
-    '濑': '瀨', '灭': '滅', '灯': '燈', '灵': '靈', '灾': '災',
-    '灿': '燦', '炉': '爐', '炎': '炎', '炮': '炮', '炼': '煉',
-    '烁': '爍', '烂': '爛', '烛': '燭', '烟': '煙', '烦': '煩',
-    '烧': '燒', '烫': '燙', '热': '熱', '焕': '煥', '焰': '焰',
-    '煞': '煞', '熏': '燻', '爱': '愛', '牍': '牘', '状': '狀',
-    '犹': '猶', '狈': '狽', '狞': '獰', '独': '獨', '狮': '獅',
-    '猎': '獵', '猪': '豬', '猫': '貓', '献': '獻', '猴': '猴',
-    '玑': '璣', '环': '環', '现': '現', '玛': '瑪', '珐': '琺',
-    '珑': '瓏', '珲': '琿', '瑶': '瑤', '璃': '璃', '瓮': '甕',
-    '电': '電', '画': '畫', '畅': '暢', '异': '異', '疗': '療',
-    '疮': '瘡', '疯': '瘋', '症': '症', '痒': '癢', '痕': '痕',
-    '瘫': '癱', '瘾': '癮', '盏': '盞', '盐': '鹽', '监': '監',
-    '盖': '蓋', '盘': '盤', '盾': '盾', '眉': '眉', '着': '著',
-    '睁': '睜', '睐': '睞', '瞒': '瞞', '矛': '矛', '矫': '矯',
-    '砖': '磚', '础': '礎', '确': '確', '硕': '碩', '碍': '礙',
-    '碗': '碗', '碛': '磧', '磁': '磁', '礼': '禮', '祝': '祝',
-    '神': '神', '祸': '禍', '禅': '禪', '离': '離', '种': '種',
-    '积': '積', '称': '稱', '秘': '秘', '秩': '秩', '税': '稅',
-    '稳': '穩', '穷': '窮', '窃': '竊', '窍': '竅', '窝': '窩',
-    '窥': '窺', '竞': '競', '笔': '筆', '笼': '籠', '筑': '築',
-    '筝': '箏', '策': '策', '签': '簽', '简': '簡', '箱': '箱',
-    '篮': '籃', '类': '類', '粮': '糧', '糙': '糙', '纠': '糾',
-    '红': '紅', '纤': '纖', '约': '約', '级': '級', '纪': '紀',
-    '纫': '紉', '纬': '緯', '纯': '純', '纱': '紗', '纲': '綱',
-    '纳': '納', '纵': '縱', '纷': '紛', '纸': '紙', '纹': '紋',
-    '纺': '紡', '纽': '紐', '线': '線', '练': '練', '组': '組',
-    '细': '細', '织': '織', '终': '終', '绍': '紹', '经': '經',
-    '绑': '綁', '结': '結', '绕': '繞', '绘': '繪', '给': '給',
-    '络': '絡', '绝': '絕', '统': '統', '继': '繼', '绩': '績',
-    '绪': '緒', '续': '續', '绮': '綺', '绯': '緋', '绰': '綽',
-    '绳': '繩', '维': '維', '绵': '綿', '综': '綜', '绿': '綠',
-    '缀': '綴', '缅': '緬', '缆': '纜', '缔': '締', '缕': '縷',
-    '编': '編', '缘': '緣', '缚': '縛', '缝': '縫', '缠': '纏',
-    '缤': '繽', '缨': '纓', '缩': '縮', '缭': '繚', '缰': '韁',
-    '缴': '繳', '罐': '罐', '网': '網', '罗': '羅', '罚': '罰',
-    '罢': '罷', '翅': '翅', '翔': '翔', '耀': '耀', '职': '職',
-    '联': '聯', '聪': '聰', '肃': '肅', '肠': '腸', '肤': '膚',
-    '肿': '腫', '胀': '脹', '胁': '脅', '胆': '膽', '脉': '脈',
-    '脏': '髒', '脑': '腦', '脚': '腳', '脱': '脫', '脸': '臉',
-    '腊': '臘', '腻': '膩', '腾': '騰', '舆': '輿', '舰': '艦',
-    '舱': '艙', '艰': '艱', '艺': '藝', '节': '節', '芦': '蘆',
-    '芜': '蕪', '苍': '蒼', '苏': '蘇', '范': '範', '茧': '繭',
-    '荐': '薦', '荒': '荒', '荡': '蕩', '荣': '榮', '药': '藥',
-    '莲': '蓮', '莱': '萊', '获': '獲', '萤': '螢', '营': '營',
-    '萧': '蕭', '蒋': '蔣', '蒙': '蒙', '蓝': '藍', '蒲': '蒲',
-    '蔷': '薔', '蕴': '蘊', '薪': '薪', '藏': '藏', '虑': '慮',
-    '虚': '虛', '虫': '蟲', '虽': '雖', '蚀': '蝕', '蛇': '蛇',
-    '蛮': '蠻', '蜗': '蝸', '蜡': '蠟', '蝇': '蠅', '蝎': '蠍',
-    '蝴': '蝴', '螺': '螺', '蟠': '蟠', '蟾': '蟾', '行': '行',
-    '补': '補', '衬': '襯', '袄': '襖', '袋': '袋', '袜': '襪',
-    '装': '裝', '裤': '褲', '裹': '裹', '褐': '褐', '褴': '襤',
-    '览': '覽', '觅': '覓', '视': '視', '觉': '覺', '观': '觀',
-    '规': '規', '觑': '覷', '角': '角', '解': '解', '触': '觸',
-    '言': '言', '誉': '譽', '计': '計', '订': '訂', '认': '認',
-    '讨': '討', '让': '讓', '讯': '訊', '记': '記', '讲': '講',
-    '讳': '諱', '许': '許', '论': '論', '设': '設', '访': '訪',
-    '证': '證', '评': '評', '识': '識', '诊': '診', '词': '詞',
-    '译': '譯', '试': '試', '诗': '詩', '诚': '誠', '话': '話',
-    '该': '該', '详': '詳', '语': '語', '误': '誤', '说': '說',
-    '请': '請', '诸': '諸', '诺': '諾', '读': '讀', '课': '課',
-    '调': '調', '谁': '誰', '谈': '談', '谊': '誼', '谋': '謀',
-    '谓': '謂', '谢': '謝', '谣': '謠', '谦': '謙', '谨': '謹',
-    '谱': '譜', '谷': '谷', '豆': '豆', '象': '象', '豪': '豪',
-    '貌': '貌', '负': '負', '贡': '貢', '财': '財', '责': '責',
-    '贤': '賢', '败': '敗', '货': '貨', '质': '質', '购': '購',
-    '贮': '貯', '贯': '貫', '贰': '貳', '贱': '賤', '贴': '貼',
-    '贵': '貴', '贷': '貸', '贸': '貿', '费': '費', '赁': '賃',
-    '资': '資', '赋': '賦', '赌': '賭', '赏': '賞', '赔': '賠',
-    '赖': '賴', '赘': '贅', '赛': '賽', '赠': '贈', '赢': '贏',
-    '赵': '趙', '趋': '趨', '跃': '躍', '践': '踐', '踊': '踴',
-    '踪': '蹤', '蹄': '蹄', '蹦': '蹦', '蹲': '蹲', '躯': '軀',
-    '车': '車', '轧': '軋', '转': '轉', '轮': '輪', '软': '軟',
-    '轰': '轟', '轻': '輕', '载': '載', '较': '較', '辅': '輔',
-    '辆': '輛', '辈': '輩', '辉': '輝', '辑': '輯', '输': '輸',
-    '辖': '轄', '辗': '輾', '辙': '轍', '辞': '辭', '辩': '辯',
-    '边': '邊', '达': '達', '迁': '遷', '过': '過', '迈': '邁',
-    '运': '運', '进': '進', '远': '遠', '违': '違', '连': '連',
-    '迟': '遲', '适': '適', '选': '選', '逊': '遜', '透': '透',
-    '递': '遞', '逻': '邏', '遗': '遺', '遥': '遙', '邓': '鄧',
-    '邮': '郵', '邻': '鄰', '郑': '鄭', '酝': '醞', '酱': '醬',
-    '酿': '釀', '采': '採', '释': '釋', '鉴': '鑒', '钉': '釘',
-    '钊': '釗', '针': '針', '钓': '釣', '钛': '鈦', '钝': '鈍',
-    '钞': '鈔', '钟': '鐘', '钢': '鋼', '钥': '鑰', '钦': '欽',
-    '钧': '鈞', '钨': '鎢', '钩': '鉤', '钮': '鈕', '钯': '鈀',
-    '钱': '錢', '钳': '鉗', '钴': '鈷', '钵': '缽', '钻': '鑽',
-    '铁': '鐵', '铃': '鈴', '铅': '鉛', '铆': '鉚', '铉': '鉉',
-    '铜': '銅', '铝': '鋁', '铠': '鎧', '铡': '鍘', '铣': '銑',
-    '铤': '鋌', '铭': '銘', '铸': '鑄', '铺': '鋪', '链': '鏈',
-    '锁': '鎖', '锂': '鋰', '锅': '鍋', '锆': '鋯', '锈': '銹',
-    '锉': '銼', '锋': '鋒', '锌': '鋅', '锏': '鐧', '锐': '銳',
-    '锗': '鍺', '错': '錯', '锡': '錫', '锢': '錮', '锣': '鑼',
-    '锤': '錘', '锥': '錐', '锦': '錦', '锨': '鍁', '锭': '錠',
-    '键': '鍵', '锯': '鋸', '锰': '錳', '锲': '鍥', '锻': '鍛',
-    '镇': '鎮', '镊': '鑷', '镐': '鎬', '镑': '鎊', '镖': '鏢',
-    '镜': '鏡', '镣': '鐐', '镰': '鐮', '闪': '閃', '闭': '閉',
-    '问': '問', '闰': '閏', '闻': '聞', '闽': '閩', '阀': '閥',
-    '阁': '閣', '阅': '閱', '阔': '闊', '阙': '闕', '阚': '闞',
-    '阡': '阡', '阵': '陣', '阶': '階', '阻': '阻', '际': '際',
-    '陆': '陸', '陈': '陳', '陉': '陘', '陕': '陝', '陨': '隕',
-    '险': '險', '随': '隨', '隐': '隱', '隶': '隸', '雇': '僱',
-    '雏': '雛', '雳': '靂', '雾': '霧', '霁': '霽', '霄': '霄',
-    '霜': '霜', '静': '靜', '靠': '靠', '鞑': '韃', '韦': '韋',
-    '韩': '韓', '韵': '韻', '项': '項', '顶': '頂', '顷': '頃',
-    '顺': '順', '须': '須', '顽': '頑', '顾': '顧', '颁': '頒',
-    '颂': '頌', '预': '預', '颅': '顱', '领': '領', '颇': '頗',
-    '频': '頻', '颓': '頹', '颗': '顆', '题': '題', '颜': '顏',
-    '额': '額', '颠': '顛', '颤': '顫', '风': '風', '飙': '飆',
-    '飞': '飛', '饥': '飢', '饨': '飩', '饭': '飯', '饮': '飲',
-    '饰': '飾', '饱': '飽', '饲': '飼', '饺': '餃', '饼': '餅',
-    '馅': '餡', '馆': '館', '馈': '饋', '馒': '饅', '驮': '馱',
-    '驯': '馴', '驰': '馳', '驱': '驅', '驳': '駁', '驴': '驢',
-    '驶': '駛', '驹': '駒', '驻': '駐', '驼': '駝', '驾': '駕',
-    '骂': '罵', '骄': '驕', '验': '驗', '骆': '駱', '骇': '駭',
-    '骑': '騎', '骗': '騙', '骚': '騷', '骞': '騫', '骤': '驟',
-    '骥': '驥', '骨': '骨', '髅': '髏', '鬼': '鬼', '魅': '魅',
-    '魇': '魘', '鱼': '魚', '鲁': '魯', '鲈': '鱸', '鲍': '鮑',
-    '鲛': '鮫', '鲜': '鮮', '鲤': '鯉', '鲨': '鯊', '鲫': '鯽',
-    '鲸': '鯨', '鲷': '鯛', '鳄': '鱷', '鳗': '鰻', '鳞': '鱗',
-    '鸟': '鳥', '鸠': '鳩', '鸡': '雞', '鸢': '鳶', '鸣': '鳴',
-    '鸥': '鷗', '鸦': '鴉', '鸭': '鴨', '鸵': '鴕', '鸽': '鴿',
-    '鹃': '鵑', '鹅': '鵝', '鹈': '鵜', '鹉': '鵡', '鹊': '鵲',
-    '鹏': '鵬', '鹘': '鶻', '鹤': '鶴', '鹦': '鸚', '鹫': '鷲',
-    '鹰': '鷹', '鹿': '鹿', '麦': '麥', '麻': '麻', '黄': '黃',
-    '鼎': '鼎', '鼓': '鼓', '鼠': '鼠', '鼹': '鼴', '齐': '齊',
-    '齿': '齒', '龄': '齡', '龙': '龍', '龟': '龜',
-    # FF14 特殊用語
-    '杂货': '雜貨', '宠物': '寵物', '坐骑': '坐騎',
-}
+from chinese_converter import convert_simplified_to_traditional
 
 logging.basicConfig(
     level=logging.INFO,
@@ -273,35 +53,26 @@ logging.basicConfig(
 )
 
 
-def convert_simplified_to_traditional(text):
-    """
-    將簡體中文文字轉換為繁體中文。
-    使用內建對照表，逐字替換。
-    """
-    if not text:
-        return text
-    result = []
-    for char in text:
-        result.append(SIMPLIFIED_TO_TRADITIONAL.get(char, char))
-    return ''.join(result)
-
-
-def create_session():
-    """建立帶有重試機制的 HTTP Session"""
+def create_session(pool_size=5):
+    """建立帶有重試機制的 HTTP Session（pool_size 需 ≥ 並行 worker 數）"""
     session = requests.Session()
     session.headers.update({
         "User-Agent": "FF14MarketApp-CacheUpdater/1.0",
         "Accept": "application/json",
     })
-    retries = Retry(total=3, backoff_factor=1, status_forcelist=[500, 502, 503, 504])
-    adapter = HTTPAdapter(max_retries=retries, pool_connections=5, pool_maxsize=5)
+    # raise_on_status=False：重試用完後回傳最後的 5xx 回應（而非拋出例外），呼叫端可區分伺服器錯誤與網路錯誤
+    retries = Retry(total=3, backoff_factor=1, status_forcelist=[500, 502, 503, 504], raise_on_status=False)
+    adapter = HTTPAdapter(max_retries=retries, pool_connections=pool_size, pool_maxsize=pool_size)
     session.mount("https://", adapter)
     session.mount("http://", adapter)
     return session
 
 
-def fetch_item_by_id(session, item_id):
-    """從 Cafemaker API 抓取單一物品資料"""
+def fetch_item_with_status(session, item_id):
+    """
+    從 Cafemaker API 抓取單一物品資料。
+    Returns: (data, status) - status 為 HTTP 狀態碼，網路錯誤時為 None
+    """
     url = f"https://cafemaker.wakingsands.com/Item/{item_id}"
     try:
         resp = session.get(url, timeout=10)
@@ -309,41 +80,411 @@ def fetch_item_by_id(session, item_id):
             data = resp.json()
             name = data.get("Name", "")
             name_ja = data.get("Name_ja", "")
-            return {"id": item_id, "name": name, "name_ja": name_ja}
+            return {"id": item_id, "name": name, "name_ja": name_ja}, 200
+        return None, resp.status_code
     except Exception as e:
         logging.warning(f"抓取物品 {item_id} 失敗: {e}")
-    return None
+    return None, None
+
+
+def fetch_item_by_id(session, item_id):
+    """從 Cafemaker API 抓取單一物品資料"""
+    data, _ = fetch_item_with_status(session, item_id)
+    return data
+
+
+# ==========================================
+# 並行爬蟲（有界 worker pool + 共用限速器）
+# ==========================================
+
+DEFAULT_WORKERS = 8
+DEFAULT_RATE = 10.0               # 每秒請求數上限（所有 worker 共用）
+RATE_LIMIT_STATUS = 429          # 只有 429 代表整體速率過高；5xx 由 session 的 Retry 逐請求重試
+FETCH_FAILED = object()          # 暫時失敗（網路錯誤 / 5xx / 持續 429），與「此 ID 沒有資料」(None) 區分
+
 
+def _fetch_with_backoff(session, item_id, limiter, max_retries=5):
+    """
+    透過共用限速器抓取單一物品。
+    - 429：降低全域速率並讓所有 worker 暫停（伺服器要求降速）
+    - 網路錯誤：只有這個請求自己指數退避重試，不影響其他 worker
+    - 5xx：session 的 Retry 已逐請求退避重試過，不再重試
+    Returns: 物品資料；ID 不存在時為 None；暫時失敗時為 FETCH_FAILED
+    """
+    for attempt in range(max_retries + 1):
+        limiter.acquire()
+        data, status = fetch_item_with_status(session, item_id)
+        if status == RATE_LIMIT_STATUS:
+            limiter.penalize(pause_seconds=min(30, 2 ** attempt))
+            continue
+        if status is None:
+            time.sleep(min(30, 2 ** attempt))
+            continue
+        if status >= 500:
+            logging.warning(f"物品 {item_id} 伺服器錯誤 ({status})")
+            return FETCH_FAILED
+        limiter.reward()
+        return data
+    logging.warning(f"物品 {item_id} 重試 {max_retries} 次仍失敗")
+    return FETCH_FAILED
+
+
+def crawl_items(session, item_ids, workers=DEFAULT_WORKERS, rate=DEFAULT_RATE, limiter=None):
+    """
+    並行抓取多個物品，結果依 item_ids 的原始順序逐一 yield (item_id, data)。
+    data 為 None 代表該 ID 無資料；FETCH_FAILED 代表暫時失敗（不是空 ID）。
+
+    - 最多同時 workers 個請求，整體速率受 limiter (token bucket) 限制
+    - 只預先排程 workers * 4 個 ID，記憶體用量固定
+    - 呼叫端可隨時 break（例如連續空 ID 過多），尚未執行的請求會被取消
+    """
+    workers = max(1, workers)
+    limiter = limiter or TokenBucket(rate=rate, capacity=workers)
+    id_iter = iter(item_ids)
+    pending = deque()
+
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="crawler")
+    try:
+        for item_id in itertools.islice(id_iter, workers * 4):
+            pending.append((item_id, executor.submit(_fetch_with_backoff, session, item_id, limiter)))
+
+        while pending:
+            item_id, future = pending.popleft()
+            data = future.result()
+            # 補上一個新的 ID，維持固定的在途請求數量
+            for next_id in itertools.islice(id_iter, 1):
+                pending.append((next_id, executor.submit(_fetch_with_backoff, session, next_id, limiter)))
+            yield item_id, data
+    finally:
+        for _, future in pending:
+            future.cancel()
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def crawl_with_requeue(session, item_ids, failed, workers=DEFAULT_WORKERS, rate=DEFAULT_RATE, stop=None):
+    """
+    crawl_items + 失敗重排。
+    failed: 呼叫端維護的 set（收到 FETCH_FAILED 時加入、成功時移除，並寫入 checkpoint）。
+    item_ids 走完（或 stop() 為 True，例如連續空 ID 過多）後，failed 中的 ID 再抓一次；
+    仍失敗的留在 failed 中。
+    """
+    for pair in crawl_items(session, item_ids, workers=workers, rate=rate):
+        yield pair
+        if stop and stop():
+            break
+    retry = sorted(failed)
+    if retry:
+        logging.info(f"重新抓取 {len(retry)} 個暫時失敗的 ID...")
+        yield from crawl_items(session, retry, workers=workers, rate=rate)
 
-def fetch_items_batch(session, start_id, end_id, progress_callback=None):
+
+def _report_failed(failed):
+    if failed:
+        ids = sorted(failed)
+        logging.warning(f"{len(ids)} 個 ID 重試後仍因網路 / 伺服器錯誤無法取得（並非空 ID）: "
+                        f"{ids[:20]}{' ...' if len(ids) > 20 else ''}")
+
+
+def fetch_items_batch(session, start_id, end_id, progress_callback=None,
+                      workers=DEFAULT_WORKERS, rate=DEFAULT_RATE):
     """
     批量抓取物品資料（範圍）。
     跳過無名稱的物品。
     """
     results = {}
     total = end_id - start_id + 1
-    batch_size = 100  # 每批查詢的 ID 數量
 
-    for batch_start in range(start_id, end_id + 1, batch_size):
-        batch_end = min(batch_start + batch_size - 1, end_id)
-        ids = list(range(batch_start, batch_end + 1))
-        ids_str = ",".join(str(i) for i in ids)
+    # Cafemaker 不支援批量 Item API，改以並行爬蟲逐個查詢
+    for item_id, data in crawl_items(session, range(start_id, end_id + 1), workers=workers, rate=rate):
+        if data is not FETCH_FAILED and data and data["name"]:
+            results[item_id] = data
 
-        # 使用批量 API（如果支援）
-        # Cafemaker 不支援批量 Item API，需逐個查詢
-        for item_id in ids:
-            data = fetch_item_by_id(session, item_id)
-            if data and data["name"]:
-                results[item_id] = data
+        if progress_callback:
+            done = item_id - start_id + 1
+            progress_callback(done, total)
 
-            if progress_callback:
-                done = item_id - start_id + 1
-                progress_callback(done, total)
+    return results
 
-        # 避免過度請求
-        time.sleep(0.1)
 
-    return results
+# ==========================================
+# 中斷續傳（Checkpoint）
+# ==========================================
+
+class CrawlCheckpoint:
+    """
+    長時間更新的中斷續傳紀錄（sidecar 檔案，例如 items_cache_tw.json.checkpoint）。
+
+    內容：模式、最後處理完成的 ID、尚未寫入主檔的結果、連續空 ID 計數、暫時失敗待重抓的 ID。
+    crawl_items 依 ID 順序回傳結果，因此 last_id 以前的 ID 除了 failed 清單中的以外必定已處理完畢，
+    續傳時從 last_id + 1 開始、並重新抓取 failed 中的 ID 即可，不會重複抓取。
+    """
+
+    def __init__(self, path, mode, every=500, interval=60):
+        self.path = path
+        self.mode = mode
+        self.every = every          # 每處理 N 個 ID 存檔一次
+        self.interval = interval    # 或每隔 N 秒存檔一次
+        self.state = None
+        self._since_save = 0
+        self._last_save = time.monotonic()
+
+    def load(self):
+        """讀取既有的 checkpoint；模式不符或檔案損毀時回傳 None。"""
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except Exception as e:
+            logging.warning(f"無法讀取 checkpoint {self.path}: {e}")
+            return None
+        if state.get("mode") != self.mode:
+            logging.warning(f"checkpoint 模式為 {state.get('mode')}，與目前模式 {self.mode} 不符，忽略")
+            return None
+        # JSON 的 key 一律是字串，by_name 的值需轉回 int
+        state["pending"] = {name: int(iid) for name, iid in state.get("pending", {}).items()}
+        state["failed"] = [int(iid) for iid in state.get("failed", [])]
+        self.state = state
+        logging.info(f"已載入 checkpoint：最後完成 ID {state.get('last_id')}，"
+                     f"暫存 {len(state['pending'])} 筆結果 ({state.get('updated_at', '?')})")
+        return state
+
+    def save(self, last_id, pending, consecutive_empty=0, counter=0, failed=()):
+        """原子寫入：先寫暫存檔再 os.replace，避免中途當機留下半個檔案。"""
+        state = {
+            "mode": self.mode,
+            "last_id": last_id,
+            "consecutive_empty": consecutive_empty,
+            "counter": counter,
+            "pending": pending,
+            "failed": sorted(failed),
+            "updated_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self.state = state
+        self._since_save = 0
+        self._last_save = time.monotonic()
+
+    def tick(self, last_id, pending, consecutive_empty=0, counter=0, failed=()):
+        """每處理一個 ID 呼叫一次，達到門檻時自動存檔。"""
+        self._since_save += 1
+        if self._since_save >= self.every or (time.monotonic() - self._last_save) >= self.interval:
+            self.save(last_id, pending, consecutive_empty, counter, failed)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+            logging.info(f"已移除 checkpoint: {self.path}")
+
+
+# ==========================================
+# 物品 ID 探索（取代逐一探測）
+# ==========================================
+
+LINEAR_MAX_ID = 50000             # 線性探測模式的預設掃描上限
+DISCOVERY_SOURCES = ("cafemaker", "universalis", "none")
+
+
+def _iter_cafemaker_pages(session, columns, page_size=3000):
+    """逐頁讀取 Cafemaker 的 Item 列表 API，yield 每一筆 row（約 15~20 次請求涵蓋整個物品表）。"""
+    page = 1
+    while page:
+        url = f"https://cafemaker.wakingsands.com/Item?page={page}&limit={page_size}&columns={columns}"
+        resp = session.get(url, timeout=30)
+        if resp.status_code != 200:
+            raise RuntimeError(f"Cafemaker 列表 API 錯誤: HTTP {resp.status_code} (page {page})")
+        data = resp.json()
+        yield from data.get("Results", [])
+        pagination = data.get("Pagination", {})
+        logging.info(f"[Cafemaker] 第 {page}/{pagination.get('PageTotal', '?')} 頁")
+        page = pagination.get("PageNext")
+        time.sleep(0.2)
+
+
+def _discover_from_cafemaker(session, page_size=3000):
+    """
+    透過 Cafemaker 的分頁列表 API 取得所有有名稱的物品 ID。
+    每頁 3000 筆，約 15 次請求即可涵蓋整個物品表。
+    """
+    ids = []
+    for row in _iter_cafemaker_pages(session, "ID,Name", page_size):
+        if row.get("ID") and row.get("Name"):
+            ids.append(int(row["ID"]))
+    return ids
+
+
+def _discover_from_universalis(session):
+    """Universalis 可交易物品清單（只含市場板可買賣的物品）。"""
+    resp = session.get("https://universalis.app/api/v2/marketable", timeout=30)
+    if resp.status_code != 200:
+        raise RuntimeError(f"Universalis marketable API 錯誤: HTTP {resp.status_code}")
+    return [int(i) for i in resp.json()]
+
+
+def _discover_from_file(path):
+    """
+    從本地 JSON 檔讀取候選 ID（離線 / 測試用）。
+    格式：[1, 2, 3, ...] 或 {"ids": [1, 2, 3, ...]}
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("ids", [])
+    return [int(i) for i in data]
+
+
+def discover_item_ids(session, source="cafemaker", ids_file=None):
+    """
+    探索階段：以少量請求取得「確定存在」的物品 ID 清單，
+    之後只對這些 ID 抓取名稱，不再逐一探測空號。
+
+    Returns: 排序後的 ID list；source 為 "none" 或探索失敗時回傳 None（改用線性探測）
+    """
+    try:
+        if ids_file:
+            ids = _discover_from_file(ids_file)
+            source = ids_file
+        elif source == "cafemaker":
+            ids = _discover_from_cafemaker(session)
+        elif source == "universalis":
+            ids = _discover_from_universalis(session)
+        else:
+            return None
+    except Exception as e:
+        logging.warning(f"[探索] 無法取得物品 ID 清單 ({source}): {e}，改用線性探測")
+        return None
+
+    ids = sorted(set(ids))
+    logging.info(f"[探索] 來源 {source} 共 {len(ids)} 個候選 ID")
+    return ids
+
+
+# ==========================================
+# 改名偵測（物品指紋 + 低成本變更來源）
+# ==========================================
+
+CHANGE_SOURCES = ("cafemaker", "none")
+
+
+def _snapshot_row(row):
+    """將 Cafemaker 列表 / 本地 dump 的一筆資料正規化為 {name, name_ja, patch}。"""
+    patch = row.get("Patch")
+    if patch is None:
+        patch = (row.get("GamePatch") or {}).get("ID")
+    return {
+        "name": row.get("Name") or "",
+        "name_ja": row.get("Name_ja") or "",
+        "patch": patch,
+    }
+
+
+def item_fingerprint(entry):
+    """物品指紋：name / name_ja / patch 三者任一改變，指紋就會不同。"""
+    raw = f"{entry['name']}\x1f{entry['name_ja']}\x1f{entry['patch']}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def load_item_snapshot(session, source="cafemaker", dump_file=None):
+    """
+    取得全部物品的 (name, name_ja, patch) 快照，作為改名偵測的變更來源。
+    - cafemaker：分頁列表 API 一次取回所有欄位，約 20 次請求
+    - dump_file：本地 JSON（離線 / 測試用），格式為 Cafemaker Results 的 list
+      或 {"items": [...]}，每筆需含 ID / Name，可選 Name_ja / Patch
+
+    Returns: {item_id: {name, name_ja, patch}}；source 為 "none" 或失敗時回傳 None
+    """
+    try:
+        if dump_file:
+            with open(dump_file, "r", encoding="utf-8") as f:
+                rows = json.load(f)
+            if isinstance(rows, dict):
+                rows = rows.get("items", [])
+            source = dump_file
+        elif source == "cafemaker":
+            rows = _iter_cafemaker_pages(session, "ID,Name,Name_ja,Patch,GamePatch.ID")
+        else:
+            return None
+        snapshot = {int(row["ID"]): _snapshot_row(row) for row in rows if row.get("ID")}
+    except Exception as e:
+        logging.warning(f"[改名偵測] 無法取得物品快照 ({source}): {e}，改為逐一重新抓取")
+        return None
+
+    logging.info(f"[改名偵測] 來源 {source} 共 {len(snapshot)} 筆物品快照")
+    return snapshot
+
+
+class FingerprintStore:
+    """
+    物品指紋紀錄（sidecar 檔案，例如 items_cache_tw.json.fingerprints）。
+    每個 ID 存一個指紋；改版後只需比對快照，指紋不同的 ID 才重新抓取。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.items = {}
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return self
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.items = {int(iid): fp for iid, fp in data.get("items", {}).items()}
+            logging.info(f"已載入 {len(self.items)} 個物品指紋 ({data.get('updated_at', '?')})")
+        except Exception as e:
+            logging.warning(f"無法讀取指紋檔 {self.path}: {e}，將重新建立")
+            self.items = {}
+        return self
+
+    def save(self):
+        """原子寫入，與 checkpoint 相同做法。"""
+        data = {
+            "updated_at": datetime.now().isoformat(timespec="seconds"),
+            "items": {str(iid): fp for iid, fp in sorted(self.items.items())},
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        logging.info(f"已寫入 {len(self.items)} 個物品指紋: {self.path}")
+
+
+def detect_changed_items(snapshot, fingerprints, by_name):
+    """
+    比對快照與指紋紀錄，回傳需要重新抓取的 ID（排序後）。
+    未變更的 ID 直接更新指紋；尚無指紋的 ID（第一次執行）改以
+    「快照名稱轉繁體後是否已在快取中」判斷，避免第一次就全部重抓。
+    """
+    id_to_names = {}
+    for name, item_id in by_name.items():
+        id_to_names.setdefault(item_id, set()).add(name)
+
+    changed = []
+    for item_id, names in id_to_names.items():
+        entry = snapshot.get(item_id)
+        if entry is None or not entry["name"]:
+            continue
+        fp = item_fingerprint(entry)
+        stored = fingerprints.items.get(item_id)
+        if stored is None:
+            is_changed = convert_simplified_to_traditional(entry["name"]) not in names
+        else:
+            is_changed = stored != fp
+        if is_changed:
+            changed.append(item_id)
+        else:
+            fingerprints.items[item_id] = fp
+
+    changed.sort()
+    logging.info(f"[改名偵測] {len(id_to_names)} 個已知物品中有 {len(changed)} 個需要更新名稱")
+    return changed
 
 
 def search_items_by_name(session, query, limit=100):
@@ -398,12 +539,15 @@ def add_treasure_map_aliases(by_name, dry_run=False):
     return added
 
 
-def update_cache_incremental(session, existing_data, max_id=50000, dry_run=False):
+def update_cache_incremental(session, existing_data, max_id=None, dry_run=False,
+                             workers=DEFAULT_WORKERS, rate=DEFAULT_RATE, checkpoint=None,
+                             candidate_ids=None):
     """
     增量更新模式：
-    1. 找出現有快取中最大的 Item ID
-    2. 只抓取比最大 ID 更新的物品
-    3. 轉換為繁體中文後加入快取
+    - 有 candidate_ids（探索階段的結果）：只抓取快取中尚未存在的 ID
+    - 否則（線性探測）：從現有最大 ID + 1 逐一抓取，連續 200 個空 ID 即停止
+    新名稱轉換為繁體中文後加入快取。
+    若提供 checkpoint，會定期存檔並可從上次中斷處續傳。
     """
     by_name = existing_data.get("by_name", {})
     
@@ -411,27 +555,51 @@ def update_cache_incremental(session, existing_data, max_id=50000, dry_run=False
     current_max_id = max(by_name.values()) if by_name else 0
     logging.info(f"現有快取最大 ID: {current_max_id}")
     
-    if current_max_id >= max_id:
-        logging.info("快取已是最新，無需更新")
-        return 0
-    
-    # 從最大 ID + 1 開始抓取
-    start_id = current_max_id + 1
-    logging.info(f"開始增量更新: ID {start_id} ~ {max_id}")
-    
     new_count = 0
-    batch_size = 500
-    
     consecutive_empty = 0  # 連續空白計數
     max_consecutive_empty = 200  # 連續 200 個空 ID 則停止
+    pending = {}  # 本次新增、尚未寫入主檔的名稱
+    failed = set()  # 暫時失敗、稍後重抓的 ID（不計入連續空 ID）
+    last_id = 0
     
-    for batch_start in range(start_id, max_id + 1, batch_size):
-        batch_end = min(batch_start + batch_size - 1, max_id)
-        
-        for item_id in range(batch_start, batch_end + 1):
-            data = fetch_item_by_id(session, item_id)
-            
-            if data and data["name"]:
+    # 續傳：合併上次暫存的結果並從中斷處繼續
+    state = checkpoint.state if checkpoint else None
+    if state:
+        pending = state["pending"]
+        if not dry_run:
+            by_name.update(pending)
+        new_count = state.get("counter", len(pending))
+        consecutive_empty = state.get("consecutive_empty", 0)
+        failed = set(state["failed"])
+        last_id = state["last_id"]
+    
+    if candidate_ids is not None:
+        known_ids = set(by_name.values())
+        target_ids = [i for i in candidate_ids
+                      if i > last_id and i not in known_ids and (max_id is None or i <= max_id)]
+        stop_on_empty = False
+        logging.info(f"開始增量更新: {len(target_ids)} 個新 ID（{workers} workers，{rate:g} 次/秒）")
+    else:
+        max_id = max_id or LINEAR_MAX_ID
+        start_id = max(current_max_id, last_id) + 1
+        target_ids = range(start_id, max_id + 1)
+        stop_on_empty = True
+        logging.info(f"開始增量更新: ID {start_id} ~ {max_id}（{workers} workers，{rate:g} 次/秒）")
+    
+    if not target_ids and not failed:
+        logging.info("快取已是最新，無需更新")
+        return new_count
+    
+    processed = 0
+    stopped = False
+    try:
+        for item_id, data in crawl_with_requeue(session, target_ids, failed, workers=workers, rate=rate,
+                                                stop=lambda: stopped):
+            processed += 1
+            if data is FETCH_FAILED:
+                failed.add(item_id)
+            elif data and data["name"]:
+                failed.discard(item_id)
                 consecutive_empty = 0
                 # 簡體 → 繁體轉換
                 tw_name = convert_simplified_to_traditional(data["name"])
@@ -439,72 +607,124 @@ def update_cache_incremental(session, existing_data, max_id=50000, dry_run=False
                 if tw_name not in by_name:
                     if not dry_run:
                         by_name[tw_name] = item_id
+                        pending[tw_name] = item_id
                     logging.info(f"[新增] ID:{item_id} → {tw_name}")
                     new_count += 1
             else:
+                failed.discard(item_id)
                 consecutive_empty += 1
-                if consecutive_empty >= max_consecutive_empty:
-                    logging.info(f"連續 {max_consecutive_empty} 個空 ID，停止掃描（至 ID:{item_id}）")
-                    break
             
-            # 進度顯示
-            if (item_id - start_id + 1) % 100 == 0:
-                logging.info(f"進度: ID {item_id} / {max_id} ({new_count} 個新物品)")
+            # 重抓失敗的 ID 時順序會回到較小的 ID，last_id 只往前推進
+            last_id = max(last_id, item_id)
+            if checkpoint and not dry_run:
+                checkpoint.tick(last_id, pending, consecutive_empty, new_count, failed)
             
-            time.sleep(0.05)  # 避免 API 過載
-        
-        if consecutive_empty >= max_consecutive_empty:
-            break
+            if stop_on_empty and not stopped and consecutive_empty >= max_consecutive_empty:
+                logging.info(f"連續 {max_consecutive_empty} 個空 ID，停止掃描（至 ID:{item_id}）")
+                stopped = True
+            
+            # 進度顯示
+            if processed % 100 == 0:
+                logging.info(f"進度: {processed}/{len(target_ids)}，ID {item_id} ({new_count} 個新物品)")
+    except KeyboardInterrupt:
+        if checkpoint and not dry_run:
+            checkpoint.save(last_id, pending, consecutive_empty, new_count, failed)
+        raise
     
-    logging.info(f"增量更新完成，共新增 {new_count} 個物品")
+    _report_failed(failed)
+    logging.info(f"增量更新完成，共請求 {processed} 個 ID，新增 {new_count} 個物品")
     return new_count
 
 
-def update_cache_full(session, max_id=50000, dry_run=False):
+def update_cache_full(session, max_id=None, dry_run=False,
+                      workers=DEFAULT_WORKERS, rate=DEFAULT_RATE, checkpoint=None,
+                      candidate_ids=None):
     """
     完整重建模式：
-    從 ID 1 開始抓取所有物品，建立全新的快取。
-    ⚠️ 警告：這會非常慢！可能需要數小時。
+    抓取所有物品，建立全新的快取。
+    - 有 candidate_ids：只抓取探索階段確認存在的 ID
+    - 否則從 ID 1 線性探測（連續 500 個空 ID 即停止）
+    ⚠️ 警告：這會很慢！總時間取決於 --rate 允許的請求速率。
+    若提供 checkpoint，會定期存檔並可從上次中斷處續傳。
     """
-    logging.warning("完整重建模式啟動！這可能需要數小時...")
-    
     by_name = {}
     new_count = 0
     consecutive_empty = 0
     max_consecutive_empty = 500
+    failed = set()
+    last_id = 0
     
-    for item_id in range(1, max_id + 1):
-        data = fetch_item_by_id(session, item_id)
-        
-        if data and data["name"]:
-            consecutive_empty = 0
-            tw_name = convert_simplified_to_traditional(data["name"])
+    state = checkpoint.state if checkpoint else None
+    if state:
+        by_name = state["pending"]
+        new_count = state.get("counter", len(by_name))
+        consecutive_empty = state.get("consecutive_empty", 0)
+        failed = set(state["failed"])
+        last_id = state["last_id"]
+        logging.info(f"從 ID {last_id + 1} 繼續完整重建（已有 {len(by_name)} 個物品）")
+    
+    if candidate_ids is not None:
+        target_ids = [i for i in candidate_ids if i > last_id and (max_id is None or i <= max_id)]
+        stop_on_empty = False
+    else:
+        max_id = max_id or LINEAR_MAX_ID
+        target_ids = range(last_id + 1, max_id + 1)
+        stop_on_empty = True
+    
+    logging.warning(f"完整重建模式啟動！共 {len(target_ids)} 個 ID，預估至少需要 {len(target_ids) / rate / 60:.0f} 分鐘...")
+    
+    processed = 0
+    stopped = False
+    try:
+        for item_id, data in crawl_with_requeue(session, target_ids, failed, workers=workers, rate=rate,
+                                                stop=lambda: stopped):
+            processed += 1
+            if data is FETCH_FAILED:
+                failed.add(item_id)
+            elif data and data["name"]:
+                failed.discard(item_id)
+                consecutive_empty = 0
+                tw_name = convert_simplified_to_traditional(data["name"])
+                
+                if tw_name not in by_name:
+                    if not dry_run:
+                        by_name[tw_name] = item_id
+                    new_count += 1
+            else:
+                failed.discard(item_id)
+                consecutive_empty += 1
             
-            if tw_name not in by_name:
-                if not dry_run:
-                    by_name[tw_name] = item_id
-                new_count += 1
-        else:
-            consecutive_empty += 1
-            if consecutive_empty >= max_consecutive_empty:
+            last_id = max(last_id, item_id)
+            if checkpoint and not dry_run:
+                checkpoint.tick(last_id, by_name, consecutive_empty, new_count, failed)
+            
+            if stop_on_empty and not stopped and consecutive_empty >= max_consecutive_empty:
                 logging.info(f"連續 {max_consecutive_empty} 個空 ID，停止（至 ID:{item_id}）")
-                break
-        
-        if item_id % 500 == 0:
-            logging.info(f"進度: ID {item_id} / {max_id} ({new_count} 個物品)")
-        
-        time.sleep(0.05)
+                stopped = True
+            
+            if processed % 500 == 0:
+                logging.info(f"進度: {processed}/{len(target_ids)}，ID {item_id} ({new_count} 個物品)")
+    except KeyboardInterrupt:
+        if checkpoint and not dry_run:
+            checkpoint.save(last_id, by_name, consecutive_empty, new_count, failed)
+        raise
     
-    logging.info(f"完整重建完成，共 {new_count} 個物品")
+    _report_failed(failed)
+    logging.info(f"完整重建完成，共請求 {processed} 個 ID，{new_count} 個物品")
     return {"by_name": by_name}
 
 
-def update_existing_names(session, existing_data, dry_run=False):
+def update_existing_names(session, existing_data, dry_run=False,
+                          workers=DEFAULT_WORKERS, rate=DEFAULT_RATE, checkpoint=None,
+                          snapshot=None, fingerprints=None):
     """
     更新現有物品名稱：
-    對現有快取中的每個物品重新從 API 取得名稱，
+    對現有快取中的物品重新從 API 取得名稱，
     並進行簡繁轉換，如果名稱有變更則更新。
     適用於遊戲改版後物品名稱被更新的情況。
+    - 有 snapshot + fingerprints：只處理指紋有變化的物品，名稱直接取自快照，快照缺名稱時才抓取
+    - 否則逐一重新抓取全部物品（舊行為）
+    若提供 checkpoint，會定期存檔並可從上次中斷處續傳。
     """
     by_name = existing_data.get("by_name", {})
     
@@ -515,35 +735,97 @@ def update_existing_names(session, existing_data, dry_run=False):
             id_to_names[item_id] = []
         id_to_names[item_id].append(name)
     
-    total = len(id_to_names)
+    if snapshot is not None and fingerprints is not None:
+        target_ids = detect_changed_items(snapshot, fingerprints, by_name)
+    else:
+        target_ids = sorted(id_to_names.keys())
+    total = len(target_ids)
     updated = 0
     checked = 0
+    pending = {}
+    failed = set()
     
-    logging.info(f"開始檢查 {total} 個物品的名稱更新...")
+    state = checkpoint.state if checkpoint else None
+    if state:
+        failed = set(state["failed"])
+        pending = state["pending"]
+        if not dry_run:
+            by_name.update(pending)
+        updated = state.get("counter", len(pending))
+        resumed_ids = [i for i in target_ids if i <= state["last_id"]]
+        target_ids = [i for i in target_ids if i > state["last_id"]]
+        checked = total - len(target_ids)
+        # 上次執行已處理過的 ID：指紋只在結束時寫入，續傳時補上，下次才不會再被判定為變更
+        if fingerprints is not None and snapshot is not None:
+            for item_id in resumed_ids:
+                entry = snapshot.get(item_id)
+                if entry and entry["name"]:
+                    fingerprints.items[item_id] = item_fingerprint(entry)
     
-    for item_id in sorted(id_to_names.keys()):
-        checked += 1
-        data = fetch_item_by_id(session, item_id)
-        
-        if data and data["name"]:
-            tw_name = convert_simplified_to_traditional(data["name"])
+    logging.info(f"開始檢查 {total} 個物品的名稱更新（剩餘 {len(target_ids)} 個）...")
+    
+    # 快照已有名稱的物品不需再抓取；兩個來源都依 ID 遞增，合併後 checkpoint 的 last_id 仍然有效
+    snapshot = snapshot or {}
+    from_snapshot = [i for i in target_ids if snapshot.get(i, {}).get("name")]
+    to_fetch = [i for i in target_ids if not snapshot.get(i, {}).get("name")]
+    if from_snapshot:
+        logging.info(f"{len(from_snapshot)} 個物品直接使用快照名稱，{len(to_fetch)} 個需要抓取")
+    results = heapq.merge(
+        ((i, {"id": i, "name": snapshot[i]["name"], "name_ja": snapshot[i]["name_ja"]}) for i in from_snapshot),
+        crawl_with_requeue(session, to_fetch, failed, workers=workers, rate=rate),
+        key=lambda pair: pair[0],
+    )
+
+    last_id = state["last_id"] if state else 0
+    try:
+        for item_id, data in results:
+            checked += 1
             
-            # 檢查轉換後的名稱是否已存在
-            if tw_name not in by_name:
-                if not dry_run:
-                    by_name[tw_name] = item_id
-                logging.info(f"[更新] ID:{item_id} 新增名稱: {tw_name}")
-                updated += 1
-        
-        if checked % 200 == 0:
-            logging.info(f"進度: {checked}/{total} ({updated} 個更新)")
-        
-        time.sleep(0.05)
+            if data is FETCH_FAILED:
+                failed.add(item_id)
+            elif data and data["name"]:
+                failed.discard(item_id)
+                tw_name = convert_simplified_to_traditional(data["name"])
+                if fingerprints is not None and item_id in snapshot:
+                    fingerprints.items[item_id] = item_fingerprint(snapshot[item_id])
+                
+                # 檢查轉換後的名稱是否已存在
+                if tw_name not in by_name:
+                    if not dry_run:
+                        by_name[tw_name] = item_id
+                        pending[tw_name] = item_id
+                    logging.info(f"[更新] ID:{item_id} 新增名稱: {tw_name}")
+                    updated += 1
+            else:
+                failed.discard(item_id)
+            
+            last_id = max(last_id, item_id)
+            if checkpoint and not dry_run:
+                checkpoint.tick(last_id, pending, 0, updated, failed)
+            
+            if checked % 200 == 0:
+                logging.info(f"進度: {checked}/{total} ({updated} 個更新)")
+    except KeyboardInterrupt:
+        if checkpoint and not dry_run:
+            checkpoint.save(last_id, pending, 0, updated, failed)
+        raise
     
+    _report_failed(failed)
     logging.info(f"名稱更新完成，共更新 {updated} 個")
     return updated
 
 
+def _positive_float(value):
+    """argparse 型別：大於 0 的浮點數（--rate 為 0 或負數時限速器會除以零）"""
+    try:
+        number = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"不是有效的數字: {value}")
+    if not 0 < number < float("inf"):
+        raise argparse.ArgumentTypeError(f"必須大於 0: {value}")
+    return number
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="FF14 物品快取自動更新工具",
@@ -554,8 +836,13 @@ def main():
   python update_items_cache.py --full       # 完整重建（非常慢）
   python update_items_cache.py --maps-only  # 只更新藏寶圖別名
   python update_items_cache.py --dry-run    # 預覽模式（不寫入檔案）
-  python update_items_cache.py --update-names  # 更新現有物品名稱
+  python update_items_cache.py --update-names  # 更新現有物品名稱（只重抓有變更的物品）
+  python update_items_cache.py --update-names --dump-file items.json  # 以本地快照偵測改名
   python update_items_cache.py --convert-only  # 只做簡繁轉換（不抓API）
+  python update_items_cache.py --full --workers 16 --rate 20  # 並行完整重建
+  python update_items_cache.py --resume     # 從上次中斷處繼續（自動沿用原模式）
+  python update_items_cache.py --discovery none  # 不使用 ID 探索，改回逐一探測
+  python update_items_cache.py --ids-file ids.json  # 使用本地 ID 清單（離線 / 測試）
         """
     )
     parser.add_argument("--full", action="store_true", help="完整重建快取（非常慢）")
@@ -563,8 +850,19 @@ def main():
     parser.add_argument("--dry-run", action="store_true", help="預覽模式，不寫入檔案")
     parser.add_argument("--update-names", action="store_true", help="更新現有物品名稱（檢查改名）")
     parser.add_argument("--convert-only", action="store_true", help="只對現有快取做簡繁轉換")
-    parser.add_argument("--max-id", type=int, default=50000, help="最大掃描 ID（預設: 50000）")
+    parser.add_argument("--max-id", type=int, default=None,
+                        help=f"最大掃描 ID（探索模式預設不限；線性探測預設: {LINEAR_MAX_ID}）")
     parser.add_argument("--json-file", default="items_cache_tw.json", help="快取 JSON 檔案路徑")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help=f"並行 worker 數量（預設: {DEFAULT_WORKERS}）")
+    parser.add_argument("--rate", type=_positive_float, default=DEFAULT_RATE, help=f"每秒請求數上限（預設: {DEFAULT_RATE:g}）")
+    parser.add_argument("--discovery", choices=DISCOVERY_SOURCES, default="cafemaker",
+                        help="物品 ID 探索來源（預設: cafemaker 分頁列表；none = 逐一探測）")
+    parser.add_argument("--ids-file", default=None, help="從本地 JSON 讀取候選 ID 清單（覆蓋 --discovery）")
+    parser.add_argument("--change-source", choices=CHANGE_SOURCES, default="cafemaker",
+                        help="--update-names 的改名偵測來源（預設: cafemaker 列表快照；none = 全部重抓）")
+    parser.add_argument("--dump-file", default=None, help="從本地 JSON 讀取物品快照（覆蓋 --change-source）")
+    parser.add_argument("--resume", action="store_true", help="從 checkpoint 繼續上次中斷的更新")
+    parser.add_argument("--checkpoint-every", type=int, default=500, help="每處理 N 個 ID 存一次 checkpoint（預設: 500）")
     
     args = parser.parse_args()
     
@@ -581,6 +879,29 @@ def main():
     
     changes_made = 0
     
+    # 中斷續傳：沿用 checkpoint 記錄的模式
+    checkpoint_path = json_file + ".checkpoint"
+    if args.resume:
+        if not os.path.exists(checkpoint_path):
+            logging.error(f"找不到 checkpoint 檔案 {checkpoint_path}，無法續傳")
+            return
+        with open(checkpoint_path, "r", encoding="utf-8") as f:
+            resume_mode = json.load(f).get("mode")
+        args.full = resume_mode == "full"
+        args.update_names = resume_mode == "update_names"
+        logging.info(f"續傳模式: {resume_mode}")
+    elif os.path.exists(checkpoint_path) and not (args.convert_only or args.maps_only):
+        logging.warning(f"偵測到未完成的 checkpoint ({checkpoint_path})，可加上 --resume 繼續；本次將重新開始")
+    
+    def make_checkpoint(mode):
+        checkpoint = CrawlCheckpoint(checkpoint_path, mode, every=args.checkpoint_every)
+        if args.resume:
+            checkpoint.load()
+        return checkpoint
+    
+    checkpoint = None
+    fingerprints = None
+    
     # 模式判斷
     if args.convert_only:
         # 只做簡繁轉換
@@ -606,24 +927,39 @@ def main():
     elif args.full:
         # 完整重建
         logging.info("=== 完整重建模式 ===")
-        session = create_session()
-        data = update_cache_full(session, max_id=args.max_id, dry_run=args.dry_run)
+        session = create_session(pool_size=args.workers)
+        checkpoint = make_checkpoint("full")
+        candidate_ids = discover_item_ids(session, args.discovery, args.ids_file)
+        data = update_cache_full(session, max_id=args.max_id, dry_run=args.dry_run,
+                                 workers=args.workers, rate=args.rate, checkpoint=checkpoint,
+                                 candidate_ids=candidate_ids)
         add_treasure_map_aliases(data["by_name"], dry_run=args.dry_run)
         changes_made = len(data.get("by_name", {}))
     
     elif args.update_names:
         # 更新名稱
         logging.info("=== 名稱更新模式 ===")
-        session = create_session()
-        changes_made = update_existing_names(session, data, dry_run=args.dry_run)
+        session = create_session(pool_size=args.workers)
+        checkpoint = make_checkpoint("update_names")
+        snapshot = load_item_snapshot(session, args.change_source, args.dump_file)
+        if snapshot is not None:
+            fingerprints = FingerprintStore(json_file + ".fingerprints").load()
+        changes_made = update_existing_names(session, data, dry_run=args.dry_run,
+                                             workers=args.workers, rate=args.rate,
+                                             checkpoint=checkpoint,
+                                             snapshot=snapshot, fingerprints=fingerprints)
         changes_made += add_treasure_map_aliases(data["by_name"], dry_run=args.dry_run)
     
     else:
         # 增量更新（預設）
         logging.info("=== 增量更新模式 ===")
-        session = create_session()
+        session = create_session(pool_size=args.workers)
+        checkpoint = make_checkpoint("incremental")
+        candidate_ids = discover_item_ids(session, args.discovery, args.ids_file)
         changes_made = update_cache_incremental(
-            session, data, max_id=args.max_id, dry_run=args.dry_run
+            session, data, max_id=args.max_id, dry_run=args.dry_run,
+            workers=args.workers, rate=args.rate, checkpoint=checkpoint,
+            candidate_ids=candidate_ids
         )
         changes_made += add_treasure_map_aliases(data["by_name"], dry_run=args.dry_run)
     
@@ -640,10 +976,20 @@ def main():
         
         total_items = len(data.get("by_name", {}))
         logging.info(f"✅ 更新完成！{json_file} 現有 {total_items} 個物品條目")
+        
+        # 主檔寫入成功後才移除 checkpoint、更新指紋
+        if checkpoint:
+            checkpoint.clear()
+        if fingerprints is not None:
+            fingerprints.save()
     elif args.dry_run:
         logging.info(f"📋 預覽模式：共 {changes_made} 個變更（未寫入檔案）")
     else:
         logging.info("ℹ️ 無需更新")
+        if checkpoint:
+            checkpoint.clear()
+        if fingerprints is not None:
+            fingerprints.save()
     
     # 清理臨時腳本
     cleanup_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "add_map_aliases.py")
@@ -652,4 +998,8 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    except KeyboardInterrupt:
+        logging.warning("已中斷！進度已存入 checkpoint，可使用 --resume 繼續")
+        sys.exit(130)